@@ -0,0 +1,131 @@
+"""
+Times the per-frame camera math in tut_07_world_in_motion: resolving the
+spherical camera position and building the look-at matrix.
+
+"baseline" is the original code, kept below: vectors and matrices backed
+by 1x4/4x4 float64 numpy.matrix objects, and a look-at matrix built from
+normalized vectors and then inverted.  "current" is the tutorial as it is
+now: resolveCamPosition does its arithmetic on the float components of
+Vector/Point, and calcLookAtMatrix is lookAt(), which writes the inverse
+directly from indexed floats without building or inverting a matrix.
+
+Run from the repository root:
+    python benchmarks/bench_camera.py
+"""
+import os
+import sys
+import math
+import timeit
+import numpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gltut_framework import Vector
+from tut_07_world_in_motion.world_scene import Tutorial
+
+NUMBER = 20000
+
+class OldMatrix(object):
+    def __init__(self, data=None):
+        if data is not None:
+            self._data = data.copy()
+        else:
+            self._data = numpy.matrix(numpy.identity(4), dtype=float)
+
+    def inverse(self):
+        return type(self)(data=self._data.I)
+
+    def __setitem__(self, index, value):
+        self._data.itemset(index[0], index[1], value)
+
+class OldVector(object):
+    def __init__(self, x=0, y=0, z=0, w=0, data=None):
+        if data is not None:
+            self._data = data.copy()
+        else:
+            self._data = numpy.matrix([[x, y, z, w]], dtype=float)
+
+    def __getitem__(self, index):
+        return self._data.item(0, index)
+
+    def __add__(self, other):
+        return OldVector(data=numpy.add(self._data, other._data))
+
+    def __sub__(self, other):
+        return OldVector(data=numpy.subtract(self._data, other._data))
+
+    def __mul__(self, other):
+        return OldVector(data=self._data * other)
+
+    def length(self):
+        return numpy.linalg.norm(self._data)
+
+    def normal(self):
+        result = OldVector()
+        result._data = self._data / self.length()
+        return result
+
+    def __xor__(self, other):
+        data = numpy.cross(
+                [self[0], self[1], self[2]],
+                [other[0], other[1], other[2]])
+        return OldVector(data[0], data[1], data[2])
+
+class OldPoint(OldVector):
+    def __init__(self, x=0, y=0, z=0, w=1, data=None):
+        super(OldPoint, self).__init__(x, y, z, w, data)
+
+def old_resolve_cam_position(sphereCamRelPos, camTarget):
+    phi = math.radians(sphereCamRelPos[0])
+    theta = math.radians(sphereCamRelPos[1] + 90.0)
+
+    fSinTheta = math.sin(theta)
+    fCosTheta = math.cos(theta)
+    fSinPhi = math.sin(phi)
+    fCosPhi = math.cos(phi)
+
+    dirToCamera = OldVector(fSinTheta * fCosPhi, fCosTheta, fSinTheta * fSinPhi)
+    result = (dirToCamera * sphereCamRelPos[2])
+    result = result + camTarget
+    return OldPoint(result[0], result[1], result[2])
+
+def old_look_at(cameraPt, lookPt, upPt):
+    lookDir = (lookPt - cameraPt).normal()
+    upDir = upPt.normal()
+
+    rightDir = (lookDir ^ upDir).normal()
+    perpUpDir = rightDir ^ lookDir
+
+    rotMat = OldMatrix()
+    for i in xrange(3):
+        rotMat[0, i] = rightDir[i]
+        rotMat[1, i] = perpUpDir[i]
+        rotMat[2, i] = -lookDir[i]
+        rotMat[3, i] = cameraPt[i]
+    return rotMat.inverse()
+
+def main():
+    tutorial = Tutorial()
+    camPos = tutorial.resolveCamPosition()
+    up = Vector(0, 1, 0)
+
+    oldRelPos = OldPoint(*tutorial.sphereCamRelPos.tolist())
+    oldTarget = OldPoint(*tutorial.camTarget.tolist())
+    oldCamPos = old_resolve_cam_position(oldRelPos, oldTarget)
+    oldUp = OldVector(0, 1, 0)
+
+    benches = (
+            ('resolveCamPosition',
+                lambda: old_resolve_cam_position(oldRelPos, oldTarget),
+                lambda: tutorial.resolveCamPosition()),
+            ('calcLookAtMatrix',
+                lambda: old_look_at(oldCamPos, oldTarget, oldUp),
+                lambda: tutorial.calcLookAtMatrix(camPos, tutorial.camTarget, up)))
+
+    print('%-20s %14s %14s %9s' % ('', 'baseline', 'current', 'speedup'))
+    for name, baseline, current in benches:
+        before = timeit.timeit(baseline, number=NUMBER) / NUMBER * 1e6
+        after = timeit.timeit(current, number=NUMBER) / NUMBER * 1e6
+        print('%-20s %8.2f us/call %8.2f us/call %8.1fx' % (name, before, after, before / after))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Times frustum culling of a large forest: bounding spheres for N trees
+tested against the view frustum of tut_07_world_in_motion's default
+camera, and the model matrices of the visible ones gathered.  Then the
+same query, and a radius query around the camera target, through the
+UniformGrid and LooseQuadtree spatial indices.
+
+Run from the repository root:
+    python benchmarks/bench_culling.py
+"""
+import os
+import sys
+import timeit
+import numpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gltut_framework import MatrixArray, MatrixStack, Point, Vector, lookAt
+from gltut_framework import UniformGrid, LooseQuadtree, transform_spheres, frustum_planes, spheres_in_frustum
+
+NUMBER = 20
+TREE_COUNT = 100000
+CELL_SIZE = 50.0
+RADIUS = 100.0
+
+def main():
+    numpy.random.seed(0)
+    matrices = MatrixArray(TREE_COUNT)
+    matrices.translate(numpy.column_stack([
+            numpy.random.uniform(-2000.0, 2000.0, TREE_COUNT),
+            numpy.zeros(TREE_COUNT),
+            numpy.random.uniform(-2000.0, 2000.0, TREE_COUNT)]))
+    matrices.scale((3.0, 5.0, 3.0))
+    centers, radii = transform_spheres(((0.0, 0.0, 0.0), 0.87), matrices)
+
+    persMatrix = MatrixStack()
+    persMatrix.perspective(45.0, 1.0, 1.0, 1000.0)
+    worldToClip = lookAt(Point(67.5, 46.0, 150.0), Point(0.0, 0.4, 0.0), Vector(0, 1, 0)) * persMatrix.top()
+
+    def cull():
+        visible = spheres_in_frustum(frustum_planes(worldToClip), centers, radii)
+        return matrices[visible]
+
+    elapsed = timeit.timeit(cull, number=NUMBER)
+    print('%d trees, %d visible: %.2f ms per frame' % (
+            TREE_COUNT, len(cull()), elapsed / NUMBER * 1000.0))
+
+    mins = centers - radii[:, numpy.newaxis]
+    maxs = centers + radii[:, numpy.newaxis]
+    indices = (
+            ('UniformGrid', lambda: UniformGrid.from_bounds(mins, maxs, CELL_SIZE)),
+            ('LooseQuadtree', lambda: LooseQuadtree.from_bounds(mins, maxs)))
+    for name, build in indices:
+        start = timeit.default_timer()
+        index = build()
+        # the first query also packs the index for querying, which later
+        # queries reuse until the index changes
+        index.query_frustum(frustum_planes(worldToClip))
+        elapsed = timeit.default_timer() - start
+        print('%s: built in %.0f ms' % (name, elapsed * 1000.0))
+
+        query = lambda: matrices[index.query_frustum(frustum_planes(worldToClip))]
+        elapsed = timeit.timeit(query, number=NUMBER)
+        print('    frustum: %d visible, %.2f ms per frame' % (len(query()), elapsed / NUMBER * 1000.0))
+
+        query = lambda: index.query_radius((0.0, 0.0, 0.0), RADIUS)
+        elapsed = timeit.timeit(query, number=NUMBER)
+        print('    radius %.0f: %d found, %.3f ms' % (RADIUS, len(query()), elapsed / NUMBER * 1000.0))
+
+if __name__ == '__main__':
+    main()
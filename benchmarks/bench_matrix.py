@@ -0,0 +1,41 @@
+"""
+Measures how many model matrices per second can be turned into the
+float array handed to glUniformMatrix4fv.
+
+"list" is the old path: a float64 numpy.matrix converted with tolist()
+and re-packed by PyOpenGL.  "array" is the float32 Matrix passed with
+toarray(), which PyOpenGL uses as-is.
+
+Run from the repository root:
+    python benchmarks/bench_matrix.py
+"""
+import os
+import sys
+import timeit
+import numpy
+from OpenGL.arrays import GLfloatArray
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gltut_framework import Matrix
+
+NUMBER = 100000
+
+def bench_list():
+    data = numpy.matrix(numpy.identity(4), dtype=float)
+    def upload():
+        GLfloatArray.asArray(data.tolist())
+    return timeit.timeit(upload, number=NUMBER)
+
+def bench_array():
+    mat = Matrix()
+    def upload():
+        GLfloatArray.asArray(mat.toarray())
+    return timeit.timeit(upload, number=NUMBER)
+
+def main():
+    for name, func in (('list', bench_list), ('array', bench_array)):
+        elapsed = func()
+        print('%-6s %12.0f uploads/sec' % (name, NUMBER / elapsed))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Reports what gltut_framework.meshopt does to the tutorials' mesh data
+and how long it takes on a larger, randomly ordered grid.
+
+For each mesh it prints the vertex and triangle counts and the ACMR
+(vertex shader invocations per triangle with a 32 entry FIFO cache)
+before and after optimize().
+
+Run from the repository root:
+    python benchmarks/bench_meshopt.py
+"""
+import os
+import sys
+import time
+import numpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gltut_framework import meshopt
+from tut_05_objects_in_depth.data import vertex_data as depth_data
+from tut_06_objects_in_motion.data import vertex_data as motion_data
+from tut_06_objects_in_motion.data import hierarchy_data
+from tut_07_world_in_motion.data import unit_cube, unit_plane
+
+GRID_SIZE = 300
+
+def planar(module):
+    # positions followed by colors, as the tutorials upload them
+    count = module.NUMBER_OF_VERTICES
+    data = numpy.asarray(module.VERTEX_DATA, dtype=numpy.float32)
+    return numpy.hstack([data[:3*count].reshape(-1, 3), data[3*count:].reshape(-1, 4)])
+
+def grid(size):
+    xs, zs = numpy.meshgrid(numpy.arange(size + 1), numpy.arange(size + 1))
+    vertices = numpy.column_stack([xs.ravel(), numpy.zeros(xs.size), zs.ravel()])
+    quads = (numpy.arange(size)[:, numpy.newaxis] * (size + 1) + numpy.arange(size)).ravel()
+    triangles = numpy.concatenate([
+            numpy.column_stack([quads, quads + 1, quads + size + 1]),
+            numpy.column_stack([quads + 1, quads + size + 2, quads + size + 1])])
+    numpy.random.seed(0)
+    return vertices, triangles[numpy.random.permutation(len(triangles))].ravel()
+
+def main():
+    meshes = (
+            ('unit_cube', numpy.reshape(unit_cube.VERTICES, (-1, 3)), unit_cube.INDICES),
+            ('unit_plane', numpy.reshape(unit_plane.VERTICES, (-1, 3)), unit_plane.INDICES),
+            ('tut_05 vertex_data', planar(depth_data), depth_data.INDICES),
+            ('tut_06 vertex_data', planar(motion_data), motion_data.INDICES),
+            ('hierarchy_data', planar(hierarchy_data), hierarchy_data.INDICES),
+            ('grid %dx%d' % (GRID_SIZE, GRID_SIZE),) + grid(GRID_SIZE))
+
+    print('%-20s %15s %15s %13s %8s' % ('mesh', 'vertices', 'triangles', 'acmr', 'time'))
+    for name, vertices, indices in meshes:
+        start = time.time()
+        vertices, indices, report = meshopt.optimize(vertices, indices)
+        elapsed = time.time() - start
+        print('%-20s %7d -> %-5d %7d -> %-5d %5.2f -> %-4.2f %7.2fs' % (
+                name,
+                report.vertices_before, report.vertices_after,
+                report.triangles_before, report.triangles_after,
+                report.acmr_before, report.acmr_after,
+                elapsed))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Measures how long it takes to turn a mesh's vertex data into the buffer
+handed to glBufferData.
+
+"ctypes" is the old path: the Python list unpacked element by element
+into a (GLfloat*N) array.  "list" is as_buffer() converting the same list
+with NumPy and "array" is as_buffer() given data that is already a
+float32 array, which it passes through without copying.
+
+Run from the repository root:
+    python benchmarks/bench_upload.py
+"""
+import os
+import sys
+import timeit
+import numpy
+from OpenGL import GL
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gltut_framework import as_buffer
+
+NUMBER = 5
+VERTEX_COUNT = 1000000
+
+def bench_ctypes(vertices):
+    def upload():
+        (GL.GLfloat*len(vertices))(*vertices)
+    return timeit.timeit(upload, number=NUMBER)
+
+def bench_list(vertices):
+    def upload():
+        as_buffer(vertices)
+    return timeit.timeit(upload, number=NUMBER)
+
+def bench_array(vertices):
+    vertices = numpy.array(vertices, dtype=numpy.float32)
+    def upload():
+        as_buffer(vertices)
+    return timeit.timeit(upload, number=NUMBER)
+
+def main():
+    vertices = [float(i) for i in xrange(3 * VERTEX_COUNT)]
+    for name, func in (('ctypes', bench_ctypes), ('list', bench_list), ('array', bench_array)):
+        elapsed = func(vertices)
+        print('%-6s %12.3f ms per %d vertices' % (name, 1000.0 * elapsed / NUMBER, VERTEX_COUNT))
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,24 @@
 from mesh import Mesh
+from matrix_array import MatrixArray
+from vector_array import VectorArray, PointArray
+from quaternion import Quaternion
+from rotation_cache import RotationCache, ROTATION_CACHE, ROTATION_AXES
+from gl_state import GLState, GL_STATE
+from render_queue import RenderQueue, upload_uniform
+from uniform_block import UniformBlock
+from static_batch import StaticBatch
+from buffers import as_buffer, as_index_buffer, buffer_data, buffer_sub_data
+from vertex_layout import VertexAttribute, VertexLayout, POSITION_LAYOUT
+from mesh_registry import MeshRegistry, MESH_REGISTRY
+from streaming_buffer import StreamingBuffer
+from frustum import bounding_box, bounding_sphere, transform_boxes, transform_spheres, frustum_planes, spheres_in_frustum, boxes_in_frustum
+from spatial import UniformGrid, LooseQuadtree
+from scene_node import SceneNode
+from lod import LODGroup, screen_space_distance
+from frame_pacer import FramePacer, clock
 
 import os
 import sys
-import time
 import math
 import numpy
 import glfw
@@ -13,14 +29,54 @@ from OpenGL.GLE import *
 SHORT_SIZE = 2
 FLOAT_SIZE = 4
 
+# AbstractTutorial render policies
+RENDER_CONTINUOUS = 'continuous'
+RENDER_VSYNC = 'vsync'
+RENDER_ON_DEMAND = 'on_demand'
+
 def clamp(value, minValue, maxValue):
     return max(minValue, min(maxValue, value))
 
 class AbstractTutorial(object):
-    def __init__(self, debug=False):
+    """
+    How run() paces the display() calls depends on render_policy:
+
+    - RENDER_CONTINUOUS redraws as fast as it can.
+    - RENDER_VSYNC redraws once per monitor refresh.
+    - RENDER_ON_DEMAND blocks waiting for input and window events and only
+      redraws when the tutorial is dirty (see request_redraw(); any key
+      press, resize or window refresh makes it dirty) or is_animating().
+
+    max_fps additionally caps the frame rate under any of them.  Subclasses
+    set both as class attributes; the constructor arguments override them.
+
+    Tutorials that set fixed_timestep get their simulation advanced by
+    update(dt) in steps of exactly that many seconds, however fast frames
+    are drawn, and draw with render(alpha), where alpha is how far (0-1)
+    real time has got from the previous simulation step to the latest one.
+    Interpolating between the two states by alpha keeps motion smooth when
+    frames and steps don't line up.  At most max_frame_time seconds are
+    simulated per frame, so a slow frame can't queue up ever more steps for
+    the frames after it.  Without fixed_timestep, elapsed_time is real time
+    and render() just calls display().
+    """
+    render_policy = RENDER_CONTINUOUS
+    max_fps = None
+    fixed_timestep = None
+    max_frame_time = 0.25
+
+    def __init__(self, debug=False, render_policy=None, max_fps=None):
         self.debug = debug
-        self.start_time = time.time()
+        self.start_time = clock()
         self.elapsed_time = 0.0
+        self.simulation_time = 0.0
+        self._accumulator = 0.0
+
+        if render_policy is not None:
+            self.render_policy = render_policy
+        if max_fps is not None:
+            self.max_fps = max_fps
+        self.dirty = True
 
         self.num_vertex_components = 4
         self.float_size = 4
@@ -43,8 +99,58 @@ class AbstractTutorial(object):
         
     def keyboard(self, key, press):
         pass
-        
+
+    def update(self, dt):
+        """
+        Advance the simulation by dt seconds, to simulation_time.  Only
+        called when fixed_timestep is set.
+        """
+        pass
+
+    def render(self, alpha):
+        self.display()
+
+    def advance(self, frame_time):
+        """
+        Account for frame_time seconds of real time: run as many fixed
+        steps as are due and return the alpha to render with.  run() calls
+        this every frame; call it directly to drive a tutorial with
+        synthetic frame times.
+        """
+        if not self.fixed_timestep:
+            self.elapsed_time += frame_time
+            return 1.0
+
+        self._accumulator += min(frame_time, self.max_frame_time)
+        while self._accumulator >= self.fixed_timestep:
+            self._accumulator -= self.fixed_timestep
+            self.simulation_time += self.fixed_timestep
+            self.update(self.fixed_timestep)
+        self.elapsed_time = self.simulation_time
+        return self._accumulator / self.fixed_timestep
+
+    def request_redraw(self):
+        self.dirty = True
+
+    def is_animating(self):
+        """
+        Return True while the tutorial needs redrawing every frame even
+        without input, under RENDER_ON_DEMAND.
+        """
+        return False
+
+    def _on_reshape(self, w, h):
+        self.reshape(w, h)
+        self.request_redraw()
+
+    def _on_keyboard(self, key, press):
+        self.keyboard(key, press)
+        self.request_redraw()
+
     def run(self):
+        if self.render_policy not in (RENDER_CONTINUOUS, RENDER_VSYNC, RENDER_ON_DEMAND):
+            raise ValueError('unknown render policy %r' % (self.render_policy,))
+
         glfw.Init()
          
         glfw.OpenWindowHint( glfw.OPENGL_VERSION_MAJOR, 3);
@@ -69,12 +175,32 @@ class AbstractTutorial(object):
 
         self.init()
 
-        glfw.SetWindowSizeCallback(self.reshape)
-        glfw.SetKeyCallback(self.keyboard)
+        if self.render_policy == RENDER_VSYNC:
+            glfw.SwapInterval(1)
+
+        glfw.SetWindowSizeCallback(self._on_reshape)
+        glfw.SetKeyCallback(self._on_keyboard)
+        glfw.SetWindowRefreshCallback(self.request_redraw)
+
+        pacer = FramePacer(self.max_fps) if self.max_fps else None
+        previous = clock()
+        self.elapsed_time = previous - self.start_time
 
         while glfw.GetWindowParam(glfw.OPENED):
-            self.elapsed_time = time.time() - self.start_time
-            self.display()
+            if self.render_policy == RENDER_ON_DEMAND and not (self.dirty or self.is_animating()):
+                # nothing to draw, sleep until an event arrives.  the time
+                # spent waiting isn't simulated.
+                glfw.WaitEvents()
+                previous = clock()
+                continue
+            self.dirty = False
+
+            if pacer is not None:
+                pacer.wait()
+            now = clock()
+            alpha = self.advance(now - previous)
+            previous = now
+            self.render(alpha)
 
 
         # # print glGetString(GL_VERSION)
@@ -116,130 +242,216 @@ class AbstractTutorial(object):
         # glutKeyboardFunc(self.keyboard)
         # glutMainLoop()
 
+_IDENTITY = numpy.identity(4, dtype=numpy.float32)
+
 class Matrix(object):
+    """
+    4x4 transform stored as a C-contiguous float32 ndarray.
+
+    The layout matches what glUniformMatrix4fv expects with
+    transpose=GL_FALSE, so toarray() can be handed straight to
+    PyOpenGL without any conversion.
+    """
     def __init__(self, data=None):
         if data is not None:
-            self._data = data.copy()
+            self._data = numpy.array(data, dtype=numpy.float32, order='C')
         else:
-            self._data = numpy.matrix([
-                    [1, 0, 0, 0],
-                    [0, 1, 0, 0],
-                    [0, 0, 1, 0],
-                    [0, 0, 0, 1]], dtype=float)
+            self._data = numpy.identity(4, dtype=numpy.float32)
+
+    @classmethod
+    def _wrap(cls, data):
+        # adopt an already float32 array without copying it
+        result = cls.__new__(cls)
+        result._data = data
+        return result
 
     def transpose(self):
-         data = numpy.transpose(self._data)
-         return type(self)(data=data)
+        data = numpy.ascontiguousarray(self._data.T)
+        return type(self)._wrap(data)
 
     def copy(self):
-        return Matrix(data=self._data)
+        return type(self)._wrap(self._data.copy())
 
     def tolist(self):
         return self._data.tolist()
 
+    def toarray(self):
+        """
+        Return the underlying float32 array (not a copy) for uploading
+        with glUniformMatrix4fv.
+        """
+        return self._data
+
     def inverse(self):
-        return type(self)(data=self._data.I)
+        data = numpy.linalg.inv(self._data).astype(numpy.float32)
+        return type(self)._wrap(data)
+
+    def affine_inverse(self):
+        """
+        Inverse of a matrix made only of rotation and translation (no
+        scale, shear or projection): the rotation is transposed and the
+        translation is rotated by it and negated.
+        """
+        rotation = self._data[:3, :3]
+        data = numpy.identity(4, dtype=numpy.float32)
+        data[:3, :3] = rotation.T
+        data[3, :3] = -numpy.dot(rotation, self._data[3, :3])
+        return type(self)._wrap(data)
 
     def __getitem__(self, index):
         if not hasattr(index, '__iter__'):
             raise IndexError('index must be a sequence, not %s' % type(index).__name__)
-        return self._data.item(*index)
+        return float(self._data[index[0], index[1]])
 
     def __setitem__(self, index, value):
         if not hasattr(index, '__iter__'):
             raise IndexError('index must be a sequence, not %s' % type(index).__name__)
-        self._data.itemset(index[0], index[1], value)
+        self._data[index[0], index[1]] = value
 
     def __mul__(self, other):
         data = numpy.dot(self._data, other._data)
-        return Matrix(data=data)
+        return Matrix._wrap(data)
 
     def __imul__(self, other):
         self._data = numpy.dot(self._data, other._data)
+        return self
+
+def lookAt(eye, target, up):
+    """
+    Build the world to camera matrix for a camera at eye looking at target.
+    Arguments can be Points, Vectors or any sequence of three numbers.
+    """
+    lookX = target[0] - eye[0]
+    lookY = target[1] - eye[1]
+    lookZ = target[2] - eye[2]
+    invLength = 1.0 / math.sqrt(lookX*lookX + lookY*lookY + lookZ*lookZ)
+    lookX *= invLength
+    lookY *= invLength
+    lookZ *= invLength
+
+    rightX = lookY * up[2] - lookZ * up[1]
+    rightY = lookZ * up[0] - lookX * up[2]
+    rightZ = lookX * up[1] - lookY * up[0]
+    invLength = 1.0 / math.sqrt(rightX*rightX + rightY*rightY + rightZ*rightZ)
+    rightX *= invLength
+    rightY *= invLength
+    rightZ *= invLength
+
+    upX = rightY * lookZ - rightZ * lookY
+    upY = rightZ * lookX - rightX * lookZ
+    upZ = rightX * lookY - rightY * lookX
+
+    data = numpy.array([
+            [rightX, upX, -lookX, 0.0],
+            [rightY, upY, -lookY, 0.0],
+            [rightZ, upZ, -lookZ, 0.0],
+            [-(rightX * eye[0] + rightY * eye[1] + rightZ * eye[2]),
+                -(upX * eye[0] + upY * eye[1] + upZ * eye[2]),
+                lookX * eye[0] + lookY * eye[1] + lookZ * eye[2],
+                1.0]], dtype=numpy.float32)
+    return Matrix._wrap(data)
 
 class MatrixStack(object):
-    def __init__(self):
+    """
+    NOTE: the transform methods modify m_currMat in place using row
+          operations rather than building a matrix and multiplying.
+          Pushed matrices are copied into one preallocated
+          (capacity, 4, 4) array which doubles in size when it fills up,
+          and entering/leaving a "with" block only saves/restores the
+          index of the top of that array.
+    """
+    def __init__(self, capacity=32):
         self.m_currMat = Matrix()
-        self.m_matrices = []
-        self.__enter_lengths = []
+        self.m_matrices = numpy.empty((capacity, 4, 4), dtype=numpy.float32)
+        self.m_top = 0
+        self.__enter_tops = []
+        self.__scratch = numpy.empty((2, 4), dtype=numpy.float32)
 
     def __enter__(self):
-        self.__enter_lengths.append(len(self.m_matrices))
+        self.__enter_tops.append(self.m_top)
 
     def __exit__(self, typ, val, tb):
-        enter_len = self.__enter_lengths.pop()
-        self.m_matrices = self.m_matrices[:enter_len]
-        if self.m_matrices:
-            self.m_currMat = self.m_matrices[-1]
+        self.m_top = self.__enter_tops.pop()
+        if self.m_top:
+            numpy.copyto(self.m_currMat._data, self.m_matrices[self.m_top - 1])
         else:
-            self.m_currMat = Matrix()
+            numpy.copyto(self.m_currMat._data, _IDENTITY)
+
+    def __len__(self):
+        return self.m_top
 
     def top(self):
         return self.m_currMat
 
-    def rotateX(self, fAngDeg):
+    def _rotate(self, axis, fAngDeg):
+        # pre-multiplying by a rotation only mixes rows i and j:
+        #   row i = cos * row i + sin * row j
+        #   row j = cos * row j - sin * row i
         fAngRad = math.radians(fAngDeg)
         fCos = math.cos(fAngRad)
         fSin = math.sin(fAngRad)
+        i, j = ROTATION_AXES[axis]
 
-        theMat = Matrix()
-        theMat[1,1] = fCos
-        theMat[1,2] = fSin
-        theMat[2,1] = -fSin
-        theMat[2,2] = fCos
+        data = self.m_currMat._data
+        rowI, tmp = self.__scratch
+        numpy.copyto(rowI, data[i])
 
-        self.m_currMat = theMat * self.m_currMat
-        self.push()
-
-    def rotateY(self, fAngDeg):
-        fAngRad = math.radians(fAngDeg)
-        fCos = math.cos(fAngRad)
-        fSin = math.sin(fAngRad)
+        data[i] *= fCos
+        numpy.multiply(data[j], fSin, out=tmp)
+        data[i] += tmp
 
-        theMat = Matrix()
-        theMat[0,0] = fCos
-        theMat[0,2] = -fSin
-        theMat[2,0] = fSin
-        theMat[2,2] = fCos
+        data[j] *= fCos
+        numpy.multiply(rowI, fSin, out=tmp)
+        data[j] -= tmp
 
-        self.m_currMat = theMat * self.m_currMat
         self.push()
 
+    def rotateX(self, fAngDeg):
+        self._rotate('x', fAngDeg)
+
+    def rotateY(self, fAngDeg):
+        self._rotate('y', fAngDeg)
+
     def rotateZ(self, fAngDeg):
-        fAngRad = math.radians(fAngDeg)
-        fCos = math.cos(fAngRad)
-        fSin = math.sin(fAngRad)
+        self._rotate('z', fAngDeg)
 
-        theMat = Matrix()
-        theMat[0,0] = fCos
-        theMat[0,1] = fSin
-        theMat[1,0] = -fSin
-        theMat[1,1] = fCos
+    def rotate(self, quaternion):
+        data = self.m_currMat._data
+        data[:3] = numpy.dot(quaternion.rotationRows(), data[:3])
 
-        self.m_currMat = theMat * self.m_currMat
         self.push()
 
     def scale(self, scaleVec):
-        scaleMat = Matrix()
+        data = self.m_currMat._data
         for index in xrange(3):
-            scaleMat[index, index] = scaleVec[index]
+            data[index] *= scaleVec[index]
 
-        self.m_currMat = scaleMat * self.m_currMat
         self.push()
 
     def translate(self, offsetVec):
-        translateMat = Matrix()
+        data = self.m_currMat._data
+        tmp = self.__scratch[1]
         for index in xrange(3):
-            translateMat[3, index] = offsetVec[index]
+            offset = offsetVec[index]
+            if offset:
+                numpy.multiply(data[index], offset, out=tmp)
+                data[3] += tmp
 
-        self.m_currMat = translateMat * self.m_currMat
         self.push()
 
     def push(self):
-        self.m_matrices.append(self.m_currMat.copy())
+        if self.m_top == len(self.m_matrices):
+            grown = numpy.empty((2 * len(self.m_matrices) or 1, 4, 4), dtype=numpy.float32)
+            grown[:self.m_top] = self.m_matrices
+            self.m_matrices = grown
+        numpy.copyto(self.m_matrices[self.m_top], self.m_currMat._data)
+        self.m_top += 1
 
     def pop(self):
-        self.m_currMat = self.m_matrices.pop()
+        if not self.m_top:
+            raise IndexError('pop from empty MatrixStack')
+        self.m_top -= 1
+        numpy.copyto(self.m_currMat._data, self.m_matrices[self.m_top])
 
     def perspective(self, fovy, aspect, zNear, zFar):
         range = math.tan(math.radians(fovy)/2.0) * zNear
@@ -259,116 +471,121 @@ class MatrixStack(object):
         self.push()
 
 class AbstractVector(object):
+    """
+    NOTE: components are kept as plain python floats in __slots__.  For
+          four components the arithmetic is much cheaper than going
+          through numpy; use toarray() when an ndarray is needed.
+    """
+    __slots__ = ('x', 'y', 'z', 'w')
+
     def __init__(self, x=0, y=0, z=0, w=0, data=None):
         if data is not None:
-            self._data = data.copy()
-        else:
-            self._data = numpy.matrix([[x, y, z, w]], dtype=float)
+            x, y, z, w = [float(value) for value in numpy.ravel(data)[:4]]
+        self.x = float(x)
+        self.y = float(y)
+        self.z = float(z)
+        self.w = float(w)
 
     def copy(self):
-        return type(self)(data=self._data)
-
-    @property
-    def x(self):
-        return self[0]
+        return type(self)(self.x, self.y, self.z, self.w)
 
-    @x.setter
-    def x(self, value):
-        self[0] = value
-
-    @property
-    def y(self):
-        return self[1]
-
-    @y.setter
-    def y(self, value):
-        self[1] = value
-
-    @property
-    def z(self):
-        return self[2]
-
-    @z.setter
-    def z(self, value):
-        self[2] = value
+    def tolist(self):
+        return [self.x, self.y, self.z, self.w]
 
-    @property
-    def w(self):
-        return self[3]
+    def toarray(self):
+        return numpy.array([self.x, self.y, self.z, self.w], dtype=numpy.float32)
 
-    @w.setter
-    def w(self, value):
-        self[3] = value
-
-    def tolist(self):
-        return self._data.tolist()[0]
+    def __len__(self):
+        return 4
 
     def __getitem__(self, index):
-        return self._data.item(0, index)
+        return (self.x, self.y, self.z, self.w)[index]
 
     def __setitem__(self, index, value):
-        self._data.itemset(0, index, value)
+        setattr(self, AbstractVector.__slots__[index], float(value))
 
     def __add__(self, other):
-        data = numpy.add(self._data, other._data)
-        return type(self)(data=data)
+        return type(self)(self.x + other.x, self.y + other.y, self.z + other.z, self.w + other.w)
 
     def __iadd__(self, other):
-        self._data = numpy.add(self._data, other._data)
+        self.x += other.x
+        self.y += other.y
+        self.z += other.z
+        self.w += other.w
+        return self
 
     def __sub__(self, other):
-        data = numpy.subtract(self._data, other._data)
-        return type(self)(data=data)
+        return type(self)(self.x - other.x, self.y - other.y, self.z - other.z, self.w - other.w)
 
     def __isub__(self, other):
-        self._data = numpy.subtract(self._data, other._data)
+        self.x -= other.x
+        self.y -= other.y
+        self.z -= other.z
+        self.w -= other.w
+        return self
 
     def __mul__(self, other):
-        data = self._data * other
-        return type(self)(data=data)
+        return type(self)(self.x * other, self.y * other, self.z * other, self.w * other)
+
+    def lerp(self, other, fAlpha):
+        # blend from self (fAlpha 0) to other (fAlpha 1)
+        return type(self)(
+                self.x + (other.x - self.x) * fAlpha,
+                self.y + (other.y - self.y) * fAlpha,
+                self.z + (other.z - self.z) * fAlpha,
+                self.w + (other.w - self.w) * fAlpha)
 
     def __imul__(self, other):
-        if hasattr(other, '_data'):
-            self._data *= other._data
+        if isinstance(other, AbstractVector):
+            self.x *= other.x
+            self.y *= other.y
+            self.z *= other.z
+            self.w *= other.w
         else:
-            self._data *= other
+            self.x *= other
+            self.y *= other
+            self.z *= other
+            self.w *= other
+        return self
 
     def __iter__(self):
-        for item in self._data:
-            yield item
+        yield self.x
+        yield self.y
+        yield self.z
+        yield self.w
 
 class Vector(AbstractVector):
+    __slots__ = ()
+
     def length(self):
-        return numpy.linalg.norm(self._data)
+        return math.sqrt(self.x*self.x + self.y*self.y + self.z*self.z + self.w*self.w)
 
     def normalize(self):
-        self._data /= self.length()
+        self *= 1.0 / self.length()
 
     def normal(self):
-        result = Vector()
-        result._data = self._data / self.length()
-        return result
+        return self * (1.0 / self.length())
 
     def __xor__(self, other):
-        data = numpy.cross(
-                [self[0], self[1], self[2]], 
-                [other[0], other[1], other[2]])
-        return type(self)(data[0], data[1], data[2])
+        return type(self)(
+                self.y * other[2] - self.z * other[1],
+                self.z * other[0] - self.x * other[2],
+                self.x * other[1] - self.y * other[0])
 
     def __rxor__(self, other):
-        data = numpy.cross(
-                [other[0], other[1], other[2]],
-                [self[0], self[1], self[2]])
-        return type(self)(data[0], data[1], data[2])
+        return type(self)(
+                other[1] * self.z - other[2] * self.y,
+                other[2] * self.x - other[0] * self.z,
+                other[0] * self.y - other[1] * self.x)
 
 class Point(AbstractVector):
+    __slots__ = ()
+
     def __init__(self, x=0, y=0, z=0, w=1, data=None):
         super(Point, self).__init__(x, y, z, w, data)
 
     def __add__(self, other):
-        result = super(Point, self).__add__(other)
-        return Vector(result[0], result[1], result[2])
+        return Vector(self.x + other.x, self.y + other.y, self.z + other.z)
 
     def __sub__(self, other):
-        result = super(Point, self).__sub__(other)
-        return Vector(result[0], result[1], result[2])
+        return Vector(self.x - other.x, self.y - other.y, self.z - other.z)
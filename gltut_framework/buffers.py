@@ -0,0 +1,68 @@
+import mmap
+import numpy
+from OpenGL import GL
+
+def as_buffer(data, dtype=numpy.float32):
+    """
+    Return data as a C-contiguous NumPy array of dtype that can be handed
+    straight to GL.
+
+    Arrays that already have the right type and layout, array.array
+    objects and other buffer-protocol objects (memoryview, mmap, bytearray,
+    str) are wrapped without copying; untyped bytes are assumed to already
+    hold dtype values.  Anything else (lists, tuples, MatrixArray, ...) is
+    converted in one pass by NumPy rather than element by element through
+    ctypes.
+    """
+    if isinstance(data, numpy.ndarray):
+        pass
+    elif hasattr(data, 'typecode'):
+        # array.array
+        data = numpy.frombuffer(data, dtype=data.typecode)
+    elif isinstance(data, memoryview):
+        data = numpy.asarray(data)
+        if data.dtype == numpy.uint8:
+            return numpy.ascontiguousarray(data).view(dtype)
+    elif isinstance(data, (str, bytearray, mmap.mmap)):
+        return numpy.frombuffer(data, dtype=dtype)
+    else:
+        return numpy.array(data, dtype=dtype)
+    return numpy.ascontiguousarray(data, dtype=dtype)
+
+def buffer_data(target, data, usage, dtype=numpy.float32):
+    """
+    glBufferData for the buffer bound to target, sized from data.  Returns
+    the array that was uploaded.
+    """
+    data = as_buffer(data, dtype)
+    GL.glBufferData(target, data.nbytes, data, usage)
+    return data
+
+def buffer_sub_data(target, offset, data, dtype=numpy.float32):
+    """
+    glBufferSubData of data at offset (in bytes) of the buffer bound to
+    target.  Returns the array that was uploaded.
+    """
+    data = as_buffer(data, dtype)
+    GL.glBufferSubData(target, offset, data.nbytes, data)
+    return data
+
+_INDEX_TYPES = (
+        (0xFF, numpy.uint8, GL.GL_UNSIGNED_BYTE),
+        (0xFFFF, numpy.uint16, GL.GL_UNSIGNED_SHORT),
+        (0xFFFFFFFF, numpy.uint32, GL.GL_UNSIGNED_INT),
+        )
+
+def as_index_buffer(indices):
+    """
+    Return (array, GL type) for indices using the smallest of
+    GL_UNSIGNED_BYTE/SHORT/INT that holds the largest index.  Arrays that
+    already use that type are not copied.
+    """
+    if not isinstance(indices, numpy.ndarray):
+        indices = as_buffer(indices, numpy.uint32)
+    top = int(indices.max()) if len(indices) else 0
+    for limit, dtype, gl_type in _INDEX_TYPES:
+        if top <= limit:
+            return numpy.ascontiguousarray(indices, dtype=dtype).reshape(-1), gl_type
+    raise ValueError('index %d does not fit in GL_UNSIGNED_INT' % top)
@@ -0,0 +1,42 @@
+import time
+import timeit
+
+# time.perf_counter where there is one (python 3.3+), otherwise the most
+# precise wall clock timeit knows of for the platform
+clock = getattr(time, 'perf_counter', timeit.default_timer)
+
+class FramePacer(object):
+    """
+    Caps a loop at max_fps calls to wait() per second.
+
+    time.sleep() can wake up a millisecond or more late, so wait() sleeps
+    until spin_time seconds before the next frame is due and busy-waits the
+    rest.  Frames are scheduled one period after the previous deadline to
+    keep a steady rate.  After a frame that ran late the schedule restarts
+    from now, so there is no burst of frames to catch up.
+    """
+    def __init__(self, max_fps, spin_time=0.002):
+        self.period = 1.0 / max_fps
+        self.spin_time = spin_time
+        self.next_frame = None
+        self.late_frames = 0
+
+    def reset(self):
+        self.next_frame = None
+
+    def wait(self):
+        now = clock()
+        if self.next_frame is None:
+            self.next_frame = now
+
+        remaining = self.next_frame - now
+        if remaining > self.spin_time:
+            time.sleep(remaining - self.spin_time)
+        while clock() < self.next_frame:
+            pass
+
+        now = clock()
+        self.next_frame += self.period
+        if self.next_frame < now:
+            self.late_frames += 1
+            self.next_frame = now
@@ -0,0 +1,106 @@
+"""
+Bounding volumes and view frustum tests.
+
+Boxes are axis aligned and stored as (mins, maxs) arrays, spheres as
+(centers, radii).  The transform and test functions take N of them at
+once and are vectorized, so culling 100k objects is a handful of NumPy
+operations.
+"""
+import numpy
+
+def bounding_box(positions):
+    """
+    Return the (min, max) corners of an (N,3) array of positions.
+    """
+    positions = numpy.asarray(positions, dtype=numpy.float32).reshape(-1, 3)
+    return positions.min(axis=0), positions.max(axis=0)
+
+def bounding_sphere(positions):
+    """
+    Return (center, radius) of a sphere around an (N,3) array of
+    positions, centered on their bounding box.
+    """
+    positions = numpy.asarray(positions, dtype=numpy.float32).reshape(-1, 3)
+    lower, upper = bounding_box(positions)
+    center = (lower + upper) * 0.5
+    radius = numpy.sqrt(((positions - center) ** 2).sum(axis=1).max())
+    return center, float(radius)
+
+def _affine(matrices):
+    if hasattr(matrices, 'toarray'):
+        matrices = matrices.toarray()
+    matrices = numpy.asarray(matrices, dtype=numpy.float32).reshape(-1, 4, 4)
+    # row-vector layout, see Matrix: rows 0-2 are the axes, row 3 the
+    # translation
+    return matrices[:, :3, :3], matrices[:, 3, :3]
+
+def transform_spheres(sphere, matrices):
+    """
+    Transform one local space sphere by N model matrices.  Returns
+    (centers, radii) with shapes (N,3) and (N,).  Radii are scaled by the
+    largest amount each matrix stretches any direction, so they stay
+    conservative under non-uniform scaling.
+    """
+    center, radius = sphere
+    axes, translations = _affine(matrices)
+    centers = numpy.einsum('i,nij->nj', numpy.asarray(center, dtype=numpy.float32), axes) + translations
+    scales = numpy.linalg.norm(axes, ord=2, axis=(1, 2))
+    return centers, radius * scales
+
+def transform_boxes(box, matrices):
+    """
+    Transform one local space box by N model matrices.  Returns the
+    (mins, maxs) of the world space boxes around the transformed boxes,
+    each (N,3).
+    """
+    lower, upper = [numpy.asarray(corner, dtype=numpy.float32) for corner in box]
+    axes, translations = _affine(matrices)
+    centers = numpy.einsum('i,nij->nj', (lower + upper) * 0.5, axes) + translations
+    extents = numpy.einsum('i,nij->nj', (upper - lower) * 0.5, numpy.abs(axes))
+    return centers - extents, centers + extents
+
+def frustum_planes(matrix):
+    """
+    Return the six planes (left, right, bottom, top, near, far) of the
+    frustum of a combined model/world to clip matrix as a (6,4) array of
+    normalized (a, b, c, d), with normals pointing into the frustum.
+    Points in the space the matrix transforms from are inside a plane when
+    a*x + b*y + c*z + d >= 0.
+    """
+    if hasattr(matrix, 'toarray'):
+        matrix = matrix.toarray()
+    # the columns of the row-vector matrix are the rows of the GL matrix
+    columns = numpy.asarray(matrix, dtype=numpy.float64).T
+    planes = numpy.array([
+            columns[3] + columns[0],
+            columns[3] - columns[0],
+            columns[3] + columns[1],
+            columns[3] - columns[1],
+            columns[3] + columns[2],
+            columns[3] - columns[2]])
+    planes /= numpy.sqrt((planes[:, :3] ** 2).sum(axis=1))[:, numpy.newaxis]
+    return planes.astype(numpy.float32)
+
+def spheres_in_frustum(planes, centers, radii):
+    """
+    Return a boolean array, True for each sphere that is at least partly
+    inside the frustum.
+    """
+    centers = numpy.asarray(centers, dtype=numpy.float32).reshape(-1, 3)
+    distances = numpy.dot(centers, planes[:, :3].T) + planes[:, 3]
+    return (distances >= -numpy.reshape(radii, (-1, 1))).all(axis=1)
+
+def boxes_in_frustum(planes, mins, maxs):
+    """
+    Return a boolean array, True for each box that is at least partly
+    inside the frustum.  Tests the corner of each box furthest along each
+    plane's normal, so boxes near the frustum's corners may be kept
+    although they are outside.
+    """
+    mins = numpy.asarray(mins, dtype=numpy.float32).reshape(-1, 3)
+    maxs = numpy.asarray(maxs, dtype=numpy.float32).reshape(-1, 3)
+    normals = planes[:, :3]
+    distances = (numpy.dot(maxs, normals.clip(0.0).T) +
+                 numpy.dot(mins, normals.clip(None, 0.0).T) +
+                 planes[:, 3])
+    return (distances >= 0.0).all(axis=1)
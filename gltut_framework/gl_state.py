@@ -0,0 +1,143 @@
+import numpy
+from OpenGL import GL
+
+class GLState(object):
+    """
+    Shadow copy of the GL state the tutorials touch.  Each method mirrors
+    the GL call of the same name (without the gl prefix) but only issues
+    it when it would actually change something: the bound program, VAO,
+    buffer bindings, enable flags, and the last value uploaded to each
+    uniform of each program.
+
+    NOTE: the shadow copy is only right if these methods are the only way
+          that state gets changed.  Call invalidate() after changing any
+          of it with plain GL calls.
+    """
+    def __init__(self):
+        self.calls_issued = 0
+        self.calls_skipped = 0
+        self.invalidate()
+
+    def invalidate(self):
+        self.program = None
+        self.vertex_array = None
+        self.buffers = {}
+        self.capabilities = {}
+        self.uniforms = {}
+
+    def reset_counters(self):
+        self.calls_issued = 0
+        self.calls_skipped = 0
+
+    def useProgram(self, program):
+        if program == self.program:
+            self.calls_skipped += 1
+            return
+        GL.glUseProgram(program)
+        self.program = program
+        self.calls_issued += 1
+
+    def bindVertexArray(self, vertex_array):
+        if vertex_array == self.vertex_array:
+            self.calls_skipped += 1
+            return
+        GL.glBindVertexArray(vertex_array)
+        self.vertex_array = vertex_array
+        # the element array binding is part of the vao's state
+        self.buffers.pop(GL.GL_ELEMENT_ARRAY_BUFFER, None)
+        self.calls_issued += 1
+
+    def bindBuffer(self, target, buffer):
+        if self.buffers.get(target) == buffer:
+            self.calls_skipped += 1
+            return
+        GL.glBindBuffer(target, buffer)
+        self.buffers[target] = buffer
+        self.calls_issued += 1
+
+    def deleteVertexArray(self, vertex_array):
+        if vertex_array == self.vertex_array:
+            # deleting the bound vao reverts the binding to 0
+            self.vertex_array = 0
+            self.buffers.pop(GL.GL_ELEMENT_ARRAY_BUFFER, None)
+        GL.glDeleteVertexArrays(1, [vertex_array])
+        self.calls_issued += 1
+
+    def deleteBuffer(self, buffer):
+        # deleting a bound buffer reverts its bindings to 0, and the name
+        # may be handed out again by glGenBuffers
+        for target, bound in self.buffers.items():
+            if bound == buffer:
+                self.buffers[target] = 0
+        GL.glDeleteBuffers(1, [buffer])
+        self.calls_issued += 1
+
+    def _set_capability(self, capability, enabled):
+        if self.capabilities.get(capability) == enabled:
+            self.calls_skipped += 1
+            return
+        (GL.glEnable if enabled else GL.glDisable)(capability)
+        self.capabilities[capability] = enabled
+        self.calls_issued += 1
+
+    def enable(self, capability):
+        self._set_capability(capability, True)
+
+    def disable(self, capability):
+        self._set_capability(capability, False)
+
+    def isEnabled(self, capability):
+        return self.capabilities.get(capability)
+
+    def _uniform(self, location, key, function, *args):
+        cache = self.uniforms.get(self.program)
+        if cache is None:
+            cache = self.uniforms[self.program] = {}
+        if cache.get(location) == key:
+            self.calls_skipped += 1
+            return
+        function(location, *args)
+        cache[location] = key
+        self.calls_issued += 1
+
+    def uniformMatrix4fv(self, location, value):
+        if hasattr(value, 'toarray'):
+            value = value.toarray()
+        value = numpy.ascontiguousarray(value, dtype=numpy.float32)
+        self._uniform(location, value.tobytes(), GL.glUniformMatrix4fv, 1, GL.GL_FALSE, value)
+
+    def uniform1f(self, location, x):
+        self._uniform(location, (x,), GL.glUniform1f, x)
+
+    def uniform2f(self, location, x, y):
+        self._uniform(location, (x, y), GL.glUniform2f, x, y)
+
+    def uniform3f(self, location, x, y, z):
+        self._uniform(location, (x, y, z), GL.glUniform3f, x, y, z)
+
+    def uniform4f(self, location, x, y, z, w):
+        self._uniform(location, (x, y, z, w), GL.glUniform4f, x, y, z, w)
+
+    def uniform(self, location, value):
+        """
+        Upload a Matrix, Vector, sequence or number, picking the
+        glUniform call from its size.
+        """
+        if hasattr(value, 'toarray'):
+            value = value.toarray()
+        values = numpy.ravel(value)
+        size = len(values)
+        if size == 16:
+            self.uniformMatrix4fv(location, values)
+        elif size == 4:
+            self.uniform4f(location, *values.tolist())
+        elif size == 3:
+            self.uniform3f(location, *values.tolist())
+        elif size == 2:
+            self.uniform2f(location, *values.tolist())
+        elif size == 1:
+            self.uniform1f(location, *values.tolist())
+        else:
+            raise ValueError('cannot upload a uniform of %d values' % size)
+
+GL_STATE = GLState()
@@ -0,0 +1,106 @@
+"""
+Distance based level of detail for many instances of the same object.
+
+An LODGroup holds the object's meshes from most to least detailed and the
+distance from the eye up to which each of them is used.  Past the last
+distance the object isn't drawn at all.  select() picks the level of every
+instance in one vectorized pass, and partition() splits the instances by
+level so each level can be drawn with a single instanced draw.
+
+Distances can come from a screen space error instead: see
+screen_space_distance().
+"""
+import math
+import numpy
+
+def screen_space_distance(size, fovy, viewport_height, pixels=1.0):
+    """
+    Return the distance at which a length of size (in world units, facing
+    the camera) covers pixels pixels with a perspective projection of fovy
+    degrees on a viewport viewport_height pixels high.  Use the geometric
+    error of a level for size to switch to it once its error is smaller
+    than pixels, or the object's size to stop drawing it.
+    """
+    return size * viewport_height / (2.0 * math.tan(math.radians(fovy) / 2.0) * pixels)
+
+class LODGroup(object):
+    """
+    meshes are ordered from most to least detailed, distances[i] is the
+    distance up to which meshes[i] is used (increasing, numpy.inf to never
+    stop drawing the last level).
+
+    hysteresis keeps an instance at its current level until it is that
+    fraction past the threshold either way, so instances sitting on a
+    threshold don't flip levels every frame.  The current level of every
+    instance is remembered by instance id between calls to select().
+    """
+    def __init__(self, meshes, distances, hysteresis=0.1):
+        if len(meshes) != len(distances):
+            raise ValueError('need one distance per mesh, got %d meshes and %d distances' % (len(meshes), len(distances)))
+        self.meshes = list(meshes)
+        self.distances = distances
+        self.hysteresis = hysteresis
+        self._levels = numpy.empty(0, dtype=numpy.int64)
+
+    @property
+    def distances(self):
+        return self._distances
+
+    @distances.setter
+    def distances(self, value):
+        value = numpy.asarray(value, dtype=numpy.float64)
+        if (numpy.diff(value) < 0.0).any():
+            raise ValueError('LOD distances must be increasing')
+        self._distances = value
+
+    def reset(self):
+        """
+        Forget the current levels, e.g. after the camera jumped.
+        """
+        self._levels = numpy.empty(0, dtype=numpy.int64)
+
+    def select(self, eye, positions, ids=None):
+        """
+        Return the level of each instance at positions, an (N,3) array in
+        the same space as eye.  ids are the instances' ids, defaulting to
+        0..N-1; pass them when selecting for a subset of the instances,
+        e.g. the ones left after culling.  Level len(meshes) means the
+        instance is too far away to draw.
+        """
+        positions = numpy.asarray(positions, dtype=numpy.float64).reshape(-1, 3)
+        if ids is None:
+            ids = numpy.arange(len(positions))
+        ids = numpy.asarray(ids, dtype=numpy.int64)
+        distances = numpy.sqrt(((positions - numpy.asarray(eye, dtype=numpy.float64)[:3]) ** 2).sum(axis=1))
+
+        # coarser levels only once past threshold * (1 + hysteresis) and
+        # finer levels only once closer than threshold * (1 - hysteresis)
+        coarse = numpy.searchsorted(self._distances * (1.0 + self.hysteresis), distances)
+        fine = numpy.searchsorted(self._distances * (1.0 - self.hysteresis), distances)
+
+        if len(ids) and ids.max() >= len(self._levels):
+            grown = numpy.empty(ids.max() + 1, dtype=numpy.int64)
+            grown.fill(-1)
+            grown[:len(self._levels)] = self._levels
+            self._levels = grown
+
+        previous = self._levels[ids]
+        levels = numpy.where(
+                previous < 0,
+                numpy.searchsorted(self._distances, distances),
+                numpy.clip(previous, coarse, fine))
+        self._levels[ids] = levels
+        return levels
+
+    def partition(self, levels):
+        """
+        Return [(mesh, indices)] for every level that has instances, where
+        indices are positions in levels (and so in the positions passed to
+        select()).
+        """
+        result = []
+        for level, mesh in enumerate(self.meshes):
+            indices = numpy.flatnonzero(levels == level)
+            if len(indices):
+                result.append((mesh, indices))
+        return result
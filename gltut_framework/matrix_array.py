@@ -0,0 +1,100 @@
+import numpy
+
+def _as_rows(values, count, width):
+    # broadcast one value (or vector) or one per matrix to (count, width)
+    values = numpy.asarray(values, dtype=numpy.float32)
+    if width == 1:
+        values = values.reshape(-1, 1)
+    else:
+        values = values.reshape(-1, values.shape[-1])[:, :width]
+    return numpy.broadcast_to(values, (count, width))
+
+class MatrixArray(object):
+    """
+    A block of N 4x4 float32 matrices stored as one (N,4,4) C-contiguous
+    array.
+
+    The transform methods follow MatrixStack: each one pre-multiplies the
+    matrices in place, so a sequence of calls reads the same as the
+    equivalent sequence on a stack.  Arguments may be a single value shared
+    by every matrix or one value per matrix.
+    """
+    def __init__(self, count=0, data=None):
+        if data is not None:
+            self._data = numpy.array(data, dtype=numpy.float32, order='C').reshape(-1, 4, 4)
+        else:
+            self._data = numpy.empty((count, 4, 4), dtype=numpy.float32)
+            self._data[:] = numpy.identity(4, dtype=numpy.float32)
+
+    @classmethod
+    def _wrap(cls, data):
+        result = cls.__new__(cls)
+        result._data = data
+        return result
+
+    def __len__(self):
+        return len(self._data)
+
+    def __getitem__(self, index):
+        # an int gives a Matrix, a slice, mask or index array a MatrixArray
+        from . import Matrix
+        data = self._data[index]
+        if data.ndim == 3:
+            return MatrixArray._wrap(data)
+        return Matrix._wrap(data)
+
+    def copy(self):
+        return type(self)._wrap(self._data.copy())
+
+    def tolist(self):
+        return self._data.tolist()
+
+    def toarray(self):
+        """
+        Return the underlying (N,4,4) float32 array (not a copy).
+        """
+        return self._data
+
+    def __array__(self, dtype=None):
+        if dtype is None:
+            return self._data
+        return self._data.astype(dtype)
+
+    def transpose(self):
+        data = numpy.ascontiguousarray(self._data.transpose(0, 2, 1))
+        return type(self)._wrap(data)
+
+    def translate(self, offsets):
+        offsets = _as_rows(offsets, len(self), 3)
+        self._data[:, 3, :] += numpy.einsum('ni,nij->nj', offsets, self._data[:, :3, :])
+
+    def scale(self, scales):
+        scales = _as_rows(scales, len(self), 3)
+        self._data[:, :3, :] *= scales[:, :, numpy.newaxis]
+
+    def _rotate(self, angles, i, j):
+        angles = numpy.radians(_as_rows(angles, len(self), 1))
+        fCos = numpy.cos(angles)
+        fSin = numpy.sin(angles)
+
+        rowI = self._data[:, i, :].copy()
+        rowJ = self._data[:, j, :]
+        self._data[:, i, :] = fCos * rowI + fSin * rowJ
+        self._data[:, j, :] = fCos * rowJ - fSin * rowI
+
+    def rotateX(self, angles):
+        self._rotate(angles, 1, 2)
+
+    def rotateY(self, angles):
+        self._rotate(angles, 2, 0)
+
+    def rotateZ(self, angles):
+        self._rotate(angles, 0, 1)
+
+    def __mul__(self, other):
+        data = numpy.matmul(self._data, other._data)
+        return MatrixArray._wrap(data)
+
+    def __imul__(self, other):
+        self._data[:] = numpy.matmul(self._data, other._data)
+        return self
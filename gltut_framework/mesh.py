@@ -1,38 +1,141 @@
+import numpy
 from OpenGL import GL
+from gl_state import GL_STATE
+from buffers import as_index_buffer, buffer_data
+from vertex_layout import POSITION_LAYOUT, POSITION_LOCATION
+import frustum
+
+# attribute locations read by the *InstancedUBO.vert shaders. a mat4 attribute
+# takes four consecutive locations, one per column.
+INSTANCE_MATRIX_LOCATION = 2
+INSTANCE_COLOR_LOCATION = 6
+
 class Mesh(object):
-    def __init__(self, vertices, indices, draw_method):
-        from . import SHORT_SIZE, FLOAT_SIZE
+    """
+    Indexed geometry in its own vao.
+
+    layout is a VertexLayout describing the vertex data, by default a
+    single 3 float position at location 0.  The index type is the smallest
+    of GL_UNSIGNED_BYTE/SHORT/INT that holds the largest index, so meshes
+    may have more than 65536 vertices.
+    """
+    def __init__(self, vertices, indices, draw_method, layout=POSITION_LAYOUT):
         self.draw_method = draw_method
-        self.indices = indices
+        self.layout = layout
+
+        self.instance_buffer = None
+        self._bounding_box = None
+        self._bounding_sphere = None
 
         self.vao = GL.glGenVertexArrays(1)
-        GL.glBindVertexArray(self.vao)
-
-        vertexBufferObject = GL.glGenBuffers(1)
-
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, vertexBufferObject)
-        array_type = (GL.GLfloat*len(vertices))
-        GL.glBufferData(
-                GL.GL_ARRAY_BUFFER,
-                len(vertices)*FLOAT_SIZE,
-                array_type(*vertices),
-                GL.GL_STATIC_DRAW)
-        GL.glEnableVertexAttribArray(0)
-        GL.glVertexAttribPointer(0, 3, GL.GL_FLOAT, GL.GL_FALSE, 0, None)
-
-        indexBufferObject = GL.glGenBuffers(1)
-        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, indexBufferObject)
-        array_type = (GL.GLushort*len(self.indices))
-        GL.glBufferData(
-                GL.GL_ELEMENT_ARRAY_BUFFER,
-                len(self.indices)*SHORT_SIZE,
-                array_type(*self.indices),
-                GL.GL_STATIC_DRAW)
-
-        GL.glBindVertexArray(0)
+        GL_STATE.bindVertexArray(self.vao)
+
+        self.vertex_buffer = GL.glGenBuffers(1)
+        GL_STATE.bindBuffer(GL.GL_ARRAY_BUFFER, self.vertex_buffer)
+        self.vertices = layout.as_vertex_data(vertices)
+        self.vertex_count = layout.vertex_count(self.vertices)
+        buffer_data(GL.GL_ARRAY_BUFFER, self.vertices, GL.GL_STATIC_DRAW, dtype=self.vertices.dtype)
+        layout.setup(self.vertex_count)
+
+        self.index_buffer = GL.glGenBuffers(1)
+        GL_STATE.bindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, self.index_buffer)
+        self.indices, self.index_type = as_index_buffer(indices)
+        buffer_data(GL.GL_ELEMENT_ARRAY_BUFFER, self.indices, GL.GL_STATIC_DRAW, dtype=self.indices.dtype)
+
+        GL_STATE.bindVertexArray(0)
+
+    def positions(self):
+        # (N,3) copy of the vertex positions
+        return self.layout.unpack(self.vertices, POSITION_LOCATION)[:, :3]
+
+    @property
+    def bounding_box(self):
+        # local space (min, max) corners
+        if self._bounding_box is None:
+            self._bounding_box = frustum.bounding_box(self.positions())
+        return self._bounding_box
+
+    @property
+    def bounding_sphere(self):
+        # local space (center, radius)
+        if self._bounding_sphere is None:
+            self._bounding_sphere = frustum.bounding_sphere(self.positions())
+        return self._bounding_sphere
+
+    @property
+    def nbytes(self):
+        # size of the vertex and index buffers on the GPU
+        return self.vertices.nbytes + self.indices.nbytes
+
+    def delete(self):
+        GL_STATE.deleteVertexArray(self.vao)
+        GL_STATE.deleteBuffer(self.vertex_buffer)
+        GL_STATE.deleteBuffer(self.index_buffer)
+        if self.instance_buffer is not None:
+            GL_STATE.deleteBuffer(self.instance_buffer)
+        self.vao = self.vertex_buffer = self.index_buffer = self.instance_buffer = None
+
+    def bind(self):
+        GL_STATE.bindVertexArray(self.vao)
+
+    def draw(self):
+        # NOTE: expects self.vao to be bound, see bind()
+        GL.glDrawElements(self.draw_method, len(self.indices), self.index_type, None)
 
     def render(self):
-        GL.glBindVertexArray(self.vao)
-        GL.glDrawElements(self.draw_method, len(self.indices), GL.GL_UNSIGNED_SHORT, None)
-        GL.glBindVertexArray(0)
+        # NOTE: the vao is left bound, binding it again for the next
+        #       render of this mesh is then skipped by GL_STATE.
+        self.bind()
+        self.draw()
+
+    def _initialize_instance_buffer(self):
+        # NOTE: this must be called with self.vao bound so that the
+        #       instance attributes become part of the vao's state.
+        from . import FLOAT_SIZE
+        self.instance_buffer = GL.glGenBuffers(1)
+        GL_STATE.bindBuffer(GL.GL_ARRAY_BUFFER, self.instance_buffer)
+
+        stride = 20*FLOAT_SIZE
+        for column in xrange(4):
+            location = INSTANCE_MATRIX_LOCATION + column
+            GL.glEnableVertexAttribArray(location)
+            GL.glVertexAttribPointer(location, 4, GL.GL_FLOAT, GL.GL_FALSE, stride, GL.GLvoidp(4*column*FLOAT_SIZE))
+            GL.glVertexAttribDivisor(location, 1)
+
+        GL.glEnableVertexAttribArray(INSTANCE_COLOR_LOCATION)
+        GL.glVertexAttribPointer(INSTANCE_COLOR_LOCATION, 4, GL.GL_FLOAT, GL.GL_FALSE, stride, GL.GLvoidp(16*FLOAT_SIZE))
+        GL.glVertexAttribDivisor(INSTANCE_COLOR_LOCATION, 1)
+
+    def draw_instanced(self, matrices, colors):
+        """
+        Draw one copy of the mesh per model matrix with a single
+        glDrawElementsInstanced call.  Expects self.vao to be bound, see
+        render_instanced().
+
+        matrices is a MatrixArray or anything convertible to an (N,4,4)
+        array.  colors is either one RGBA color for every instance or an
+        (N,4) array.  Use with the *InstancedUBO.vert shaders, which read the
+        model matrix and color as per-instance attributes.
+        """
+        matrices = numpy.asarray(matrices, dtype=numpy.float32).reshape(-1, 16)
+        count = len(matrices)
+        if not count:
+            return
+
+        # one interleaved record per instance: 16 matrix floats, 4 color floats
+        instance_data = numpy.empty((count, 20), dtype=numpy.float32)
+        instance_data[:, :16] = matrices
+        instance_data[:, 16:] = colors
+
+        if self.instance_buffer is None:
+            self._initialize_instance_buffer()
+        GL_STATE.bindBuffer(GL.GL_ARRAY_BUFFER, self.instance_buffer)
+        # re-specifying the whole store lets the driver orphan the old one
+        # instead of waiting for draws that still read it
+        buffer_data(GL.GL_ARRAY_BUFFER, instance_data, GL.GL_STREAM_DRAW)
+
+        GL.glDrawElementsInstanced(self.draw_method, len(self.indices), self.index_type, None, count)
 
+    def render_instanced(self, matrices, colors):
+        self.bind()
+        self.draw_instanced(matrices, colors)
@@ -0,0 +1,68 @@
+import hashlib
+from buffers import as_index_buffer
+from vertex_layout import POSITION_LAYOUT
+
+class MeshRegistry(object):
+    """
+    Shares one Mesh between every caller that asks for the same geometry.
+
+    acquire() hashes the vertex data, index data, draw method and layout and
+    returns the Mesh already created for that content, creating it only
+    the first time.  Each acquire() adds a reference; release() drops one
+    and deletes the mesh's GL objects once nobody uses it.
+
+    bytes_saved is the GPU buffer memory that would have been spent on the
+    duplicate copies.
+    """
+    def __init__(self):
+        self.meshes = {}
+        self.refcounts = {}
+        self._keys = {}
+
+    def __len__(self):
+        return len(self.meshes)
+
+    @staticmethod
+    def _key(vertices, indices, draw_method, layout):
+        digest = hashlib.sha1(vertices)
+        digest.update(indices)
+        digest.update(repr((draw_method, layout.key)))
+        return digest.hexdigest()
+
+    def acquire(self, vertices, indices, draw_method, layout=POSITION_LAYOUT):
+        from . import Mesh
+        vertices = layout.as_vertex_data(vertices)
+        indices = as_index_buffer(indices)[0]
+        key = self._key(vertices, indices, draw_method, layout)
+
+        mesh = self.meshes.get(key)
+        if mesh is None:
+            mesh = self.meshes[key] = Mesh(vertices, indices, draw_method, layout)
+            self.refcounts[key] = 0
+            self._keys[id(mesh)] = key
+        self.refcounts[key] += 1
+        return mesh
+
+    def release(self, mesh):
+        key = self._keys[id(mesh)]
+        self.refcounts[key] -= 1
+        if not self.refcounts[key]:
+            del self.meshes[key]
+            del self.refcounts[key]
+            del self._keys[id(mesh)]
+            mesh.delete()
+
+    def refcount(self, mesh):
+        return self.refcounts.get(self._keys.get(id(mesh)), 0)
+
+    @property
+    def bytes_used(self):
+        return sum(mesh.nbytes for mesh in self.meshes.itervalues())
+
+    @property
+    def bytes_saved(self):
+        return sum(
+                mesh.nbytes * (self.refcounts[key] - 1)
+                for key, mesh in self.meshes.iteritems())
+
+MESH_REGISTRY = MeshRegistry()
@@ -0,0 +1,226 @@
+"""
+Offline mesh optimization for triangle lists.
+
+- weld() merges vertices that are equal within a tolerance.
+- reorder_triangles() orders triangles for the post-transform vertex
+  cache with Tom Forsyth's "Linear-Speed Vertex Cache Optimisation".
+- reorder_vertices() orders vertices by first use so vertex fetches
+  walk the buffer linearly.
+- acmr() is the average cache miss ratio: vertex shader invocations per
+  triangle with a FIFO cache.  3.0 is the worst, large regular meshes
+  approach 0.5.
+
+optimize() runs all of these on plain arrays and optimize_mesh() on a
+Mesh.  These are meant for asset build time: the NumPy parts are
+vectorized but the greedy triangle ordering visits each triangle once in
+Python.
+"""
+import collections
+import numpy
+from OpenGL import GL
+
+CACHE_SIZE = 32
+
+# Forsyth's scoring constants
+CACHE_DECAY_POWER = 1.5
+LAST_TRIANGLE_SCORE = 0.75
+VALENCE_BOOST_SCALE = 2.0
+VALENCE_BOOST_POWER = 0.5
+MAX_VALENCE = 32
+
+OptimizeReport = collections.namedtuple('OptimizeReport', [
+        'vertices_before', 'vertices_after',
+        'triangles_before', 'triangles_after',
+        'acmr_before', 'acmr_after'])
+
+def _triangles(indices):
+    indices = numpy.asarray(indices, dtype=numpy.int64).reshape(-1)
+    if len(indices) % 3:
+        raise ValueError('index count %d is not a multiple of 3' % len(indices))
+    return indices.reshape(-1, 3)
+
+def acmr(indices, cache_size=CACHE_SIZE):
+    triangles = _triangles(indices)
+    if not len(triangles):
+        return 0.0
+    # a vertex is in a FIFO cache if it was one of the last cache_size
+    # vertices to be inserted
+    inserted = {}
+    misses = 0
+    for vertex in triangles.ravel().tolist():
+        stamp = inserted.get(vertex)
+        if stamp is None or misses - stamp > cache_size:
+            inserted[vertex] = misses
+            misses += 1
+    return misses / float(len(triangles))
+
+def weld(vertices, indices, tolerance=1e-6):
+    """
+    Merge vertices whose components round to the same multiple of
+    tolerance.  vertices is an (N, C) array.  Returns the unique vertices
+    in order of first appearance, the remapped indices and remap, the new
+    index of every old vertex.
+
+    NOTE: rounding puts values that straddle a rounding boundary in
+          different cells, so two vertices closer than tolerance may still
+          be kept apart.
+    """
+    vertices = numpy.asarray(vertices)
+    keys = numpy.round(vertices.reshape(len(vertices), -1) / tolerance).astype(numpy.int64)
+    _, first, inverse = numpy.unique(keys, axis=0, return_index=True, return_inverse=True)
+
+    # keep the vertices in the order they first appeared
+    order = numpy.argsort(first)
+    rank = numpy.empty(len(order), dtype=numpy.int64)
+    rank[order] = numpy.arange(len(order))
+    remap = rank[inverse.reshape(-1)]
+    return vertices[first[order]], remap[numpy.asarray(indices, dtype=numpy.int64)], remap
+
+def remove_degenerate(indices):
+    """
+    Drop triangles that use the same vertex more than once.
+    """
+    triangles = _triangles(indices)
+    keep = ((triangles[:, 0] != triangles[:, 1]) &
+            (triangles[:, 1] != triangles[:, 2]) &
+            (triangles[:, 2] != triangles[:, 0]))
+    return triangles[keep].reshape(-1)
+
+def _score_table(cache_size):
+    # table[cache position + 1][remaining valence]; position -1 means not
+    # in the cache
+    position = numpy.arange(cache_size, dtype=numpy.float64)
+    cache_score = numpy.where(
+            position < 3,
+            LAST_TRIANGLE_SCORE,
+            (1.0 - (position - 3) / max(cache_size - 3, 1)).clip(0.0) ** CACHE_DECAY_POWER)
+
+    table = numpy.zeros((cache_size + 1, MAX_VALENCE + 1))
+    table[1:, 1:] = cache_score[:, numpy.newaxis]
+    valence = numpy.arange(1, MAX_VALENCE + 1, dtype=numpy.float64)
+    table[:, 1:] += VALENCE_BOOST_SCALE * valence ** -VALENCE_BOOST_POWER
+    return table.tolist()
+
+def reorder_triangles(indices, cache_size=CACHE_SIZE):
+    """
+    Return indices with the triangles reordered so consecutive triangles
+    share as many vertices as possible, using Forsyth's greedy scoring.
+    Each triangle keeps its winding.
+    """
+    triangles = _triangles(indices)
+    triangle_count = len(triangles)
+    if not triangle_count:
+        return triangles.reshape(-1)
+
+    # triangles using each vertex, as one array sliced by offsets.  the
+    # first remaining[v] entries of a vertex's slice are the triangles
+    # that haven't been emitted yet.
+    flat = triangles.ravel()
+    valence = numpy.bincount(flat)
+    offsets = numpy.concatenate([[0], numpy.cumsum(valence)]).tolist()
+    adjacency = (numpy.argsort(flat, kind='mergesort') // 3).tolist()
+    remaining = valence.tolist()
+
+    table = _score_table(cache_size)
+    vertex_score = [table[0][min(count, MAX_VALENCE)] for count in remaining]
+    corners = triangles.tolist()
+    triangle_score = (
+            numpy.take(vertex_score, triangles).sum(axis=1)).tolist()
+
+    emitted = [False] * triangle_count
+    result = []
+    cache = []
+    best = max(xrange(triangle_count), key=triangle_score.__getitem__)
+    scan = 0
+
+    for _ in xrange(triangle_count):
+        if best < 0:
+            # nothing in the cache has triangles left, start somewhere new
+            while emitted[scan]:
+                scan += 1
+            best = scan
+
+        emitted[best] = True
+        triangle = corners[best]
+        result.append(best)
+
+        for vertex in triangle:
+            start = offsets[vertex]
+            last = start + remaining[vertex] - 1
+            position = adjacency.index(best, start, last + 1)
+            adjacency[position], adjacency[last] = adjacency[last], adjacency[position]
+            remaining[vertex] -= 1
+
+        cache = triangle + [vertex for vertex in cache if vertex not in triangle]
+        for vertex in cache[cache_size:]:
+            vertex_score[vertex] = table[0][min(remaining[vertex], MAX_VALENCE)]
+        del cache[cache_size:]
+        for position, vertex in enumerate(cache):
+            vertex_score[vertex] = table[position + 1][min(remaining[vertex], MAX_VALENCE)]
+
+        best = -1
+        best_score = -1.0
+        for vertex in cache:
+            start = offsets[vertex]
+            for candidate in adjacency[start:start + remaining[vertex]]:
+                a, b, c = corners[candidate]
+                score = vertex_score[a] + vertex_score[b] + vertex_score[c]
+                triangle_score[candidate] = score
+                if score > best_score:
+                    best = candidate
+                    best_score = score
+
+    return triangles[result].reshape(-1)
+
+def reorder_vertices(vertex_count, indices):
+    """
+    Return (order, indices): order lists the old vertex indices in the
+    order they are first used by indices, followed by any unused vertices,
+    and indices are remapped to match.  Apply it with vertices[order].
+    """
+    indices = numpy.asarray(indices, dtype=numpy.int64).reshape(-1)
+    used, first = numpy.unique(indices, return_index=True)
+    unused = numpy.setdiff1d(numpy.arange(vertex_count), used, assume_unique=True)
+    order = numpy.concatenate([used[numpy.argsort(first)], unused])
+
+    remap = numpy.empty(vertex_count, dtype=numpy.int64)
+    remap[order] = numpy.arange(vertex_count)
+    return order, remap[indices]
+
+def optimize(vertices, indices, tolerance=1e-6, cache_size=CACHE_SIZE):
+    """
+    Weld, drop degenerate triangles, reorder triangles and then vertices.
+    vertices is an (N, C) array.  Returns (vertices, indices, report).
+    """
+    vertices = numpy.asarray(vertices)
+    original = _triangles(indices).reshape(-1)
+
+    welded, indices, remap = weld(vertices, original, tolerance)
+    indices = remove_degenerate(indices)
+    indices = reorder_triangles(indices, cache_size)
+    order, indices = reorder_vertices(len(welded), indices)
+
+    report = OptimizeReport(
+            len(vertices), len(welded),
+            len(original) // 3, len(indices) // 3,
+            acmr(original, cache_size), acmr(indices, cache_size))
+    return welded[order], indices, report
+
+def optimize_mesh(mesh, tolerance=1e-6, cache_size=CACHE_SIZE):
+    """
+    Return (Mesh, report) with an optimized copy of a GL_TRIANGLES mesh,
+    using the same vertex layout.  All attributes take part in welding.
+    """
+    from . import Mesh
+    if mesh.draw_method != GL.GL_TRIANGLES:
+        raise ValueError('only GL_TRIANGLES meshes can be optimized')
+
+    layout = mesh.layout
+    columns = [layout.unpack(mesh.vertices, attribute.location) for attribute in layout.attributes]
+    vertices, indices, report = optimize(
+            numpy.hstack([column.astype(numpy.float64) for column in columns]),
+            mesh.indices, tolerance, cache_size)
+
+    splits = numpy.cumsum([attribute.size for attribute in layout.attributes])[:-1]
+    columns = numpy.split(vertices, splits, axis=1)
+    return Mesh(layout.pack(*columns), indices, mesh.draw_method, layout), report
@@ -0,0 +1,107 @@
+import math
+
+class Quaternion(object):
+    """
+    Unit quaternion rotation stored as plain floats.
+
+    Multiplying quaternions composes rotations in the same order as
+    calling the MatrixStack rotate methods one after another, i.e.
+    stack.rotateX(a); stack.rotateY(b) is the same as
+    stack.rotate(Quaternion.fromAxisAngle((1,0,0), a) *
+                 Quaternion.fromAxisAngle((0,1,0), b)).
+    """
+    __slots__ = ('w', 'x', 'y', 'z')
+
+    def __init__(self, w=1.0, x=0.0, y=0.0, z=0.0):
+        self.w = float(w)
+        self.x = float(x)
+        self.y = float(y)
+        self.z = float(z)
+
+    @classmethod
+    def fromAxisAngle(cls, axis, fAngDeg):
+        fHalfAngRad = math.radians(fAngDeg) / 2.0
+        fSin = math.sin(fHalfAngRad)
+        fInvLength = 1.0 / math.sqrt(axis[0]*axis[0] + axis[1]*axis[1] + axis[2]*axis[2])
+        return cls(
+                math.cos(fHalfAngRad),
+                axis[0] * fInvLength * fSin,
+                axis[1] * fInvLength * fSin,
+                axis[2] * fInvLength * fSin)
+
+    def copy(self):
+        return type(self)(self.w, self.x, self.y, self.z)
+
+    def tolist(self):
+        return [self.w, self.x, self.y, self.z]
+
+    def dot(self, other):
+        return self.w*other.w + self.x*other.x + self.y*other.y + self.z*other.z
+
+    def length(self):
+        return math.sqrt(self.dot(self))
+
+    def normalize(self):
+        fInvLength = 1.0 / self.length()
+        self.w *= fInvLength
+        self.x *= fInvLength
+        self.y *= fInvLength
+        self.z *= fInvLength
+
+    def normal(self):
+        result = self.copy()
+        result.normalize()
+        return result
+
+    def conjugate(self):
+        return type(self)(self.w, -self.x, -self.y, -self.z)
+
+    def __mul__(self, other):
+        return type(self)(
+                self.w*other.w - self.x*other.x - self.y*other.y - self.z*other.z,
+                self.w*other.x + self.x*other.w + self.y*other.z - self.z*other.y,
+                self.w*other.y - self.x*other.z + self.y*other.w + self.z*other.x,
+                self.w*other.z + self.x*other.y - self.y*other.x + self.z*other.w)
+
+    def slerp(self, other, fAlpha):
+        fDot = self.dot(other)
+        # take the shorter way around
+        if fDot < 0.0:
+            other = type(self)(-other.w, -other.x, -other.y, -other.z)
+            fDot = -fDot
+
+        if fDot > 0.9995:
+            # nearly parallel, a normalized lerp is accurate enough
+            fStart = 1.0 - fAlpha
+            fEnd = fAlpha
+        else:
+            fAngle = math.acos(fDot)
+            fInvSin = 1.0 / math.sin(fAngle)
+            fStart = math.sin((1.0 - fAlpha) * fAngle) * fInvSin
+            fEnd = math.sin(fAlpha * fAngle) * fInvSin
+
+        result = type(self)(
+                self.w * fStart + other.w * fEnd,
+                self.x * fStart + other.x * fEnd,
+                self.y * fStart + other.y * fEnd,
+                self.z * fStart + other.z * fEnd)
+        result.normalize()
+        return result
+
+    def rotationRows(self):
+        """
+        Return the 3x3 rotation as nested lists laid out like the upper
+        left of a Matrix (row-major, transposed from the tutorial's
+        column-major convention).
+        """
+        w, x, y, z = self.w, self.x, self.y, self.z
+        return [
+                [1.0 - 2.0*(y*y + z*z), 2.0*(x*y + w*z), 2.0*(x*z - w*y)],
+                [2.0*(x*y - w*z), 1.0 - 2.0*(x*x + z*z), 2.0*(y*z + w*x)],
+                [2.0*(x*z + w*y), 2.0*(y*z - w*x), 1.0 - 2.0*(x*x + y*y)]]
+
+    def tomatrix(self):
+        from . import Matrix
+        result = Matrix()
+        result._data[:3, :3] = self.rotationRows()
+        return result
@@ -0,0 +1,182 @@
+import operator
+import numpy
+from gl_state import GL_STATE
+
+def upload_uniform(location, value):
+    """
+    Upload a Matrix, Vector, sequence or number to a uniform of the
+    currently bound program, picking the glUniform call from its size.
+    Uploads that would not change the uniform are skipped.
+    """
+    GL_STATE.uniform(location, value)
+
+def _snapshot(value):
+    if hasattr(value, 'toarray'):
+        value = value.toarray()
+    return numpy.array(value, dtype=numpy.float32)
+
+def _freeze(values):
+    # hashable, order independent identity for a dict of uniforms/flags
+    if not values:
+        return ()
+    return tuple(sorted(
+            (key, tuple(numpy.ravel(value).tolist()) if hasattr(value, '__len__') else value)
+            for key, value in values.items()))
+
+class DrawItem(object):
+    __slots__ = ('key', 'program', 'mesh', 'uniforms', 'material', 'state', 'instances')
+
+    def __init__(self, key, program, mesh, uniforms, material, state, instances):
+        self.key = key
+        self.program = program
+        self.mesh = mesh
+        self.uniforms = uniforms
+        self.material = material
+        self.state = state
+        self.instances = instances
+
+class RenderQueue(object):
+    """
+    Collects draw calls for a frame and submits them sorted so that
+    programs, meshes and materials are switched as rarely as possible.
+
+    Each item is sorted by a packed integer key made of, from most to least
+    significant: its GL state, program, mesh and material, each numbered in
+    the order first added in the frame and 16 bits wide.  Items that change
+    no GL state always come first, so items that do (e.g. disable depth
+    testing) draw after everything else.  Items with equal keys keep the
+    order they were added in.
+
+    - uniforms: {location: value} uploaded for every item, e.g. the model
+      matrix.  Values are copied when the item is added.
+    - material: {location: value} uploaded only when it differs from the
+      previous item's material within the same program.
+    - state: {capability: enabled} applied with glEnable/glDisable before
+      the item's group.  Afterwards each capability goes back to what
+      GL_STATE had for it before the queue changed it.
+    - instances: optional (matrices, colors) drawn with
+      Mesh.draw_instanced instead of Mesh.draw.
+
+    After flush() the counters describe the frame that was just drawn.
+    changes_avoided is the number of program binds, VAO binds and material
+    uploads saved compared to setting all three for every item.
+    """
+    FIELDS = ('states', 'programs', 'meshes', 'materials')
+
+    def __init__(self):
+        self.items = []
+        self._ids = [{}, {}, {}, {}]
+        self._states = {}
+        self._restore = {}
+        self._reset()
+
+        self.program_changes = 0
+        self.mesh_changes = 0
+        self.material_changes = 0
+        self.state_changes = 0
+        self.changes_avoided = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def _reset(self):
+        for ids in self._ids:
+            ids.clear()
+        self._states.clear()
+        # no state changes sort first
+        self._id(0, ())
+        self._states[()] = None
+
+    def _id(self, field, value):
+        ids = self._ids[field]
+        result = ids.get(value)
+        if result is None:
+            result = len(ids)
+            if result > 0xFFFF:
+                raise ValueError('more than 65536 different %s in one frame' % self.FIELDS[field])
+            ids[value] = result
+        return result
+
+    def add(self, program, mesh, uniforms=None, material=None, state=None, instances=None):
+        if uniforms:
+            # copy now, matrix stacks modify their top matrix in place
+            uniforms = [(location, _snapshot(value)) for location, value in uniforms.items()]
+        material_key = _freeze(material)
+        state_key = _freeze(state)
+        self._states[state_key] = state
+
+        key = ((self._id(0, state_key) << 48) |
+               (self._id(1, program) << 32) |
+               (self._id(2, id(mesh)) << 16) |
+               self._id(3, material_key))
+        self.items.append(DrawItem(
+                key, program, mesh, uniforms, material_key, state_key, instances))
+
+    def _set_capability(self, capability, enabled):
+        if GL_STATE.isEnabled(capability) != enabled:
+            (GL_STATE.enable if enabled else GL_STATE.disable)(capability)
+            self.state_changes += 1
+
+    def _apply_state(self, previous, current):
+        previous = self._states[previous] or {}
+        current = self._states[current] or {}
+        for capability in previous:
+            if capability not in current:
+                self._set_capability(capability, self._restore[capability])
+        for capability, enabled in current.items():
+            if capability not in self._restore:
+                # NOTE: if GL_STATE doesn't know the capability's value the
+                #       item is assumed to change it.
+                prior = GL_STATE.isEnabled(capability)
+                self._restore[capability] = (not enabled) if prior is None else prior
+            self._set_capability(capability, enabled)
+
+    def flush(self):
+        self.program_changes = 0
+        self.mesh_changes = 0
+        self.material_changes = 0
+        self.state_changes = 0
+
+        self.items.sort(key=operator.attrgetter('key'))
+
+        currState = ()
+        currProgram = None
+        currMesh = None
+        currMaterial = None
+        for item in self.items:
+            if item.state != currState:
+                self._apply_state(currState, item.state)
+                currState = item.state
+            if item.program != currProgram:
+                GL_STATE.useProgram(item.program)
+                currProgram = item.program
+                currMaterial = None
+                self.program_changes += 1
+            if item.mesh is not currMesh:
+                item.mesh.bind()
+                currMesh = item.mesh
+                self.mesh_changes += 1
+            if item.material != currMaterial:
+                if item.material:
+                    for location, value in item.material:
+                        upload_uniform(location, value)
+                    self.material_changes += 1
+                currMaterial = item.material
+
+            if item.uniforms:
+                for location, value in item.uniforms:
+                    upload_uniform(location, value)
+
+            if item.instances is not None:
+                item.mesh.draw_instanced(*item.instances)
+            else:
+                item.mesh.draw()
+
+        if currState:
+            self._apply_state(currState, ())
+
+        self.changes_avoided = 3 * len(self.items) - (
+                self.program_changes + self.mesh_changes + self.material_changes)
+        del self.items[:]
+        self._restore.clear()
+        self._reset()
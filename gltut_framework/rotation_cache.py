@@ -0,0 +1,55 @@
+import math
+import collections
+
+# rows mixed by a rotation about each axis, see MatrixStack._rotate
+ROTATION_AXES = {'x': (1, 2), 'y': (2, 0), 'z': (0, 1)}
+
+class RotationCache(object):
+    """
+    Bounded LRU cache of axis rotation matrices keyed by (axis, angle in
+    degrees).
+
+    Joint angles that only ever move in fixed increments, like the
+    Hierarchy tutorial's, come up over and over, so building each rotation
+    Matrix once pays for the lookup.  MatrixStack doesn't use this: its
+    rotations update the top matrix in place from a cosine and sine, which
+    are cheaper to compute than to look up.  Matrices returned by matrix()
+    are shared between callers and must not be modified.
+    """
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def matrix(self, axis, fAngDeg):
+        key = (axis, fAngDeg)
+        theMat = self._entries.pop(key, None)
+        if theMat is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            from . import Matrix
+            fAngRad = math.radians(fAngDeg)
+            fCos = math.cos(fAngRad)
+            fSin = math.sin(fAngRad)
+            i, j = ROTATION_AXES[axis]
+            theMat = Matrix()
+            theMat[i,i] = fCos
+            theMat[i,j] = fSin
+            theMat[j,i] = -fSin
+            theMat[j,j] = fCos
+            if len(self._entries) >= self.maxsize:
+                self._entries.popitem(last=False)
+        self._entries[key] = theMat
+        return theMat
+
+ROTATION_CACHE = RotationCache()
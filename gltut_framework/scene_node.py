@@ -0,0 +1,126 @@
+import numpy
+
+class SceneNode(object):
+    """
+    Node of a transform hierarchy holding a local translation, rotation and
+    scale and a cached world matrix.
+
+    The local matrix is the one a MatrixStack builds with translate(),
+    rotate() and then scale() (in that order), and the world matrix is
+    local * parent's world matrix.  Both are only rebuilt after something
+    they depend on changed: setting a node's translation, rotation or scale
+    marks it and everything below it dirty, and reading world_matrix
+    recomputes just the dirty nodes on the way up.  A static hierarchy
+    costs no matrix math at all.
+
+    Matrices returned by local_matrix and world_matrix are shared with the
+    node and must not be modified.
+    """
+    def __init__(self, name=None, translation=(0.0, 0.0, 0.0), rotation=None, scale=(1.0, 1.0, 1.0)):
+        self.name = name
+        self.parent = None
+        self.children = []
+        self._translation = tuple(translation)
+        self._rotation = self._rotation_rows(rotation)
+        self._scale = tuple(scale)
+        self._local = None
+        self._world = None
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, self.name)
+
+    @staticmethod
+    def _rotation_rows(rotation):
+        # rotation may be None, a Quaternion or a Matrix
+        if rotation is None:
+            return numpy.identity(3, dtype=numpy.float32)
+        if hasattr(rotation, 'rotationRows'):
+            return numpy.array(rotation.rotationRows(), dtype=numpy.float32)
+        return numpy.array(rotation.toarray()[:3, :3], dtype=numpy.float32)
+
+    def add_child(self, node):
+        if node.parent is not None:
+            node.parent.remove_child(node)
+        node.parent = self
+        self.children.append(node)
+        node._invalidate()
+        return node
+
+    def remove_child(self, node):
+        self.children.remove(node)
+        node.parent = None
+        node._invalidate()
+
+    def walk(self):
+        """
+        Yield this node and all of its descendants, depth first.
+        """
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
+
+    def _invalidate(self):
+        # a node's world matrix can only be cached if its parent's is, so
+        # stop at nodes that are already dirty
+        if self._world is None:
+            return
+        self._world = None
+        for child in self.children:
+            child._invalidate()
+
+    @property
+    def translation(self):
+        return self._translation
+
+    @translation.setter
+    def translation(self, value):
+        self._translation = tuple(value)
+        self._local = None
+        self._invalidate()
+
+    @property
+    def rotation(self):
+        """
+        The rotation as 3x3 rows, laid out like the upper left of a Matrix.
+        Set it to a Quaternion or a Matrix.
+        """
+        return self._rotation
+
+    @rotation.setter
+    def rotation(self, value):
+        self._rotation = self._rotation_rows(value)
+        self._local = None
+        self._invalidate()
+
+    @property
+    def scale(self):
+        return self._scale
+
+    @scale.setter
+    def scale(self, value):
+        self._scale = tuple(value)
+        self._local = None
+        self._invalidate()
+
+    @property
+    def local_matrix(self):
+        if self._local is None:
+            from . import Matrix
+            # scale * rotation * translation, written out directly: scaling
+            # the rotation's rows and placing the translation in row 3
+            data = numpy.identity(4, dtype=numpy.float32)
+            data[:3, :3] = self._rotation * numpy.reshape(self._scale, (3, 1))
+            data[3, :3] = self._translation
+            self._local = Matrix._wrap(data)
+        return self._local
+
+    @property
+    def world_matrix(self):
+        if self._world is None:
+            if self.parent is None:
+                self._world = self.local_matrix
+            else:
+                self._world = self.local_matrix * self.parent.world_matrix
+        return self._world
@@ -0,0 +1,451 @@
+"""
+Spatial indices over axis aligned object bounds, so culling, picking and
+proximity queries only look at objects near the query instead of all of
+them.
+
+Both indices partition the XZ (ground) plane:
+
+- UniformGrid buckets every object into each fixed size cell it overlaps.
+  Cheap to build and update, best when objects are spread evenly and
+  are of similar size.
+- LooseQuadtree stores each object once, in the smallest node whose
+  loose bounds (the node grown by half its size on every side) contain
+  it.  Copes with uneven density and mixed object sizes.
+
+Objects are given as (min, max) corners and identified by the int id
+insert()/insert_many() return.  Every query returns an array of ids.
+The index only narrows down the candidates; each candidate is then tested
+exactly against its own bounds, vectorized with NumPy.  The quadtree skips
+that test for objects in nodes that lie entirely inside the query.
+"""
+import itertools
+import numpy
+from frustum import boxes_in_frustum
+
+def _key(x, z):
+    # a single int for a 2D cell/node coordinate, for ints and int64 arrays
+    return (x << 32) | (z & 0xFFFFFFFF)
+
+def _split_key(keys):
+    keys = numpy.asarray(keys, dtype=numpy.int64)
+    return keys >> 32, ((keys & 0xFFFFFFFF) ^ 0x80000000) - 0x80000000
+
+def _group(keys, ids):
+    # yield (key, [ids]) for each distinct key
+    order = numpy.argsort(keys, kind='mergesort')
+    keys = keys[order]
+    ids = ids[order]
+    unique, starts = numpy.unique(keys, return_index=True)
+    return itertools.izip(unique.tolist(), (group.tolist() for group in numpy.split(ids, starts[1:])))
+
+_NONE = numpy.empty(0, dtype=numpy.int64)
+
+def _ranges(starts, sizes):
+    # concatenation of arange(start, start + size) for each pair
+    offsets = numpy.cumsum(sizes) - sizes
+    return numpy.repeat(starts - offsets, sizes) + numpy.arange(sizes.sum())
+
+def _box_test(lower, upper):
+    lower = numpy.asarray(lower, dtype=numpy.float32)
+    upper = numpy.asarray(upper, dtype=numpy.float32)
+    def test(mins, maxs):
+        return ((mins <= upper) & (maxs >= lower)).all(axis=1)
+    def contains(mins, maxs):
+        return ((mins >= lower) & (maxs <= upper)).all(axis=1)
+    test.contains = contains
+    return test
+
+def _sphere_test(center, radius):
+    center = numpy.asarray(center, dtype=numpy.float32)
+    def test(mins, maxs):
+        closest = numpy.clip(center, mins, maxs)
+        return ((closest - center) ** 2).sum(axis=1) <= radius * radius
+    def contains(mins, maxs):
+        furthest = numpy.where(center - mins > maxs - center, mins, maxs)
+        return ((furthest - center) ** 2).sum(axis=1) <= radius * radius
+    test.contains = contains
+    return test
+
+def _frustum_test(planes):
+    def test(mins, maxs):
+        return boxes_in_frustum(planes, mins, maxs)
+    def contains(mins, maxs):
+        # the corner of each box nearest along each plane's normal is inside
+        normals = planes[:, :3]
+        distances = (numpy.dot(mins, normals.clip(0.0).T) +
+                     numpy.dot(maxs, normals.clip(None, 0.0).T) +
+                     planes[:, 3])
+        return (distances >= 0.0).all(axis=1)
+    test.contains = contains
+    return test
+
+def _ray_distances(origin, direction, max_distance):
+    # slab test: distance along the ray to each box, inf where it misses
+    origin = numpy.asarray(origin, dtype=numpy.float64)
+    direction = numpy.asarray(direction, dtype=numpy.float64)
+    parallel = direction == 0.0
+    def distances(mins, maxs):
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            t1 = (mins - origin) / direction
+            t2 = (maxs - origin) / direction
+        near = numpy.minimum(t1, t2)
+        far = numpy.maximum(t1, t2)
+        if parallel.any():
+            # the ray can only hit if it starts inside the slab
+            inside = (mins[:, parallel] <= origin[parallel]) & (origin[parallel] <= maxs[:, parallel])
+            near[:, parallel] = numpy.where(inside, -numpy.inf, numpy.inf)
+            far[:, parallel] = numpy.where(inside, numpy.inf, -numpy.inf)
+        tnear = near.max(axis=1)
+        tfar = far.min(axis=1)
+        hit = (tnear <= tfar) & (tfar >= 0.0) & (tnear <= max_distance)
+        return numpy.where(hit, numpy.maximum(tnear, 0.0), numpy.inf)
+    return distances
+
+class _SpatialIndex(object):
+    def __init__(self):
+        self.mins = numpy.empty((0, 3), dtype=numpy.float32)
+        self.maxs = numpy.empty((0, 3), dtype=numpy.float32)
+        self.alive = numpy.empty(0, dtype=bool)
+        self.size = 0
+        # y range of everything inserted, used as the height of cells/nodes
+        self.ylimits = [numpy.inf, -numpy.inf]
+
+    def __len__(self):
+        return int(self.alive[:self.size].sum())
+
+    def _allocate(self, mins, maxs):
+        mins = numpy.asarray(mins, dtype=numpy.float32).reshape(-1, 3)
+        maxs = numpy.asarray(maxs, dtype=numpy.float32).reshape(-1, 3)
+        end = self.size + len(mins)
+        if end > len(self.mins):
+            capacity = max(end, 2 * len(self.mins))
+            for name in ('mins', 'maxs', 'alive'):
+                old = getattr(self, name)
+                new = numpy.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+                new[:self.size] = old[:self.size]
+                setattr(self, name, new)
+
+        ids = numpy.arange(self.size, end)
+        self.mins[ids] = mins
+        self.maxs[ids] = maxs
+        self.alive[ids] = True
+        self.size = end
+        if len(ids):
+            self.ylimits[0] = min(self.ylimits[0], float(mins[:, 1].min()))
+            self.ylimits[1] = max(self.ylimits[1], float(maxs[:, 1].max()))
+        return ids
+
+    def insert_many(self, mins, maxs):
+        """
+        Add N objects from (N,3) arrays of min and max corners in one
+        vectorized pass.  Returns their ids.
+        """
+        ids = self._allocate(mins, maxs)
+        self._link(ids)
+        return ids
+
+    def insert(self, lower, upper):
+        return int(self.insert_many(lower, upper)[0])
+
+    def remove(self, id):
+        if not (0 <= id < self.size and self.alive[id]):
+            raise KeyError(id)
+        self._unlink(id)
+        self.alive[id] = False
+
+    def _query(self, test, rect=None):
+        # candidates still need the exact test, the objects in sure are
+        # already known to pass it
+        candidates, sure = self._candidates(test, rect)
+        candidates = candidates[self.alive[candidates]]
+        return numpy.concatenate([
+                candidates[test(self.mins[candidates], self.maxs[candidates])],
+                sure[self.alive[sure]]])
+
+    def query_box(self, lower, upper):
+        """
+        Ids of the objects overlapping the box between lower and upper.
+        """
+        lower = numpy.asarray(lower, dtype=numpy.float32)
+        upper = numpy.asarray(upper, dtype=numpy.float32)
+        return self._query(_box_test(lower, upper), (lower[[0, 2]], upper[[0, 2]]))
+
+    def query_radius(self, center, radius):
+        """
+        Ids of the objects within radius of center.
+        """
+        center = numpy.asarray(center, dtype=numpy.float32)[:3]
+        return self._query(_sphere_test(center, radius), (center[[0, 2]] - radius, center[[0, 2]] + radius))
+
+    def query_frustum(self, planes):
+        """
+        Ids of the objects at least partly inside the frustum described by
+        planes, see frustum_planes().
+        """
+        return self._query(_frustum_test(planes))
+
+    def query_ray(self, origin, direction, max_distance=numpy.inf):
+        """
+        Ids of the objects hit by the ray, nearest first.
+        """
+        distances = _ray_distances(origin[:3], direction[:3], max_distance)
+        candidates = numpy.concatenate(self._candidates(lambda mins, maxs: distances(mins, maxs) < numpy.inf, None))
+        candidates = candidates[self.alive[candidates]]
+        hits = distances(self.mins[candidates], self.maxs[candidates])
+        order = numpy.argsort(hits, kind='mergesort')
+        return candidates[order[hits[order] < numpy.inf]]
+
+    def _gather(self, buckets, keys):
+        ids = list(itertools.chain.from_iterable(buckets[key] for key in keys if key in buckets))
+        return numpy.unique(numpy.array(ids, dtype=numpy.int64)), _NONE
+
+class UniformGrid(_SpatialIndex):
+    """
+    Spatial index bucketing objects into square cells of cell_size on the
+    XZ plane.  An object is listed in every cell it overlaps.
+    """
+    def __init__(self, cell_size):
+        super(UniformGrid, self).__init__()
+        self.cell_size = float(cell_size)
+        self.cells = {}
+        self._keys = None
+
+    @classmethod
+    def from_bounds(cls, mins, maxs, cell_size):
+        grid = cls(cell_size)
+        grid.insert_many(mins, maxs)
+        return grid
+
+    def _cell_range(self, mins, maxs):
+        lower = numpy.floor(mins[:, [0, 2]] / self.cell_size).astype(numpy.int64)
+        upper = numpy.floor(maxs[:, [0, 2]] / self.cell_size).astype(numpy.int64)
+        return lower, upper
+
+    def _link(self, ids):
+        lower, upper = self._cell_range(self.mins[ids], self.maxs[ids])
+        spans = upper - lower + 1
+        counts = spans[:, 0] * spans[:, 1]
+
+        # one (cell, id) pair per cell each object overlaps
+        owners = numpy.repeat(ids, counts)
+        local = numpy.arange(counts.sum()) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+        depth = numpy.repeat(spans[:, 1], counts)
+        x = numpy.repeat(lower[:, 0], counts) + local // depth
+        z = numpy.repeat(lower[:, 1], counts) + local % depth
+
+        for key, group in _group(_key(x, z), owners):
+            self.cells.setdefault(key, []).extend(group)
+        self._keys = None
+
+    def _unlink(self, id):
+        lower, upper = self._cell_range(self.mins[id:id + 1], self.maxs[id:id + 1])
+        for x in xrange(lower[0, 0], upper[0, 0] + 1):
+            for z in xrange(lower[0, 1], upper[0, 1] + 1):
+                key = _key(x, z)
+                cell = self.cells[key]
+                cell.remove(id)
+                if not cell:
+                    del self.cells[key]
+        self._keys = None
+
+    def _candidates(self, test, rect):
+        if not self.cells:
+            return _NONE, _NONE
+
+        if rect is not None:
+            lower = numpy.floor(rect[0] / self.cell_size).astype(numpy.int64)
+            upper = numpy.floor(rect[1] / self.cell_size).astype(numpy.int64)
+            if (upper - lower + 1).prod() <= len(self.cells):
+                # small query, look the cells up directly
+                keys = [
+                        _key(x, z)
+                        for x in xrange(lower[0], upper[0] + 1)
+                        for z in xrange(lower[1], upper[1] + 1)]
+                return self._gather(self.cells, keys)
+
+        if self._keys is None:
+            self._keys = numpy.array(sorted(self.cells), dtype=numpy.int64)
+        x, z = _split_key(self._keys)
+        ones = numpy.ones(len(x), dtype=numpy.float32)
+        mins = numpy.column_stack([x * self.cell_size, ones * self.ylimits[0], z * self.cell_size])
+        maxs = numpy.column_stack([(x + 1) * self.cell_size, ones * self.ylimits[1], (z + 1) * self.cell_size])
+        return self._gather(self.cells, self._keys[test(mins, maxs)].tolist())
+
+class LooseQuadtree(_SpatialIndex):
+    """
+    Spatial index over the square on the XZ plane starting at origin (x, z)
+    with sides of size.  Each object is stored once, at the deepest level
+    (up to max_depth) whose nodes are at least as large as the object, in
+    the node containing its center.  Objects outside the root's loose
+    bounds are kept in a separate list that every query checks.
+    """
+    def __init__(self, origin, size, max_depth=8):
+        super(LooseQuadtree, self).__init__()
+        self.origin = numpy.asarray(origin, dtype=numpy.float64)[:2]
+        self.root_size = float(size)
+        self.max_depth = max_depth
+
+        # per level: {node key: [ids]} and {node key: objects in subtree}
+        self.nodes = [{} for level in xrange(max_depth + 1)]
+        self.counts = [{} for level in xrange(max_depth + 1)]
+        self.outside = []
+        self._packed = None
+
+    @classmethod
+    def from_bounds(cls, mins, maxs, max_depth=8):
+        mins = numpy.asarray(mins, dtype=numpy.float32).reshape(-1, 3)
+        maxs = numpy.asarray(maxs, dtype=numpy.float32).reshape(-1, 3)
+        origin = mins[:, [0, 2]].min(axis=0)
+        size = max(float((maxs[:, [0, 2]].max(axis=0) - origin).max()), 1e-6)
+        tree = cls(origin, size, max_depth)
+        tree.insert_many(mins, maxs)
+        return tree
+
+    def _place(self, mins, maxs):
+        # (levels, x, z, fits) of the node each object belongs in
+        lower = mins[:, [0, 2]].astype(numpy.float64)
+        upper = maxs[:, [0, 2]].astype(numpy.float64)
+        extents = (upper - lower).max(axis=1)
+        with numpy.errstate(divide='ignore'):
+            levels = numpy.floor(numpy.log2(self.root_size / extents))
+        levels = numpy.clip(numpy.nan_to_num(levels), 0, self.max_depth).astype(numpy.int64)
+
+        node = self.root_size / (1 << levels)
+        coords = numpy.floor(((lower + upper) * 0.5 - self.origin) / node[:, numpy.newaxis]).astype(numpy.int64)
+        coords = numpy.clip(coords, 0, ((1 << levels) - 1)[:, numpy.newaxis])
+
+        loose = self.origin + (coords - 0.5) * node[:, numpy.newaxis]
+        fits = ((lower >= loose).all(axis=1) &
+                (upper <= loose + 2.0 * node[:, numpy.newaxis]).all(axis=1))
+        return levels, coords[:, 0], coords[:, 1], fits
+
+    def _link(self, ids):
+        levels, x, z, fits = self._place(self.mins[ids], self.maxs[ids])
+        self.outside.extend(ids[~fits].tolist())
+        ids, levels, x, z = ids[fits], levels[fits], x[fits], z[fits]
+
+        for level in xrange(self.max_depth + 1):
+            here = levels == level
+            for key, group in _group(_key(x[here], z[here]), ids[here]):
+                self.nodes[level].setdefault(key, []).extend(group)
+
+            below = levels >= level
+            shift = levels[below] - level
+            counts = self.counts[level]
+            keys, added = numpy.unique(_key(x[below] >> shift, z[below] >> shift), return_counts=True)
+            for key, count in itertools.izip(keys.tolist(), added.tolist()):
+                counts[key] = counts.get(key, 0) + count
+            if len(keys):
+                self._packed = None
+
+    def _unlink(self, id):
+        levels, x, z, fits = self._place(self.mins[id:id + 1], self.maxs[id:id + 1])
+        if not fits[0]:
+            self.outside.remove(id)
+            return
+
+        level, x, z = int(levels[0]), int(x[0]), int(z[0])
+        key = _key(x, z)
+        node = self.nodes[level][key]
+        node.remove(id)
+        if not node:
+            del self.nodes[level][key]
+        self._packed = None
+
+        for ancestor in xrange(level + 1):
+            shift = level - ancestor
+            key = _key(x >> shift, z >> shift)
+            counts = self.counts[ancestor]
+            counts[key] -= 1
+            if not counts[key]:
+                del counts[key]
+
+    def _pack(self):
+        # per level (keys, offsets, ids, child_offsets, children): the
+        # sorted keys of the nodes that have objects in their subtree, with
+        # the objects stored in the node keys[i] itself at
+        # ids[offsets[i]:offsets[i + 1]] and the positions of its occupied
+        # children in the next level at
+        # children[child_offsets[i]:child_offsets[i + 1]].  Queries then
+        # walk the tree and gather objects with array operations only.
+        if self._packed is not None:
+            return self._packed
+
+        packed = []
+        for level in xrange(self.max_depth + 1):
+            nodes = self.nodes[level]
+            keys = sorted(self.counts[level])
+            sizes = numpy.array([len(nodes.get(key, ())) for key in keys], dtype=numpy.int64)
+            offsets = numpy.zeros(len(keys) + 1, dtype=numpy.int64)
+            numpy.cumsum(sizes, out=offsets[1:])
+            ids = numpy.fromiter(
+                    itertools.chain.from_iterable(nodes.get(key, ()) for key in keys),
+                    dtype=numpy.int64, count=int(offsets[-1]))
+            packed.append((numpy.array(keys, dtype=numpy.int64), offsets, ids))
+
+        for level in xrange(self.max_depth + 1):
+            keys = packed[level][0]
+            child_offsets = numpy.zeros(len(keys) + 1, dtype=numpy.int64)
+            if level < self.max_depth:
+                # the parent of every occupied node is occupied too
+                x, z = _split_key(packed[level + 1][0])
+                parents = numpy.searchsorted(keys, _key(x >> 1, z >> 1))
+                children = numpy.argsort(parents, kind='mergesort')
+                numpy.cumsum(numpy.bincount(parents, minlength=len(keys)), out=child_offsets[1:])
+            else:
+                children = _NONE
+            packed[level] += (child_offsets, children)
+
+        self._packed = packed
+        return packed
+
+    def _node_bounds(self, level, x, z):
+        # loose bounds of the nodes (x, z) of level
+        node = self.root_size / (1 << level)
+        ones = numpy.ones(len(x))
+        mins = numpy.column_stack([
+                self.origin[0] + (x - 0.5) * node, ones * self.ylimits[0], self.origin[1] + (z - 0.5) * node])
+        maxs = numpy.column_stack([
+                self.origin[0] + (x + 1.5) * node, ones * self.ylimits[1], self.origin[1] + (z + 1.5) * node])
+        return mins, maxs
+
+    def _candidates(self, test, rect):
+        contains = getattr(test, 'contains', None)
+        packed = self._pack()
+        candidates = [numpy.array(self.outside, dtype=numpy.int64)]
+        sure = [_NONE]
+        positions = numpy.arange(len(packed[0][0]))
+        inside = numpy.zeros(len(positions), dtype=bool)
+
+        # walk down one level at a time, testing every node of a level at
+        # once and only descending into children that hold objects.
+        # positions index the level's packed keys, inside marks the nodes
+        # known to be entirely inside the query: their subtrees need no
+        # more tests, neither for the nodes nor for the objects in them.
+        for level, (keys, offsets, ids, child_offsets, children) in enumerate(packed):
+            if not len(positions):
+                break
+            tested = numpy.flatnonzero(~inside)
+            if len(tested):
+                x, z = _split_key(keys[positions[tested]])
+                mins, maxs = self._node_bounds(level, x, z)
+                hits = test(mins, maxs)
+                keep = numpy.ones(len(positions), dtype=bool)
+                keep[tested] = hits
+                if contains is not None:
+                    inside[tested[hits]] = contains(mins[hits], maxs[hits])
+                positions, inside = positions[keep], inside[keep]
+
+            starts = offsets[positions]
+            sizes = offsets[positions + 1] - starts
+            candidates.append(ids[_ranges(starts[~inside], sizes[~inside])])
+            sure.append(ids[_ranges(starts[inside], sizes[inside])])
+
+            starts = child_offsets[positions]
+            sizes = child_offsets[positions + 1] - starts
+            positions = children[_ranges(starts, sizes)]
+            inside = numpy.repeat(inside, sizes)
+
+        # every object is stored in exactly one place, so there are no
+        # duplicates to remove
+        return numpy.concatenate(candidates), numpy.concatenate(sure)
@@ -0,0 +1,124 @@
+import numpy
+from OpenGL import GL
+from gl_state import GL_STATE
+from buffers import as_index_buffer, buffer_data
+from vertex_layout import VertexAttribute, VertexLayout
+import frustum
+
+# attribute locations read by the Pos*Color*.vert shaders
+POSITION_LOCATION = 0
+COLOR_LOCATION = 1
+
+BATCH_LAYOUT = VertexLayout([
+        VertexAttribute(POSITION_LOCATION, 3),
+        VertexAttribute(COLOR_LOCATION, 4)])
+
+class StaticBatch(object):
+    """
+    Geometry that never moves, baked into a single vertex and index buffer.
+
+    add() collects (mesh, model matrix, color) entries.  build() transforms
+    every entry's vertices into the batch's space on the CPU, gives them
+    the entry's color as a per-vertex attribute and uploads the result, so
+    the whole batch is then drawn with one glDrawElements call.  Draw it
+    with a program that reads the color attribute (e.g. ColorPassthrough)
+    and whatever model matrix places the batch in the world.
+
+    After build() the batch has the same bind()/draw()/render() methods and
+    bounds as Mesh, so it can be culled and submitted through a RenderQueue
+    like any mesh.
+    """
+    def __init__(self):
+        self.entries = []
+        self.draw_method = None
+        self.vao = None
+        self.vertex_count = 0
+        self.index_count = 0
+        self.index_type = None
+        self.bounding_box = None
+        self.bounding_sphere = None
+
+    def __len__(self):
+        # number of draws the batch replaces
+        return sum(len(matrices) for mesh, matrices, colors in self.entries)
+
+    def add(self, mesh, matrix, color):
+        """
+        Add one copy of mesh per matrix.  matrix is a Matrix, a MatrixArray
+        or anything convertible to an (N,4,4) array; color is one RGBA color
+        for every copy or an (N,4) array.
+        """
+        if self.vao is not None:
+            raise RuntimeError('StaticBatch has already been built')
+        if self.draw_method is None:
+            self.draw_method = mesh.draw_method
+        elif mesh.draw_method != self.draw_method:
+            raise ValueError('all meshes in a StaticBatch must use the same draw method')
+
+        if hasattr(matrix, 'toarray'):
+            matrix = matrix.toarray()
+        matrices = numpy.array(matrix, dtype=numpy.float32).reshape(-1, 4, 4)
+        colors = numpy.broadcast_to(
+                numpy.asarray(color, dtype=numpy.float32).reshape(-1, 4), (len(matrices), 4))
+        self.entries.append((mesh, matrices, colors))
+
+    def _bake(self):
+        vertex_data = []
+        index_data = []
+        base = 0
+        for mesh, matrices, colors in self.entries:
+            positions = mesh.positions()
+            count = len(positions)
+            copies = len(matrices)
+
+            # row vectors times the (transposed) model matrices, see Matrix
+            points = numpy.ones((count, 4), dtype=numpy.float32)
+            points[:, :positions.shape[1]] = positions
+            transformed = numpy.einsum('vi,mij->mvj', points, matrices)
+
+            vertices = numpy.empty((copies, count, 7), dtype=numpy.float32)
+            vertices[:, :, :3] = transformed[:, :, :3]
+            vertices[:, :, 3:] = colors[:, numpy.newaxis, :]
+            vertex_data.append(vertices.reshape(-1, 7))
+
+            offsets = base + count * numpy.arange(copies)
+            indices = numpy.asarray(mesh.indices, dtype=numpy.uint32)
+            index_data.append((indices + offsets[:, numpy.newaxis]).ravel())
+            base += count * copies
+
+        return numpy.concatenate(vertex_data), numpy.concatenate(index_data)
+
+    def build(self):
+        if not self.entries:
+            raise ValueError('cannot build an empty StaticBatch')
+        vertices, indices = self._bake()
+        self.bounding_box = frustum.bounding_box(vertices[:, :3])
+        self.bounding_sphere = frustum.bounding_sphere(vertices[:, :3])
+        indices, self.index_type = as_index_buffer(indices)
+        self.vertex_count = len(vertices)
+        self.index_count = len(indices)
+
+        self.vao = GL.glGenVertexArrays(1)
+        GL_STATE.bindVertexArray(self.vao)
+
+        vertexBufferObject = GL.glGenBuffers(1)
+        GL_STATE.bindBuffer(GL.GL_ARRAY_BUFFER, vertexBufferObject)
+        buffer_data(GL.GL_ARRAY_BUFFER, vertices, GL.GL_STATIC_DRAW)
+        BATCH_LAYOUT.setup(self.vertex_count)
+
+        indexBufferObject = GL.glGenBuffers(1)
+        GL_STATE.bindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, indexBufferObject)
+        buffer_data(GL.GL_ELEMENT_ARRAY_BUFFER, indices, GL.GL_STATIC_DRAW, dtype=indices.dtype)
+
+        GL_STATE.bindVertexArray(0)
+
+    def bind(self):
+        GL_STATE.bindVertexArray(self.vao)
+
+    def draw(self):
+        # NOTE: expects self.vao to be bound, see bind()
+        GL.glDrawElements(self.draw_method, self.index_count, self.index_type, None)
+
+    def render(self):
+        self.bind()
+        self.draw()
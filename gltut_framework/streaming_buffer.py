@@ -0,0 +1,114 @@
+import ctypes
+from OpenGL import GL
+from gl_state import GL_STATE
+from buffers import as_buffer
+
+# how long a single glClientWaitSync may block before checking again
+_WAIT_TIMEOUT_NS = 1000000
+
+class StreamingBuffer(object):
+    """
+    Ring buffer for data that is re-uploaded every frame.
+
+    write() copies data into the next free range of one large buffer and
+    returns the byte offset it was written at, to be passed as the offset
+    of glVertexAttribPointer / glDrawElements.  Ranges are never rewritten
+    while a draw that may read them is still in flight, so writes don't
+    stall on the GPU:
+
+    - with unsynchronized=True (the default) the ring is split into
+      segments.  Leaving a segment puts a fence after the draws that used
+      it, and a segment is only reused once its fence has signalled.
+      Writes go through glMapBufferRange with GL_MAP_UNSYNCHRONIZED_BIT so
+      the driver doesn't add a wait of its own.
+    - with unsynchronized=False the whole buffer is orphaned with
+      glBufferData each time the ring wraps, and writes use
+      glBufferSubData into the fresh storage.
+
+    waits counts how often a write did have to block on a fence, which
+    means the ring is too small for the amount of data in flight.
+    """
+    def __init__(self, target, size, segments=3, alignment=16, unsynchronized=True):
+        self.target = target
+        self.alignment = alignment
+        self.unsynchronized = unsynchronized
+        self.segment_size = (size // segments) & ~(alignment - 1)
+        self.size = self.segment_size * segments
+
+        self.fences = [None] * segments
+        self.segment = 0
+        self.head = 0
+
+        self.waits = 0
+        self.wraps = 0
+        self.bytes_written = 0
+
+        self.buffer = GL.glGenBuffers(1)
+        GL_STATE.bindBuffer(self.target, self.buffer)
+        GL.glBufferData(self.target, self.size, None, GL.GL_STREAM_DRAW)
+
+    def bind(self):
+        GL_STATE.bindBuffer(self.target, self.buffer)
+
+    def _wait(self, segment):
+        fence = self.fences[segment]
+        if fence is None:
+            return
+        status = GL.glClientWaitSync(fence, 0, 0)
+        if status == GL.GL_TIMEOUT_EXPIRED:
+            self.waits += 1
+            while status == GL.GL_TIMEOUT_EXPIRED:
+                status = GL.glClientWaitSync(fence, GL.GL_SYNC_FLUSH_COMMANDS_BIT, _WAIT_TIMEOUT_NS)
+        GL.glDeleteSync(fence)
+        self.fences[segment] = None
+
+    def _next_segment(self):
+        if self.unsynchronized:
+            # everything drawn from this segment so far was issued before
+            # this fence
+            self.fences[self.segment] = GL.glFenceSync(GL.GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+        self.segment = (self.segment + 1) % len(self.fences)
+        self.head = self.segment * self.segment_size
+
+        if self.segment == 0:
+            self.wraps += 1
+            if not self.unsynchronized:
+                GL.glBufferData(self.target, self.size, None, GL.GL_STREAM_DRAW)
+        if self.unsynchronized:
+            self._wait(self.segment)
+
+    def write(self, data, dtype=None):
+        """
+        Copy data (anything as_buffer accepts) into the ring and return the
+        byte offset it starts at.  Leaves the buffer bound to its target.
+        """
+        data = as_buffer(data) if dtype is None else as_buffer(data, dtype)
+        nbytes = data.nbytes
+        if nbytes > self.segment_size:
+            raise ValueError('%d bytes do not fit in a %d byte segment' % (nbytes, self.segment_size))
+
+        self.bind()
+        if self.head + nbytes > (self.segment + 1) * self.segment_size:
+            self._next_segment()
+        offset = self.head
+
+        if self.unsynchronized:
+            pointer = GL.glMapBufferRange(
+                    self.target, offset, nbytes,
+                    GL.GL_MAP_WRITE_BIT | GL.GL_MAP_UNSYNCHRONIZED_BIT | GL.GL_MAP_INVALIDATE_RANGE_BIT)
+            ctypes.memmove(pointer, data.ctypes.data, nbytes)
+            GL.glUnmapBuffer(self.target)
+        else:
+            GL.glBufferSubData(self.target, offset, nbytes, data)
+
+        self.head = (offset + nbytes + self.alignment - 1) & ~(self.alignment - 1)
+        self.bytes_written += nbytes
+        return offset
+
+    def delete(self):
+        for fence in self.fences:
+            if fence is not None:
+                GL.glDeleteSync(fence)
+        self.fences = [None] * len(self.fences)
+        GL_STATE.deleteBuffer(self.buffer)
+        self.buffer = None
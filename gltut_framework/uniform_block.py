@@ -0,0 +1,123 @@
+import re
+import numpy
+from OpenGL import GL
+from gl_state import GL_STATE
+
+# GLSL type: (columns, floats per column).  vectors and scalars have one
+# column, matrices one per column.
+_TYPES = {
+        'float': (1, 1),
+        'vec2': (1, 2),
+        'vec3': (1, 3),
+        'vec4': (1, 4),
+        'mat2': (2, 2),
+        'mat3': (3, 3),
+        'mat4': (4, 4),
+        }
+
+def _align(offset, alignment):
+    return (offset + alignment - 1) & ~(alignment - 1)
+
+def _std140(glsl_type):
+    """
+    Return (alignment, columns, floats per column, column stride) of a
+    GLSL type such as 'vec3', 'mat4' or 'float[8]' in a std140 block.
+    Array elements and matrix columns are padded to a vec4 each, a lone
+    scalar or vector is one unpadded column.
+    """
+    match = re.match(r'^(\w+)(?:\[(\d+)\])?$', glsl_type)
+    if match is None or match.group(1) not in _TYPES:
+        raise ValueError('unsupported uniform block type %r' % glsl_type)
+    columns, components = _TYPES[match.group(1)]
+    if match.group(2) is not None:
+        columns *= int(match.group(2))
+    elif columns == 1:
+        # vec3 aligns like a vec4
+        alignment = 4 * (4 if components == 3 else components)
+        return alignment, 1, components, 4 * components
+    return 16, columns, components, 16
+
+class UniformBlock(object):
+    """
+    Uniform buffer object shared by every program that declares the named
+    uniform block.
+
+    fields lists the block's members in declaration order as
+    (name, GLSL type) pairs, e.g. ('cameraToClipMatrix', 'mat4') or
+    ('weights', 'float[4]'), laid out by the std140 rules.  Only float
+    types are supported.  set() only changes a CPU side copy; upload()
+    sends everything that changed since the last upload with a single
+    glBufferSubData, so the camera and clip matrices are uploaded once per
+    frame no matter how many programs use them.
+    """
+    def __init__(self, name, binding, fields):
+        self.name = name
+        self.binding = binding
+
+        # name: (offset, columns, floats per column, column stride)
+        self.layout = {}
+        offset = 0
+        for field, glsl_type in fields:
+            alignment, columns, components, stride = _std140(glsl_type)
+            offset = _align(offset, alignment)
+            self.layout[field] = (offset, columns, components, stride)
+            offset += columns * stride
+        # the block is padded to a whole vec4
+        self.size = _align(offset, 16)
+
+        self.data = numpy.zeros(self.size, dtype=numpy.uint8)
+        self.dirty_start = self.size
+        self.dirty_end = 0
+
+        self.buffer = GL.glGenBuffers(1)
+        GL_STATE.bindBuffer(GL.GL_UNIFORM_BUFFER, self.buffer)
+        GL.glBufferData(GL.GL_UNIFORM_BUFFER, self.size, None, GL.GL_STREAM_DRAW)
+        GL.glBindBufferRange(GL.GL_UNIFORM_BUFFER, self.binding, self.buffer, 0, self.size)
+
+    def attach(self, program):
+        """
+        Bind the block to this buffer's binding point in program.  Returns
+        False if the program doesn't declare the block.
+        """
+        index = GL.glGetUniformBlockIndex(program, self.name)
+        if index == GL.GL_INVALID_INDEX:
+            return False
+        GL.glUniformBlockBinding(program, index, self.binding)
+        return True
+
+    def set(self, field, value):
+        """
+        Set field to value: a Matrix, Vector, number or sequence with one
+        float per component.  Matrices are stored as they are laid out in
+        memory, one row per GLSL column, like glUniformMatrix4fv with
+        transpose GL_FALSE.
+        """
+        if hasattr(value, 'toarray'):
+            value = value.toarray()
+        value = numpy.asarray(value, dtype=numpy.float32).ravel()
+        offset, columns, components, stride = self.layout[field]
+        if len(value) != columns * components:
+            raise ValueError('%s.%s has %d floats, got %d' % (
+                    self.name, field, columns * components, len(value)))
+
+        current = self.data[offset:offset + columns * stride].view(numpy.float32)
+        current = current.reshape(columns, stride // 4)[:, :components]
+        value = value.reshape(columns, components)
+        if numpy.array_equal(current, value):
+            return
+        current[:] = value
+        # the padding after the last column never changes
+        self.dirty_start = min(self.dirty_start, offset)
+        self.dirty_end = max(self.dirty_end, offset + (columns - 1) * stride + 4 * components)
+
+    def upload(self):
+        if self.dirty_start >= self.dirty_end:
+            return
+        GL_STATE.bindBuffer(GL.GL_UNIFORM_BUFFER, self.buffer)
+        GL.glBufferSubData(
+                GL.GL_UNIFORM_BUFFER,
+                self.dirty_start,
+                self.dirty_end - self.dirty_start,
+                self.data[self.dirty_start:self.dirty_end])
+        self.dirty_start = self.size
+        self.dirty_end = 0
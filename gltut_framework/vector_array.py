@@ -0,0 +1,168 @@
+import numpy
+
+def _asarray(values):
+    return numpy.asarray(values, dtype=numpy.float32)
+
+class AbstractVectorArray(object):
+    """
+    N four component vectors stored as one (N,4) float32 array.
+
+    Behaves like a sequence of Vectors (or Points) with the same w
+    semantics, but does its arithmetic on every row at once.  Data with
+    only three columns gets the default w of the element type.
+    """
+    DEFAULT_W = 0.0
+
+    def __init__(self, count=0, data=None):
+        if data is not None:
+            data = _asarray(data)
+            data = data.reshape(-1, data.shape[-1]) if data.size else data.reshape(0, 4)
+            self._data = numpy.empty((len(data), 4), dtype=numpy.float32)
+            self._data[:, :data.shape[1]] = data
+            if data.shape[1] < 4:
+                self._data[:, 3] = self.DEFAULT_W
+        else:
+            self._data = numpy.zeros((count, 4), dtype=numpy.float32)
+            self._data[:, 3] = self.DEFAULT_W
+
+    @classmethod
+    def _wrap(cls, data):
+        result = cls.__new__(cls)
+        result._data = data
+        return result
+
+    @classmethod
+    def _element_type(cls):
+        raise NotImplementedError
+
+    def copy(self):
+        return type(self)._wrap(self._data.copy())
+
+    def tolist(self):
+        return self._data.tolist()
+
+    def toarray(self):
+        """
+        Return the underlying (N,4) float32 array (not a copy).
+        """
+        return self._data
+
+    def __array__(self, dtype=None):
+        if dtype is None:
+            return self._data
+        return self._data.astype(dtype)
+
+    @property
+    def x(self):
+        return self._data[:, 0]
+
+    @property
+    def y(self):
+        return self._data[:, 1]
+
+    @property
+    def z(self):
+        return self._data[:, 2]
+
+    @property
+    def w(self):
+        return self._data[:, 3]
+
+    def __len__(self):
+        return len(self._data)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, long, numpy.integer)):
+            return self._element_type()(*self._data[index].tolist())
+        return type(self)._wrap(self._data[index])
+
+    def __setitem__(self, index, value):
+        self._data[index] = _asarray(value)
+
+    def __iter__(self):
+        element_type = self._element_type()
+        for row in self._data.tolist():
+            yield element_type(*row)
+
+    def __add__(self, other):
+        return type(self)._wrap(self._data + _asarray(other))
+
+    def __iadd__(self, other):
+        self._data += _asarray(other)
+        return self
+
+    def __sub__(self, other):
+        return type(self)._wrap(self._data - _asarray(other))
+
+    def __isub__(self, other):
+        self._data -= _asarray(other)
+        return self
+
+    def _as_factor(self, other):
+        # a scalar, or one scale factor per row
+        other = _asarray(other)
+        if other.ndim == 1 and len(other) == len(self):
+            other = other[:, numpy.newaxis]
+        return other
+
+    def __mul__(self, other):
+        return type(self)._wrap(self._data * self._as_factor(other))
+
+    def __imul__(self, other):
+        self._data *= self._as_factor(other)
+        return self
+
+    def scale(self, factors):
+        self *= factors
+
+class VectorArray(AbstractVectorArray):
+    DEFAULT_W = 0.0
+
+    @classmethod
+    def _element_type(cls):
+        from . import Vector
+        return Vector
+
+    def dot(self, other):
+        return numpy.einsum('ij,ij->i', self._data, _asarray(other))
+
+    def length(self):
+        return numpy.sqrt(numpy.einsum('ij,ij->i', self._data, self._data))
+
+    def normalize(self):
+        self._data /= self.length()[:, numpy.newaxis]
+
+    def normal(self):
+        return VectorArray._wrap(self._data / self.length()[:, numpy.newaxis])
+
+    def cross(self, other):
+        data = numpy.zeros_like(self._data)
+        data[:, :3] = numpy.cross(self._data[:, :3], _asarray(other)[..., :3])
+        return VectorArray._wrap(data)
+
+    def __xor__(self, other):
+        return self.cross(other)
+
+    def __rxor__(self, other):
+        # other may be a single vector, so it can't become the VectorArray
+        data = numpy.zeros_like(self._data)
+        data[:, :3] = numpy.cross(_asarray(other)[..., :3], self._data[:, :3])
+        return VectorArray._wrap(data)
+
+class PointArray(AbstractVectorArray):
+    DEFAULT_W = 1.0
+
+    @classmethod
+    def _element_type(cls):
+        from . import Point
+        return Point
+
+    def __add__(self, other):
+        data = numpy.zeros_like(self._data)
+        data[:, :3] = self._data[:, :3] + _asarray(other)[..., :3]
+        return VectorArray._wrap(data)
+
+    def __sub__(self, other):
+        data = numpy.zeros_like(self._data)
+        data[:, :3] = self._data[:, :3] - _asarray(other)[..., :3]
+        return VectorArray._wrap(data)
@@ -0,0 +1,139 @@
+import numpy
+from OpenGL import GL
+from buffers import as_buffer
+
+_DTYPES = {
+        GL.GL_BYTE: numpy.int8,
+        GL.GL_UNSIGNED_BYTE: numpy.uint8,
+        GL.GL_SHORT: numpy.int16,
+        GL.GL_UNSIGNED_SHORT: numpy.uint16,
+        GL.GL_INT: numpy.int32,
+        GL.GL_UNSIGNED_INT: numpy.uint32,
+        GL.GL_HALF_FLOAT: numpy.float16,
+        GL.GL_FLOAT: numpy.float32,
+        }
+
+class VertexAttribute(object):
+    """
+    One vertex attribute: the shader location it feeds, its number of
+    components, their GL type and whether integer types are normalized to
+    [0,1] / [-1,1] when read.
+    """
+    __slots__ = ('location', 'size', 'type', 'normalized')
+
+    def __init__(self, location, size, type=GL.GL_FLOAT, normalized=False):
+        self.location = location
+        self.size = size
+        self.type = type
+        self.normalized = normalized
+
+    @property
+    def dtype(self):
+        return numpy.dtype(_DTYPES[self.type])
+
+    @property
+    def nbytes(self):
+        return self.size * self.dtype.itemsize
+
+class VertexLayout(object):
+    """
+    How the attributes of a vertex buffer are laid out.
+
+    Interleaved layouts store each vertex's attributes next to each other
+    (position, color, position, color, ...), which keeps everything a
+    vertex needs in the same cache line.  Planar layouts store one block
+    per attribute (all positions, then all colors), like the tutorials'
+    hand-written colorDataOffset setups.
+    """
+    def __init__(self, attributes, interleaved=True):
+        self.attributes = tuple(attributes)
+        self.interleaved = interleaved
+        self.vertex_size = sum(attribute.nbytes for attribute in self.attributes)
+        self.key = (interleaved, tuple(
+                (attribute.location, attribute.size, attribute.type, bool(attribute.normalized))
+                for attribute in self.attributes))
+
+    def __eq__(self, other):
+        return isinstance(other, VertexLayout) and self.key == other.key
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def _offsets(self, vertex_count):
+        # byte offset of each attribute's first component
+        offset = 0
+        for attribute in self.attributes:
+            yield attribute, offset
+            offset += attribute.nbytes if self.interleaved else attribute.nbytes * vertex_count
+
+    def vertex_count(self, vertices):
+        return vertices.nbytes // self.vertex_size
+
+    def as_vertex_data(self, vertices):
+        """
+        Return vertices as an array ready for upload.  Layouts made only of
+        GL_FLOAT attributes accept flat float sequences; others expect data
+        already laid out in bytes, e.g. from pack().
+        """
+        if all(attribute.type == GL.GL_FLOAT for attribute in self.attributes):
+            return as_buffer(vertices, numpy.float32)
+        if isinstance(vertices, numpy.ndarray):
+            return numpy.ascontiguousarray(vertices).reshape(-1).view(numpy.uint8)
+        return as_buffer(vertices, numpy.uint8)
+
+    def pack(self, *columns):
+        """
+        Lay out one array per attribute, in the layout's attribute order,
+        as a byte array for this layout.
+        """
+        columns = [
+                numpy.asarray(column, dtype=attribute.dtype).reshape(-1, attribute.size)
+                for attribute, column in zip(self.attributes, columns)]
+        vertex_count = len(columns[0])
+        if not self.interleaved:
+            return numpy.concatenate([column.reshape(-1).view(numpy.uint8) for column in columns])
+
+        result = numpy.empty((vertex_count, self.vertex_size), dtype=numpy.uint8)
+        for (attribute, offset), column in zip(self._offsets(vertex_count), columns):
+            result[:, offset:offset + attribute.nbytes] = column.view(numpy.uint8)
+        return result.reshape(-1)
+
+    def unpack(self, vertices, location):
+        """
+        Return a copy of the attribute at location as an (N, size) array.
+        """
+        data = numpy.ascontiguousarray(vertices).reshape(-1).view(numpy.uint8)
+        vertex_count = len(data) // self.vertex_size
+        for attribute, offset in self._offsets(vertex_count):
+            if attribute.location != location:
+                continue
+            if self.interleaved:
+                block = data.reshape(vertex_count, self.vertex_size)[:, offset:offset + attribute.nbytes]
+            else:
+                block = data[offset:offset + attribute.nbytes * vertex_count].reshape(vertex_count, -1)
+            return numpy.ascontiguousarray(block).view(attribute.dtype)
+        raise KeyError('no attribute at location %d' % location)
+
+    def setup(self, vertex_count):
+        """
+        Enable and point every attribute at the buffer bound to
+        GL_ARRAY_BUFFER.  Call with the vao to set up bound.
+        """
+        stride = self.vertex_size if self.interleaved else 0
+        for attribute, offset in self._offsets(vertex_count):
+            GL.glEnableVertexAttribArray(attribute.location)
+            GL.glVertexAttribPointer(
+                    attribute.location,
+                    attribute.size,
+                    attribute.type,
+                    GL.GL_TRUE if attribute.normalized else GL.GL_FALSE,
+                    stride,
+                    GL.GLvoidp(offset) if offset else None)
+
+# location of the position attribute in every tutorial shader
+POSITION_LOCATION = 0
+
+POSITION_LAYOUT = VertexLayout([VertexAttribute(POSITION_LOCATION, 3)])
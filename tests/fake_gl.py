@@ -0,0 +1,40 @@
+"""
+Stand-in for OpenGL.GL that records calls instead of making them, so GL
+code can be tested without a context.  Constants and types (GL_*, GLfloat,
+...) come from the real module.  Assign an instance to a module's GL (see
+patch_gl()) and read back the calls it received.
+"""
+from OpenGL import GL
+
+class FakeGL(object):
+    def __init__(self):
+        self.calls = []
+        self._names = 0
+
+    def __getattr__(self, name):
+        if name.startswith('GL'):
+            return getattr(GL, name)
+        def call(*args):
+            self.calls.append((name,) + args)
+            if name in ('glGenBuffers', 'glGenVertexArrays'):
+                self._names += 1
+                return self._names
+        return call
+
+    def named(self, name):
+        # the argument tuples of every call to name
+        return [call[1:] for call in self.calls if call[0] == name]
+
+    def clear(self):
+        del self.calls[:]
+
+def patch_gl(test, *modules):
+    """
+    Replace GL in each of modules with a new FakeGL until test ends, and
+    return it.
+    """
+    fake = FakeGL()
+    for module in modules:
+        test.addCleanup(setattr, module, 'GL', module.GL)
+        module.GL = fake
+    return fake
@@ -0,0 +1,88 @@
+import os
+import sys
+import unittest
+import numpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from OpenGL import GL
+from gltut_framework import GLState, Matrix, gl_state
+from fake_gl import patch_gl
+
+class GLStateTest(unittest.TestCase):
+    def setUp(self):
+        self.gl = patch_gl(self, gl_state)
+        self.state = GLState()
+
+    def test_repeated_use_program_is_dropped(self):
+        self.state.useProgram(3)
+        self.state.useProgram(3)
+        self.state.useProgram(4)
+        self.state.useProgram(4)
+        self.assertEqual(self.gl.named('glUseProgram'), [(3,), (4,)])
+        self.assertEqual((self.state.calls_issued, self.state.calls_skipped), (2, 2))
+
+    def test_repeated_bind_buffer_is_dropped_per_target(self):
+        self.state.bindBuffer(GL.GL_ARRAY_BUFFER, 5)
+        self.state.bindBuffer(GL.GL_ARRAY_BUFFER, 5)
+        self.state.bindBuffer(GL.GL_UNIFORM_BUFFER, 5)
+        self.assertEqual(self.gl.named('glBindBuffer'), [(GL.GL_ARRAY_BUFFER, 5), (GL.GL_UNIFORM_BUFFER, 5)])
+
+    def test_binding_a_vertex_array_forgets_the_element_buffer(self):
+        self.state.bindVertexArray(1)
+        self.state.bindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, 7)
+        self.state.bindVertexArray(2)
+        self.state.bindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, 7)
+        self.assertEqual(len(self.gl.named('glBindBuffer')), 2)
+
+    def test_repeated_enable_and_disable_are_dropped(self):
+        self.state.enable(GL.GL_DEPTH_TEST)
+        self.state.enable(GL.GL_DEPTH_TEST)
+        self.state.disable(GL.GL_DEPTH_TEST)
+        self.state.disable(GL.GL_DEPTH_TEST)
+        self.assertEqual(self.gl.named('glEnable'), [(GL.GL_DEPTH_TEST,)])
+        self.assertEqual(self.gl.named('glDisable'), [(GL.GL_DEPTH_TEST,)])
+        self.assertEqual(self.state.isEnabled(GL.GL_DEPTH_TEST), False)
+
+    def test_repeated_uniform_is_dropped(self):
+        self.state.useProgram(1)
+        self.state.uniform(10, (1.0, 2.0, 3.0))
+        self.state.uniform(10, (1.0, 2.0, 3.0))
+        self.state.uniform3f(10, 1.0, 2.0, 3.0)
+        self.state.uniform(10, (1.0, 2.0, 4.0))
+        self.assertEqual(self.gl.named('glUniform3f'), [(10, 1.0, 2.0, 3.0), (10, 1.0, 2.0, 4.0)])
+
+        matrix = Matrix()
+        matrix[3, 0] = 2.0
+        self.state.uniformMatrix4fv(11, matrix)
+        self.state.uniformMatrix4fv(11, matrix.copy())
+        self.state.uniform(11, matrix.toarray())
+        uploads = self.gl.named('glUniformMatrix4fv')
+        self.assertEqual(len(uploads), 1)
+        self.assertEqual(uploads[0][:3], (11, 1, GL.GL_FALSE))
+        self.assertTrue(numpy.array_equal(uploads[0][3], matrix.toarray()))
+
+    def test_uniforms_are_cached_per_program(self):
+        self.state.useProgram(1)
+        self.state.uniform1f(10, 0.5)
+        self.state.useProgram(2)
+        # same location and value, but another program's uniform
+        self.state.uniform1f(10, 0.5)
+        self.state.useProgram(1)
+        # program 1 still holds 0.5
+        self.state.uniform1f(10, 0.5)
+        self.assertEqual(self.gl.named('glUniform1f'), [(10, 0.5), (10, 0.5)])
+
+    def test_invalidate_forgets_everything(self):
+        self.state.useProgram(1)
+        self.state.enable(GL.GL_CULL_FACE)
+        self.state.uniform1f(10, 0.5)
+        self.state.invalidate()
+        self.state.useProgram(1)
+        self.state.enable(GL.GL_CULL_FACE)
+        self.state.uniform1f(10, 0.5)
+        self.assertEqual(len(self.gl.named('glUseProgram')), 2)
+        self.assertEqual(len(self.gl.named('glEnable')), 2)
+        self.assertEqual(len(self.gl.named('glUniform1f')), 2)
+
+if __name__ == '__main__':
+    unittest.main()
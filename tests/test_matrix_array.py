@@ -0,0 +1,95 @@
+import os
+import sys
+import unittest
+import numpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gltut_framework import MatrixArray, MatrixStack, Matrix, Vector
+
+COUNT = 12
+
+class MatrixArrayTest(unittest.TestCase):
+    def setUp(self):
+        random = numpy.random.RandomState(0)
+        self.angles = random.uniform(-180.0, 180.0, (3, COUNT))
+        self.offsets = random.uniform(-10.0, 10.0, (COUNT, 3))
+        self.scales = random.uniform(0.5, 2.0, (COUNT, 3))
+
+    def assertMatches(self, array, matrices):
+        # array's matrices against a list of scalar results, one per matrix
+        self.assertEqual(len(array), len(matrices))
+        for index, matrix in enumerate(matrices):
+            self.assertIs(type(array[index]), Matrix)
+            self.assertTrue(numpy.allclose(array[index].toarray(), matrix.toarray(), rtol=1e-5, atol=1e-4),
+                    (index, array[index].tolist(), matrix.tolist()))
+
+    def stacks(self):
+        return [MatrixStack() for _ in xrange(COUNT)]
+
+    def test_starts_as_identity(self):
+        self.assertMatches(MatrixArray(COUNT), [Matrix()] * COUNT)
+        data = numpy.arange(32, dtype=numpy.float32)
+        self.assertEqual(MatrixArray(data=data)[1].tolist(), data[16:].reshape(4, 4).tolist())
+
+    def test_transforms_match_matrix_stack(self):
+        # each step with one value per matrix, then one shared value
+        steps = (
+                ('translate', self.offsets, lambda offset: Vector(*offset)),
+                ('rotateX', self.angles[0], float),
+                ('scale', self.scales, lambda scale: Vector(*scale)),
+                ('rotateY', self.angles[1], float),
+                ('translate', self.offsets[::-1], lambda offset: Vector(*offset)),
+                ('rotateZ', self.angles[2], float),
+                )
+        array = MatrixArray(COUNT)
+        stacks = self.stacks()
+        for method, values, convert in steps:
+            getattr(array, method)(values)
+            for stack, value in zip(stacks, values):
+                getattr(stack, method)(convert(value))
+            self.assertMatches(array, [stack.top() for stack in stacks])
+
+        for method, value in (('rotateY', 30.0), ('translate', (1.0, 2.0, 3.0)), ('scale', (2.0, 2.0, 2.0))):
+            getattr(array, method)(value)
+            for stack in stacks:
+                getattr(stack, method)(value)
+            self.assertMatches(array, [stack.top() for stack in stacks])
+
+    def test_rotations_then_translation(self):
+        # translate() moves along the already rotated axes
+        array = MatrixArray(COUNT)
+        array.rotateY(self.angles[0])
+        array.rotateX(self.angles[1])
+        array.translate((0.0, 0.0, 5.0))
+        stacks = self.stacks()
+        for stack, angleY, angleX in zip(stacks, self.angles[0], self.angles[1]):
+            stack.rotateY(angleY)
+            stack.rotateX(angleX)
+            stack.translate(Vector(0.0, 0.0, 5.0))
+        self.assertMatches(array, [stack.top() for stack in stacks])
+
+    def test_multiply_matches_matrix(self):
+        left = MatrixArray(COUNT)
+        left.rotateZ(self.angles[0])
+        left.translate(self.offsets)
+        right = MatrixArray(COUNT)
+        right.scale(self.scales)
+        right.rotateX(self.angles[1])
+
+        expected = [left[index] * right[index] for index in xrange(COUNT)]
+        self.assertMatches(left * right, expected)
+        left *= right
+        self.assertMatches(left, expected)
+
+    def test_transpose_and_slices(self):
+        array = MatrixArray(COUNT)
+        array.rotateX(self.angles[0])
+        array.translate(self.offsets)
+        self.assertMatches(array.transpose(), [array[index].transpose() for index in xrange(COUNT)])
+
+        part = array[2:5]
+        self.assertIs(type(part), MatrixArray)
+        self.assertMatches(part, [array[index] for index in xrange(2, 5)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,28 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gltut_framework import MatrixStack, Vector
+
+class MatrixStackTest(unittest.TestCase):
+    def test_with_block_restores_matrix(self):
+        stack = MatrixStack()
+        stack.translate(Vector(1.0, 2.0, 3.0))
+        expected = stack.top().tolist()
+        with stack:
+            stack.scale(Vector(2.0, 2.0, 2.0))
+        self.assertEqual(stack.top().tolist(), expected)
+
+    def test_pop_from_empty_stack_raises(self):
+        stack = MatrixStack()
+        self.assertRaises(IndexError, stack.pop)
+
+    def test_unbalanced_pop_raises(self):
+        stack = MatrixStack()
+        stack.push()
+        stack.pop()
+        self.assertRaises(IndexError, stack.pop)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import sys
+import unittest
+import numpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from OpenGL import GL
+from gltut_framework import Mesh, MatrixArray, GL_STATE, mesh, buffers, vertex_layout, gl_state
+from fake_gl import patch_gl
+
+class InstancedMeshTest(unittest.TestCase):
+    def setUp(self):
+        self.gl = patch_gl(self, mesh, buffers, vertex_layout, gl_state)
+        GL_STATE.invalidate()
+        self.addCleanup(GL_STATE.invalidate)
+        self.mesh = Mesh([0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0, 0.0], [0, 1, 2], GL.GL_TRIANGLES)
+        self.mesh.bind()
+        self.gl.clear()
+
+    def test_instance_data_is_packed_20_floats_per_instance(self):
+        matrices = numpy.arange(3 * 16, dtype=numpy.float32).reshape(3, 4, 4)
+        colors = numpy.array([[1.0, 0.0, 0.0, 1.0], [0.0, 1.0, 0.0, 1.0], [0.0, 0.0, 1.0, 0.5]])
+        self.mesh.draw_instanced(matrices, colors)
+
+        (target, size, data, usage), = self.gl.named('glBufferData')
+        self.assertEqual((target, usage), (GL.GL_ARRAY_BUFFER, GL.GL_STREAM_DRAW))
+        self.assertEqual(data.shape, (3, 20))
+        self.assertEqual(size, 3 * 20 * 4)
+        self.assertTrue(numpy.array_equal(data[:, :16], matrices.reshape(3, 16)))
+        self.assertTrue(numpy.array_equal(data[:, 16:], colors))
+        self.assertEqual(self.gl.named('glDrawElementsInstanced'),
+                [(GL.GL_TRIANGLES, 3, GL.GL_UNSIGNED_BYTE, None, 3)])
+
+    def test_one_color_for_every_instance(self):
+        matrices = MatrixArray(2)
+        self.mesh.draw_instanced(matrices, (0.5, 0.5, 0.5, 1.0))
+        data = self.gl.named('glBufferData')[0][2]
+        self.assertTrue(numpy.array_equal(data[:, :16], numpy.tile(numpy.eye(4).ravel(), (2, 1))))
+        self.assertTrue(numpy.array_equal(data[:, 16:], [[0.5, 0.5, 0.5, 1.0]] * 2))
+
+    def test_instance_attributes(self):
+        self.mesh.draw_instanced(MatrixArray(1), (1.0, 1.0, 1.0, 1.0))
+        self.assertEqual(self.gl.named('glEnableVertexAttribArray'), [(2,), (3,), (4,), (5,), (6,)])
+        self.assertEqual(self.gl.named('glVertexAttribDivisor'), [(2, 1), (3, 1), (4, 1), (5, 1), (6, 1)])
+        pointers = self.gl.named('glVertexAttribPointer')
+        self.assertEqual([pointer[:5] for pointer in pointers],
+                [(location, 4, GL.GL_FLOAT, GL.GL_FALSE, 20 * 4) for location in xrange(2, 7)])
+        self.assertEqual([pointer[5].value or 0 for pointer in pointers], [0, 16, 32, 48, 64])
+
+        # the attributes are set up once, later draws only upload and draw
+        self.gl.clear()
+        self.mesh.draw_instanced(MatrixArray(4), (1.0, 1.0, 1.0, 1.0))
+        self.assertEqual(self.gl.named('glVertexAttribPointer'), [])
+        self.assertEqual(len(self.gl.named('glBufferData')), 1)
+
+    def test_no_instances_draws_nothing(self):
+        self.mesh.draw_instanced(numpy.empty((0, 4, 4)), (1.0, 1.0, 1.0, 1.0))
+        self.assertEqual(self.gl.calls, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import sys
+import unittest
+import numpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gltut_framework import meshopt
+
+def unit_cube():
+    # 4 vertices and 2 triangles per face, as the tutorials' cubes are laid out
+    vertices = []
+    indices = []
+    for axis in xrange(3):
+        u, v = (axis + 1) % 3, (axis + 2) % 3
+        for side in (0.0, 1.0):
+            base = len(vertices)
+            for corner in ((0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0)):
+                vertex = [0.0, 0.0, 0.0]
+                vertex[axis] = side
+                vertex[u], vertex[v] = corner
+                vertices.append(vertex)
+            indices += [base, base + 1, base + 2, base + 2, base + 3, base]
+    return numpy.array(vertices), numpy.array(indices)
+
+def grid(size, seed=0):
+    # size x size quads with the triangles in random order
+    x, z = numpy.meshgrid(numpy.arange(size + 1), numpy.arange(size + 1))
+    vertices = numpy.column_stack([x.ravel(), numpy.zeros(x.size), z.ravel()]).astype(numpy.float64)
+    corner = (numpy.arange(size)[:, numpy.newaxis] * (size + 1) + numpy.arange(size)).ravel()
+    triangles = numpy.concatenate([
+            numpy.column_stack([corner, corner + size + 1, corner + 1]),
+            numpy.column_stack([corner + 1, corner + size + 1, corner + size + 2])])
+    numpy.random.RandomState(seed).shuffle(triangles)
+    return vertices, triangles.ravel()
+
+def triangle_set(vertices, indices):
+    # each triangle as its corner positions, rotated to start at the
+    # smallest so that equal triangles with the same winding compare equal
+    result = []
+    for triangle in numpy.asarray(indices).reshape(-1, 3):
+        corners = [tuple(vertices[index].tolist()) for index in triangle]
+        first = corners.index(min(corners))
+        result.append(tuple(corners[first:] + corners[:first]))
+    return sorted(result)
+
+class MeshOptTest(unittest.TestCase):
+    def test_weld_unit_cube(self):
+        vertices, indices = unit_cube()
+        self.assertEqual(len(vertices), 24)
+        welded, welded_indices, remap = meshopt.weld(vertices, indices)
+        self.assertEqual(len(welded), 8)
+        self.assertEqual(len(remap), 24)
+        self.assertTrue(numpy.array_equal(welded[remap], vertices))
+        self.assertEqual(triangle_set(welded, welded_indices), triangle_set(vertices, indices))
+
+    def test_weld_tolerance(self):
+        vertices = numpy.array([[0.0, 0.0], [1.0, 0.0], [1.0 + 1e-9, 0.0], [1.1, 0.0]])
+        welded, indices, remap = meshopt.weld(vertices, [0, 1, 2, 0, 2, 3])
+        self.assertEqual(remap.tolist(), [0, 1, 1, 2])
+        self.assertEqual(indices.tolist(), [0, 1, 1, 0, 1, 2])
+        self.assertEqual(len(meshopt.weld(vertices, [0, 1, 3], tolerance=0.5)[0]), 2)
+
+    def test_remove_degenerate(self):
+        indices = [0, 1, 2, 0, 0, 1, 3, 4, 5, 2, 1, 2, 6, 6, 6]
+        self.assertEqual(meshopt.remove_degenerate(indices).tolist(), [0, 1, 2, 3, 4, 5])
+        self.assertRaises(ValueError, meshopt.remove_degenerate, [0, 1])
+
+    def test_reorder_vertices(self):
+        order, indices = meshopt.reorder_vertices(6, [4, 2, 0, 0, 2, 5])
+        self.assertEqual(order.tolist(), [4, 2, 0, 5, 1, 3])
+        self.assertEqual(indices.tolist(), [0, 1, 2, 2, 1, 3])
+
+    def test_acmr(self):
+        self.assertEqual(meshopt.acmr([]), 0.0)
+        # two triangles sharing an edge: 4 vertices for 2 triangles
+        self.assertEqual(meshopt.acmr([0, 1, 2, 2, 1, 3]), 2.0)
+        # with a cache of 3 vertex 0 has been pushed out again
+        self.assertEqual(meshopt.acmr([0, 1, 2, 3, 4, 5, 0, 1, 2], cache_size=3), 3.0)
+        self.assertEqual(meshopt.acmr([0, 1, 2, 3, 4, 5, 0, 1, 2], cache_size=6), 2.0)
+
+    def test_reorder_triangles_keeps_triangles(self):
+        vertices, indices = grid(8)
+        reordered = meshopt.reorder_triangles(indices)
+        self.assertEqual(triangle_set(vertices, reordered), triangle_set(vertices, indices))
+        self.assertLess(meshopt.acmr(reordered), meshopt.acmr(indices))
+
+    def test_optimize(self):
+        for vertices, indices in (unit_cube(), grid(12)):
+            optimized, optimized_indices, report = meshopt.optimize(vertices, indices)
+            self.assertEqual(triangle_set(optimized, optimized_indices), triangle_set(vertices, indices))
+            self.assertLessEqual(report.acmr_after, report.acmr_before)
+            self.assertEqual(report.acmr_after, meshopt.acmr(optimized_indices))
+            self.assertEqual(report.vertices_after, len(optimized))
+            self.assertEqual(report.triangles_after, report.triangles_before)
+            # vertices are stored in the order they are first used
+            used = optimized_indices[numpy.sort(numpy.unique(optimized_indices, return_index=True)[1])]
+            self.assertEqual(used.tolist(), range(len(optimized)))
+
+        # a grid shares each vertex between up to 6 triangles
+        self.assertLess(report.acmr_after, 1.0)
+
+    def test_optimize_drops_degenerate_triangles(self):
+        vertices, indices = unit_cube()
+        # a sliver whose corners weld into one vertex
+        vertices = numpy.vstack([vertices, [[0.0, 0.0, 0.0], [0.0, 0.0, 1e-9], [1e-9, 0.0, 0.0]]])
+        indices = numpy.concatenate([indices, [24, 25, 26]])
+        optimized, optimized_indices, report = meshopt.optimize(vertices, indices)
+        self.assertEqual((report.triangles_before, report.triangles_after), (13, 12))
+        self.assertEqual(len(optimized), 8)
+        self.assertEqual(triangle_set(optimized, optimized_indices), triangle_set(*unit_cube()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from OpenGL import GL
+from gltut_framework import RenderQueue, GL_STATE, gl_state
+from fake_gl import patch_gl
+
+class FakeMesh(object):
+    def __init__(self, name, log):
+        self.name = name
+        self.log = log
+
+    def bind(self):
+        self.log.append(('bind', self.name))
+
+    def draw(self):
+        self.log.append(('draw', self.name))
+
+    def draw_instanced(self, matrices, colors):
+        self.log.append(('draw_instanced', self.name, len(matrices)))
+
+class RenderQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.gl = patch_gl(self, gl_state)
+        GL_STATE.invalidate()
+        self.addCleanup(GL_STATE.invalidate)
+        self.log = []
+        self.queue = RenderQueue()
+        self.cube = FakeMesh('cube', self.log)
+        self.plane = FakeMesh('plane', self.log)
+
+    def draws(self):
+        return [entry[1] for entry in self.log if entry[0].startswith('draw')]
+
+    def test_items_are_sorted_by_program_mesh_and_material(self):
+        red = {20: (1.0, 0.0, 0.0, 1.0)}
+        blue = {20: (0.0, 0.0, 1.0, 1.0)}
+        self.queue.add(1, self.cube, material=red)
+        self.queue.add(2, self.plane)
+        self.queue.add(1, self.plane, material=red)
+        self.queue.add(1, self.cube, material=blue)
+        self.queue.add(1, self.cube, material=red)
+        self.queue.flush()
+
+        self.assertEqual(self.draws(), ['cube', 'cube', 'cube', 'plane', 'plane'])
+        self.assertEqual(self.gl.named('glUseProgram'), [(1,), (2,)])
+        # the plane's VAO stays bound across the program change
+        self.assertEqual([entry for entry in self.log if entry[0] == 'bind'],
+                [('bind', 'cube'), ('bind', 'plane')])
+        # red once for both red cubes, then blue, then red for the plane
+        self.assertEqual(len(self.gl.named('glUniform4f')), 3)
+        self.assertEqual(self.queue.material_changes, 3)
+        self.assertEqual(len(self.queue), 0)
+
+    def test_changes_avoided(self):
+        for _ in xrange(4):
+            self.queue.add(1, self.cube, material={20: 0.5})
+        self.queue.add(1, self.plane, material={20: 0.5})
+        self.queue.flush()
+        self.assertEqual((self.queue.program_changes, self.queue.mesh_changes, self.queue.material_changes), (1, 2, 1))
+        self.assertEqual(self.queue.changes_avoided, 3 * 5 - 4)
+
+        # counters describe only the last frame
+        self.queue.add(1, self.cube)
+        self.queue.flush()
+        self.assertEqual((self.queue.program_changes, self.queue.mesh_changes, self.queue.material_changes), (1, 1, 0))
+        self.assertEqual(self.queue.changes_avoided, 1)
+
+    def test_state_changes_draw_last_and_are_grouped(self):
+        noDepth = {GL.GL_DEPTH_TEST: False}
+        self.queue.add(1, self.plane, state=noDepth)
+        self.queue.add(2, self.cube)
+        self.queue.add(1, self.cube, state=noDepth)
+        self.queue.add(1, self.cube)
+        self.queue.flush()
+
+        self.assertEqual(self.draws(), ['cube', 'cube', 'plane', 'cube'])
+        self.assertEqual(self.gl.named('glDisable'), [(GL.GL_DEPTH_TEST,)])
+        self.assertEqual(self.queue.state_changes, 2)
+
+    def test_state_is_restored_to_the_prior_value(self):
+        GL_STATE.disable(GL.GL_BLEND)
+        GL_STATE.enable(GL.GL_CULL_FACE)
+        self.gl.clear()
+        # blending is already off, so asking for it off changes nothing
+        self.queue.add(1, self.cube, state={GL.GL_BLEND: False, GL.GL_CULL_FACE: False})
+        self.queue.add(1, self.plane, state={GL.GL_CULL_FACE: True})
+        self.queue.flush()
+
+        self.assertEqual(self.gl.named('glDisable'), [(GL.GL_CULL_FACE,)])
+        self.assertEqual(self.gl.named('glEnable'), [(GL.GL_CULL_FACE,)])
+        self.assertEqual(GL_STATE.isEnabled(GL.GL_BLEND), False)
+        self.assertEqual(GL_STATE.isEnabled(GL.GL_CULL_FACE), True)
+
+    def test_ids_must_fit_in_sixteen_bits(self):
+        for program in xrange(0x10000):
+            self.queue.add(program, self.cube)
+        self.assertRaises(ValueError, self.queue.add, 0x10000, self.cube)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import sys
+import unittest
+import numpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gltut_framework import UniformGrid, LooseQuadtree, MatrixStack, Point, Vector, lookAt, frustum_planes, boxes_in_frustum
+
+def random_boxes(count, size_range, seed=0):
+    random = numpy.random.RandomState(seed)
+    centers = random.uniform(-100.0, 100.0, (count, 3)).astype(numpy.float32)
+    centers[:, 1] = random.uniform(0.0, 10.0, count)
+    extents = random.uniform(size_range[0], size_range[1], (count, 3)).astype(numpy.float32)
+    return centers - extents / 2.0, centers + extents / 2.0
+
+def brute_box(mins, maxs, lower, upper):
+    return set(numpy.flatnonzero(((mins <= upper) & (maxs >= lower)).all(axis=1)).tolist())
+
+def brute_radius(mins, maxs, center, radius):
+    closest = numpy.clip(numpy.asarray(center, dtype=numpy.float32), mins, maxs)
+    return set(numpy.flatnonzero(((closest - center) ** 2).sum(axis=1) <= radius * radius).tolist())
+
+def ray_distance(lower, upper, origin, direction):
+    # distance along the ray to the box, None if it misses
+    tnear, tfar = -numpy.inf, numpy.inf
+    for axis in xrange(3):
+        if direction[axis] == 0.0:
+            if not lower[axis] <= origin[axis] <= upper[axis]:
+                return None
+            continue
+        t1 = (lower[axis] - origin[axis]) / direction[axis]
+        t2 = (upper[axis] - origin[axis]) / direction[axis]
+        tnear = max(tnear, min(t1, t2))
+        tfar = min(tfar, max(t1, t2))
+    if tnear <= tfar and tfar >= 0.0:
+        return max(tnear, 0.0)
+    return None
+
+def brute_ray(mins, maxs, origin, direction):
+    hits = [ray_distance(mins[id], maxs[id], origin, direction) for id in xrange(len(mins))]
+    return set(id for id, distance in enumerate(hits) if distance is not None)
+
+def camera_planes(eye, target):
+    persMatrix = MatrixStack()
+    persMatrix.perspective(45.0, 1.0, 1.0, 150.0)
+    return frustum_planes(lookAt(Point(*eye), Point(*target), Vector(0.0, 1.0, 0.0)) * persMatrix.top())
+
+class SpatialIndexTest(unittest.TestCase):
+    def indices(self, mins, maxs):
+        return (UniformGrid.from_bounds(mins, maxs, 10.0), LooseQuadtree.from_bounds(mins, maxs))
+
+    def check_queries(self, mins, maxs, index, alive=None):
+        if alive is None:
+            alive = set(xrange(len(mins)))
+        queries = (
+                ((-20.0, -1.0, -30.0), (15.0, 5.0, 40.0)),
+                ((-1000.0, -1000.0, -1000.0), (1000.0, 1000.0, 1000.0)),
+                ((500.0, 0.0, 500.0), (600.0, 1.0, 600.0)))
+        for lower, upper in queries:
+            expected = brute_box(mins, maxs, lower, upper) & alive
+            self.assertEqual(set(index.query_box(lower, upper).tolist()), expected)
+
+        for center, radius in (((0.0, 0.0, 0.0), 25.0), ((90.0, 5.0, -90.0), 40.0), ((0.0, 0.0, 0.0), 1000.0)):
+            expected = brute_radius(mins, maxs, center, radius) & alive
+            self.assertEqual(set(index.query_radius(center, radius).tolist()), expected)
+
+        for eye, target in (((0.0, 20.0, 150.0), (0.0, 0.0, 0.0)), ((-120.0, 5.0, 0.0), (0.0, 5.0, 10.0))):
+            planes = camera_planes(eye, target)
+            expected = set(numpy.flatnonzero(boxes_in_frustum(planes, mins, maxs)).tolist()) & alive
+            self.assertEqual(set(index.query_frustum(planes).tolist()), expected)
+
+        for origin, direction in (((-150.0, 5.0, 3.0), (1.0, 0.0, 0.0)), ((0.0, 50.0, 0.0), (0.3, -1.0, 0.2))):
+            origin = numpy.array(origin)
+            direction = numpy.array(direction)
+            expected = brute_ray(mins, maxs, origin, direction) & alive
+            found = index.query_ray(origin, direction).tolist()
+            self.assertEqual(set(found), expected)
+            self.assertEqual(len(found), len(expected))
+            distances = [ray_distance(mins[id], maxs[id], origin, direction) for id in found]
+            self.assertEqual(distances, sorted(distances))
+
+    def test_mixed_sizes_match_brute_force(self):
+        mins, maxs = random_boxes(500, (0.1, 30.0))
+        for index in self.indices(mins, maxs):
+            self.check_queries(mins, maxs, index)
+
+    def test_uniform_sizes_match_brute_force(self):
+        # every object lands on the same quadtree level
+        mins, maxs = random_boxes(500, (2.0, 2.0))
+        for index in self.indices(mins, maxs):
+            self.check_queries(mins, maxs, index)
+
+    def test_single_object(self):
+        mins = numpy.array([[0.0, 0.0, 0.0]], dtype=numpy.float32)
+        maxs = numpy.array([[10.0, 1.0, 10.0]], dtype=numpy.float32)
+        for index in self.indices(mins, maxs):
+            self.assertEqual(index.query_box((5.0, 0.0, 5.0), (6.0, 1.0, 6.0)).tolist(), [0])
+            self.assertEqual(index.query_box((20.0, 0.0, 20.0), (30.0, 1.0, 30.0)).tolist(), [])
+            self.check_queries(mins, maxs, index)
+
+    def test_outside_root_and_removed_objects(self):
+        mins, maxs = random_boxes(300, (0.1, 10.0))
+        for index in self.indices(mins, maxs):
+            # objects added later outside the bounds the index was built on
+            far_mins = numpy.array([[300.0, 0.0, 300.0], [-400.0, 0.0, 0.0]], dtype=numpy.float32)
+            index.insert_many(far_mins, far_mins + 5.0)
+            for id in (0, 7, 150, 300):
+                index.remove(id)
+            alive = set(xrange(302)) - set([0, 7, 150, 300])
+            self.assertEqual(len(index), len(alive))
+            self.check_queries(
+                    numpy.concatenate([mins, far_mins]),
+                    numpy.concatenate([maxs, far_mins + 5.0]),
+                    index, alive)
+
+if __name__ == '__main__':
+    unittest.main()
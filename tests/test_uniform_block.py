@@ -0,0 +1,100 @@
+import os
+import sys
+import unittest
+import numpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from OpenGL import GL
+from gltut_framework import UniformBlock, Matrix, GL_STATE, uniform_block, gl_state
+from fake_gl import patch_gl
+
+class UniformBlockTest(unittest.TestCase):
+    def setUp(self):
+        self.gl = patch_gl(self, uniform_block, gl_state)
+        GL_STATE.invalidate()
+        self.addCleanup(GL_STATE.invalidate)
+
+    def offsets(self, block):
+        return dict((field, layout[0]) for field, layout in block.layout.items())
+
+    def test_std140_offsets(self):
+        block = UniformBlock('Block', 0, [
+                ('scale', 'float'),
+                ('clip', 'mat4'),
+                ('lightDirection', 'vec3'),
+                ('intensity', 'float'),
+                ('offset', 'vec2'),
+                ('weights', 'float[3]'),
+                ('colors', 'vec3[2]'),
+                ('normalMatrix', 'mat3'),
+                ('last', 'float')])
+        self.assertEqual(self.offsets(block), {
+                'scale': 0,
+                'clip': 16,
+                'lightDirection': 80,
+                # packed into the vec3's fourth float
+                'intensity': 92,
+                'offset': 96,
+                # array elements are padded to a vec4 each
+                'weights': 112,
+                'colors': 160,
+                'normalMatrix': 192,
+                'last': 240})
+        self.assertEqual(block.size, 256)
+        self.assertEqual(block.layout['weights'][3], 16)
+        self.assertEqual(block.layout['clip'][3], 16)
+        self.assertEqual(self.gl.named('glBufferData'), [(GL.GL_UNIFORM_BUFFER, 256, None, GL.GL_STREAM_DRAW)])
+
+    def test_matrices_only(self):
+        block = UniformBlock('GlobalMatrices', 0, [('cameraToClipMatrix', 'mat4'), ('worldToCameraMatrix', 'mat4')])
+        self.assertEqual(self.offsets(block), {'cameraToClipMatrix': 0, 'worldToCameraMatrix': 64})
+        self.assertEqual(block.size, 128)
+
+    def test_unsupported_types(self):
+        for glsl_type in ('ivec2', 'vec3[]', 'mat4x3', 16):
+            self.assertRaises((ValueError, TypeError), UniformBlock, 'Block', 0, [('field', glsl_type)])
+
+    def test_upload_sends_only_the_changed_field(self):
+        block = UniformBlock('Block', 0, [('clip', 'mat4'), ('camera', 'mat4'), ('tint', 'vec3'), ('scale', 'float')])
+        self.gl.clear()
+        matrix = Matrix()
+        matrix[3, 0] = 5.0
+        block.set('camera', matrix)
+        block.upload()
+        (target, offset, size, data), = self.gl.named('glBufferSubData')
+        self.assertEqual((target, offset, size), (GL.GL_UNIFORM_BUFFER, 64, 64))
+        self.assertTrue(numpy.array_equal(data.view(numpy.float32).reshape(4, 4), matrix.toarray()))
+
+        # a vec3 covers 12 bytes, not its padding
+        self.gl.clear()
+        block.set('tint', (0.5, 0.25, 1.0))
+        block.upload()
+        (target, offset, size, data), = self.gl.named('glBufferSubData')
+        self.assertEqual((offset, size), (128, 12))
+        self.assertEqual(data.view(numpy.float32).tolist(), [0.5, 0.25, 1.0])
+
+        # nothing changed, nothing to upload
+        self.gl.clear()
+        block.set('camera', matrix.copy())
+        block.upload()
+        self.assertEqual(self.gl.named('glBufferSubData'), [])
+
+    def test_upload_covers_every_changed_field(self):
+        block = UniformBlock('Block', 0, [('scale', 'float'), ('clip', 'mat4'), ('weights', 'float[3]')])
+        self.gl.clear()
+        block.set('scale', 2.0)
+        block.set('weights', [1.0, 2.0, 3.0])
+        block.upload()
+        (target, offset, size, data), = self.gl.named('glBufferSubData')
+        # from the float to the last weight, without the padding after it
+        self.assertEqual((offset, size), (0, 80 + 2 * 16 + 4))
+        weights = block.data[80:128].view(numpy.float32).reshape(3, 4)
+        self.assertEqual(weights[:, 0].tolist(), [1.0, 2.0, 3.0])
+        self.assertEqual(weights[:, 1:].tolist(), [[0.0] * 3] * 3)
+
+    def test_set_checks_the_size(self):
+        block = UniformBlock('Block', 0, [('tint', 'vec3')])
+        self.assertRaises(ValueError, block.set, 'tint', (1.0, 1.0, 1.0, 1.0))
+
+if __name__ == '__main__':
+    unittest.main()
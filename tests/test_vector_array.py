@@ -0,0 +1,129 @@
+import os
+import sys
+import unittest
+import numpy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gltut_framework import VectorArray, PointArray, Vector, Point
+
+COUNT = 16
+
+def random_rows(seed, w):
+    data = numpy.random.RandomState(seed).uniform(-10.0, 10.0, (COUNT, 4)).astype(numpy.float32)
+    data[:, 3] = w
+    return data
+
+class VectorArrayTest(unittest.TestCase):
+    def setUp(self):
+        self.vectors = VectorArray(data=random_rows(0, 0.0))
+        self.others = VectorArray(data=random_rows(1, 0.0))
+        self.points = PointArray(data=random_rows(2, 1.0))
+        self.otherPoints = PointArray(data=random_rows(3, 1.0))
+        self.factors = numpy.random.RandomState(4).uniform(0.5, 2.0, COUNT).astype(numpy.float32)
+
+    def assertRows(self, array, expected, element_type):
+        # array's rows against a list of scalar results, one per row
+        self.assertEqual(len(array), len(expected))
+        for row, element in zip(array, expected):
+            self.assertIs(type(row), element_type)
+            self.assertTrue(numpy.allclose(row.tolist(), element.tolist(), rtol=1e-5, atol=1e-4),
+                    (row.tolist(), element.tolist()))
+
+    def test_construction_fills_in_w(self):
+        data = numpy.arange(9, dtype=numpy.float32).reshape(3, 3)
+        self.assertEqual(VectorArray(data=data).w.tolist(), [0.0] * 3)
+        self.assertEqual(PointArray(data=data).w.tolist(), [1.0] * 3)
+        self.assertEqual(PointArray(2).tolist(), [Point().tolist()] * 2)
+        self.assertEqual(len(VectorArray(data=[])), 0)
+        self.assertRows(PointArray(data=data), [Point(*row) for row in data.tolist()], Point)
+
+    def test_indexing(self):
+        self.assertIs(type(self.vectors[3]), Vector)
+        self.assertIs(type(self.points[numpy.int64(3)]), Point)
+        self.assertEqual(self.points[3].tolist(), self.points.toarray()[3].tolist())
+        self.assertIs(type(self.points[2:5]), PointArray)
+        self.assertEqual(len(self.points[self.points.x > 0.0]), int((self.points.x > 0.0).sum()))
+
+        self.vectors[1] = Vector(1.0, 2.0, 3.0)
+        self.assertEqual(self.vectors[1].tolist(), [1.0, 2.0, 3.0, 0.0])
+
+    def test_add_and_subtract(self):
+        scalars = list(self.vectors)
+        others = list(self.others)
+        self.assertRows(self.vectors + self.others, [a + b for a, b in zip(scalars, others)], Vector)
+        self.assertRows(self.vectors - self.others, [a - b for a, b in zip(scalars, others)], Vector)
+        # one vector for every row
+        offset = Vector(1.0, -2.0, 0.5)
+        self.assertRows(self.vectors + offset, [a + offset for a in scalars], Vector)
+
+        vectors = self.vectors.copy()
+        vectors += self.others
+        self.assertRows(vectors, [a + b for a, b in zip(scalars, others)], Vector)
+        vectors -= self.others
+        self.assertRows(vectors, scalars, Vector)
+
+    def test_point_arithmetic(self):
+        points = list(self.points)
+        otherPoints = list(self.otherPoints)
+        vectors = list(self.vectors)
+
+        difference = self.points - self.otherPoints
+        self.assertIs(type(difference), VectorArray)
+        self.assertEqual(difference.w.tolist(), [0.0] * COUNT)
+        self.assertRows(difference, [a - b for a, b in zip(points, otherPoints)], Vector)
+
+        moved = self.points + self.vectors
+        self.assertIs(type(moved), VectorArray)
+        self.assertRows(moved, [a + b for a, b in zip(points, vectors)], Vector)
+        self.assertRows(self.points - vectors[0], [a - vectors[0] for a in points], Vector)
+
+    def test_multiply(self):
+        scalars = list(self.vectors)
+        self.assertRows(self.vectors * 2.5, [a * 2.5 for a in scalars], Vector)
+        self.assertRows(self.vectors * self.factors,
+                [a * float(factor) for a, factor in zip(scalars, self.factors)], Vector)
+
+        vectors = self.vectors.copy()
+        vectors.scale(self.factors)
+        self.assertRows(vectors, [a * float(factor) for a, factor in zip(scalars, self.factors)], Vector)
+
+        # component by component, as Vector *= Vector does
+        vectors = self.vectors.copy()
+        vectors *= self.others
+        expected = []
+        for a, b in zip(scalars, self.others):
+            a = a.copy()
+            a *= b
+            expected.append(a)
+        self.assertRows(vectors, expected, Vector)
+
+    def test_length_and_normal(self):
+        scalars = list(self.vectors)
+        self.assertTrue(numpy.allclose(self.vectors.length(), [a.length() for a in scalars], rtol=1e-5))
+        self.assertRows(self.vectors.normal(), [a.normal() for a in scalars], Vector)
+
+        vectors = self.vectors.copy()
+        vectors.normalize()
+        expected = []
+        for a in scalars:
+            a.normalize()
+            expected.append(a)
+        self.assertRows(vectors, expected, Vector)
+
+    def test_dot(self):
+        expected = [sum(x * y for x, y in zip(a, b)) for a, b in zip(self.vectors, self.others)]
+        self.assertTrue(numpy.allclose(self.vectors.dot(self.others), expected, rtol=1e-5, atol=1e-3))
+
+    def test_cross(self):
+        scalars = list(self.vectors)
+        others = list(self.others)
+        expected = [a ^ b for a, b in zip(scalars, others)]
+        self.assertRows(self.vectors.cross(self.others), expected, Vector)
+        self.assertRows(self.vectors ^ self.others, expected, Vector)
+
+        axis = (0.0, 1.0, 0.0)
+        self.assertRows(self.vectors ^ axis, [a ^ axis for a in scalars], Vector)
+        self.assertRows(axis ^ self.vectors, [axis ^ a for a in scalars], Vector)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,7 @@
 import glfw
 from OpenGL import GL
 from OpenGL.GL.shaders import compileShader, compileProgram
-from gltut_framework import AbstractTutorial
+from gltut_framework import AbstractTutorial, GL_STATE, buffer_data
 
 VERTEX_SHADER = """
 #version 330
@@ -34,7 +34,6 @@ class Tutorial(AbstractTutorial):
         self.vao = None
 
         self.vert_components = 4
-        self.size_float = 4
 
     def initializeProgram(self):
         shaderList = []
@@ -47,18 +46,13 @@ class Tutorial(AbstractTutorial):
     def initializeVertexBuffer(self):
         self.positionBufferObject = GL.glGenBuffers(1)
 
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER,self.positionBufferObject)
-        array_type = (GL.GLfloat*len(self.vertexPositions))
-        GL.glBufferData(
-                GL.GL_ARRAY_BUFFER,
-                len(self.vertexPositions)*self.size_float,
-                array_type(*self.vertexPositions),
-                GL.GL_STATIC_DRAW)
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER,0)
+        GL_STATE.bindBuffer(GL.GL_ARRAY_BUFFER,self.positionBufferObject)
+        buffer_data(GL.GL_ARRAY_BUFFER, self.vertexPositions, GL.GL_STATIC_DRAW)
+        GL_STATE.bindBuffer(GL.GL_ARRAY_BUFFER,0)
 
     def init(self):
         self.vao = GL.glGenVertexArrays(1)
-        GL.glBindVertexArray(self.vao)
+        GL_STATE.bindVertexArray(self.vao)
 
         self.initializeProgram()
         self.initializeVertexBuffer()
@@ -67,16 +61,16 @@ class Tutorial(AbstractTutorial):
         GL.glClearColor(0.0, 0.0, 0.0, 0.0)
         GL.glClear(GL.GL_COLOR_BUFFER_BIT)
 
-        GL.glUseProgram(self.theProgram)
+        GL_STATE.useProgram(self.theProgram)
 
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.positionBufferObject)
+        GL_STATE.bindBuffer(GL.GL_ARRAY_BUFFER, self.positionBufferObject)
         GL.glEnableVertexAttribArray(0)
         GL.glVertexAttribPointer(0, self.vert_components, GL.GL_FLOAT, GL.GL_FALSE, 0, None)
 
         GL.glDrawArrays(GL.GL_TRIANGLES, 0, len(self.vertexPositions)//self.vert_components)
 
         GL.glDisableVertexAttribArray(0)
-        GL.glUseProgram(0)
+        GL_STATE.useProgram(0)
 
         glfw.SwapBuffers()
 
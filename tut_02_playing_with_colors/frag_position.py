@@ -2,7 +2,7 @@ import os
 import glfw
 from OpenGL import GL
 from OpenGL.GL.shaders import compileShader, compileProgram
-from gltut_framework import AbstractTutorial
+from gltut_framework import AbstractTutorial, GL_STATE, buffer_data
 
 #Load shaders from files.
 dirname = os.path.dirname(__file__)
@@ -23,7 +23,6 @@ class Tutorial(AbstractTutorial):
         self.vao = None
 
         self.num_vertex_components = 4
-        self.vertex_size = 4
 
     def initializeProgram(self):
         shaderList = []
@@ -35,18 +34,13 @@ class Tutorial(AbstractTutorial):
 
     def initializeVertexBuffer(self):
         self.vertexBufferObject = GL.glGenBuffers(1)
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER,self.vertexBufferObject)
-        array_type = (GL.GLfloat*len(self.vertexPositions))
-        GL.glBufferData(
-                GL.GL_ARRAY_BUFFER,
-                len(self.vertexPositions)*self.vertex_size,
-                array_type(*self.vertexPositions),
-                GL.GL_STATIC_DRAW)
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER,0)
+        GL_STATE.bindBuffer(GL.GL_ARRAY_BUFFER,self.vertexBufferObject)
+        buffer_data(GL.GL_ARRAY_BUFFER, self.vertexPositions, GL.GL_STATIC_DRAW)
+        GL_STATE.bindBuffer(GL.GL_ARRAY_BUFFER,0)
 
     def init(self):
         self.vao = GL.glGenVertexArrays(1)
-        GL.glBindVertexArray(self.vao)
+        GL_STATE.bindVertexArray(self.vao)
 
         self.initializeProgram()
         self.initializeVertexBuffer()
@@ -55,9 +49,9 @@ class Tutorial(AbstractTutorial):
         GL.glClearColor(0.0, 0.0, 0.0, 0.0)
         GL.glClear(GL.GL_COLOR_BUFFER_BIT)
 
-        GL.glUseProgram(self.theProgram)
+        GL_STATE.useProgram(self.theProgram)
 
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertexBufferObject)
+        GL_STATE.bindBuffer(GL.GL_ARRAY_BUFFER, self.vertexBufferObject)
 
         GL.glEnableVertexAttribArray(0)
         GL.glVertexAttribPointer(0, self.num_vertex_components, GL.GL_FLOAT, GL.GL_FALSE, 0, None)
@@ -65,7 +59,7 @@ class Tutorial(AbstractTutorial):
         GL.glDrawArrays(GL.GL_TRIANGLES, 0, len(self.vertexPositions)//self.num_vertex_components)
 
         GL.glDisableVertexAttribArray(0)
-        GL.glUseProgram(0)
+        GL_STATE.useProgram(0)
 
         glfw.SwapBuffers()
 
@@ -1,9 +1,10 @@
 import os
 import math
+import numpy
 import glfw
 from OpenGL import GL
 from OpenGL.GL.shaders import compileShader, compileProgram
-from gltut_framework import AbstractTutorial
+from gltut_framework import AbstractTutorial, GL_STATE, StreamingBuffer
 
 #Load shaders from files.
 dirname = os.path.dirname(__file__)
@@ -20,11 +21,12 @@ class Tutorial(AbstractTutorial):
              0.25, 0.25, 0.0, 1.0,
              0.25,-0.25, 0.0, 1.0,
             -0.25,-0.25, 0.0, 1.0]
-        self.positionBufferObject = None
+        self.positionArray = None
+        self.positionBuffer = None
+        self.positionOffset = 0
         self.vao = None
 
         self.num_vertex_components = 4
-        self.vertex_size = 4
 
     def initializeProgram(self):
         shaderList = []
@@ -35,20 +37,16 @@ class Tutorial(AbstractTutorial):
         self.theProgram = compileProgram(*shaderList)
 
     def initializeVertexBuffer(self):
-        self.positionBufferObject = GL.glGenBuffers(1)
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER,self.positionBufferObject)
-        ArrayType = (GL.GLfloat*len(self.vertexPositions))
-        array = ArrayType(*self.vertexPositions)
-        GL.glBufferData(
-                GL.GL_ARRAY_BUFFER,
-                len(self.vertexPositions)*self.vertex_size,
-                array,
-                GL.GL_STATIC_DRAW)
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER,0)
+        # The positions are rewritten every frame, so instead of updating
+        # one small buffer in place (and waiting for the previous frame's
+        # draw to finish reading it) each frame's copy goes into the next
+        # free range of a ring buffer.
+        self.positionArray = numpy.array(self.vertexPositions, dtype=numpy.float32).reshape(-1, self.num_vertex_components)
+        self.positionBuffer = StreamingBuffer(GL.GL_ARRAY_BUFFER, 64 * 1024)
 
     def init(self):
         self.vao = GL.glGenVertexArrays(1)
-        GL.glBindVertexArray(self.vao)
+        GL_STATE.bindVertexArray(self.vao)
 
         self.initializeProgram()
         self.initializeVertexBuffer()
@@ -62,20 +60,8 @@ class Tutorial(AbstractTutorial):
         return x_offset, y_offset
 
     def adjustVertexData(self, x_offset, y_offset):
-        verts = self.vertexPositions[:]
-        for i in xrange(0,len(verts),4):
-            verts[i] += x_offset
-            verts[i+1] += y_offset
-
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER,self.positionBufferObject)
-        ArrayType = (GL.GLfloat*len(self.vertexPositions))
-        array = ArrayType(*verts)
-        GL.glBufferSubData(
-                GL.GL_ARRAY_BUFFER,
-                0,
-                len(self.vertexPositions)*self.vertex_size,
-                array)
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER,0)
+        verts = self.positionArray + (x_offset, y_offset, 0.0, 0.0)
+        self.positionOffset = self.positionBuffer.write(verts)
 
     def display(self):
         x_offset, y_offset = self.computePostionOffsets()
@@ -84,16 +70,16 @@ class Tutorial(AbstractTutorial):
         GL.glClearColor(0.0, 0.0, 0.0, 0.0)
         GL.glClear(GL.GL_COLOR_BUFFER_BIT)
 
-        GL.glUseProgram(self.theProgram)
+        GL_STATE.useProgram(self.theProgram)
 
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.positionBufferObject)
+        self.positionBuffer.bind()
         GL.glEnableVertexAttribArray(0)
-        GL.glVertexAttribPointer(0, self.num_vertex_components, GL.GL_FLOAT, GL.GL_FALSE, 0, None)
+        GL.glVertexAttribPointer(0, self.num_vertex_components, GL.GL_FLOAT, GL.GL_FALSE, 0, GL.GLvoidp(self.positionOffset))
 
         GL.glDrawArrays(GL.GL_TRIANGLES, 0, 3)
 
         GL.glDisableVertexAttribArray(0)
-        GL.glUseProgram(0)
+        GL_STATE.useProgram(0)
 
         glfw.SwapBuffers()
 
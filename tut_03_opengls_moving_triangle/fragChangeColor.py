@@ -3,7 +3,7 @@ import math
 import glfw
 from OpenGL import GL
 from OpenGL.GL.shaders import compileShader, compileProgram
-from gltut_framework import AbstractTutorial
+from gltut_framework import AbstractTutorial, GL_STATE, buffer_data
 
 #Load shaders from files.
 dirname = os.path.dirname(__file__)
@@ -26,7 +26,6 @@ class Tutorial(AbstractTutorial):
         self.vao = None
 
         self.num_vertex_components = 4
-        self.vertex_size = 4
 
     def initializeProgram(self):
         shaderList = []
@@ -41,25 +40,20 @@ class Tutorial(AbstractTutorial):
         self.loopDurationUnf = GL.glGetUniformLocation(self.theProgram, "loopDuration")
         self.fragLoopDurUnf = GL.glGetUniformLocation(self.theProgram, "fragLoopDuration")
 
-        GL.glUseProgram(self.theProgram)
-        GL.glUniform1f(self.loopDurationUnf, 5.0)
-        GL.glUniform1f(self.fragLoopDurUnf, 10.0)
-        GL.glUseProgram(0)
+        GL_STATE.useProgram(self.theProgram)
+        GL_STATE.uniform1f(self.loopDurationUnf, 5.0)
+        GL_STATE.uniform1f(self.fragLoopDurUnf, 10.0)
+        GL_STATE.useProgram(0)
 
     def initializeVertexBuffer(self):
         self.positionBufferObject = GL.glGenBuffers(1)
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER,self.positionBufferObject)
-        array_type = (GL.GLfloat*len(self.vertexPositions))
-        GL.glBufferData(
-                GL.GL_ARRAY_BUFFER,
-                len(self.vertexPositions)*self.vertex_size,
-                array_type(*self.vertexPositions),
-                GL.GL_STATIC_DRAW)
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER,0)
+        GL_STATE.bindBuffer(GL.GL_ARRAY_BUFFER,self.positionBufferObject)
+        buffer_data(GL.GL_ARRAY_BUFFER, self.vertexPositions, GL.GL_STATIC_DRAW)
+        GL_STATE.bindBuffer(GL.GL_ARRAY_BUFFER,0)
 
     def init(self):
         self.vao = GL.glGenVertexArrays(1)
-        GL.glBindVertexArray(self.vao)
+        GL_STATE.bindVertexArray(self.vao)
 
         self.initializeProgram()
         self.initializeVertexBuffer()
@@ -68,18 +62,18 @@ class Tutorial(AbstractTutorial):
         GL.glClearColor(0.0, 0.0, 0.0, 0.0)
         GL.glClear(GL.GL_COLOR_BUFFER_BIT)
 
-        GL.glUseProgram(self.theProgram)
+        GL_STATE.useProgram(self.theProgram)
 
-        GL.glUniform1f(self.elapsedTimeUniform, self.elapsed_time)
+        GL_STATE.uniform1f(self.elapsedTimeUniform, self.elapsed_time)
 
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.positionBufferObject)
+        GL_STATE.bindBuffer(GL.GL_ARRAY_BUFFER, self.positionBufferObject)
         GL.glEnableVertexAttribArray(0)
         GL.glVertexAttribPointer(0, self.num_vertex_components, GL.GL_FLOAT, GL.GL_FALSE, 0, None)
 
         GL.glDrawArrays(GL.GL_TRIANGLES, 0, 3)
 
         GL.glDisableVertexAttribArray(0)
-        GL.glUseProgram(0)
+        GL_STATE.useProgram(0)
 
         glfw.SwapBuffers()
 
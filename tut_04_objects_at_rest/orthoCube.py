@@ -3,7 +3,7 @@ import math
 import glfw
 from OpenGL import GL
 from OpenGL.GL.shaders import compileShader, compileProgram
-from gltut_framework import AbstractTutorial
+from gltut_framework import AbstractTutorial, GL_STATE, buffer_data
 from .data.vertices_ortho import VERTICES
 
 #Load shaders from files.
@@ -38,23 +38,18 @@ class Tutorial(AbstractTutorial):
 
     def initializeVertexBuffer(self):
         self.vertexBufferObject = GL.glGenBuffers(1)
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER,self.vertexBufferObject)
-        array_type = (GL.GLfloat*len(self.vertexData))
-        GL.glBufferData(
-                GL.GL_ARRAY_BUFFER,
-                len(self.vertexData)*self.float_size,
-                array_type(*self.vertexData),
-                GL.GL_STATIC_DRAW)
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER,0)
+        GL_STATE.bindBuffer(GL.GL_ARRAY_BUFFER,self.vertexBufferObject)
+        buffer_data(GL.GL_ARRAY_BUFFER, self.vertexData, GL.GL_STATIC_DRAW)
+        GL_STATE.bindBuffer(GL.GL_ARRAY_BUFFER,0)
 
     def init(self):
         self.vao = GL.glGenVertexArrays(1)
-        GL.glBindVertexArray(self.vao)
+        GL_STATE.bindVertexArray(self.vao)
 
         self.initializeProgram()
         self.initializeVertexBuffer()
 
-        GL.glEnable(GL.GL_CULL_FACE)
+        GL_STATE.enable(GL.GL_CULL_FACE)
         GL.glCullFace(GL.GL_BACK)
         GL.glFrontFace(GL.GL_CW)
 
@@ -62,12 +57,12 @@ class Tutorial(AbstractTutorial):
         GL.glClearColor(0.0, 0.0, 0.0, 0.0)
         GL.glClear(GL.GL_COLOR_BUFFER_BIT)
 
-        GL.glUseProgram(self.theProgram)
+        GL_STATE.useProgram(self.theProgram)
 
-        GL.glUniform2f(self.offsetUniform, 0.5, 0.25)
+        GL_STATE.uniform2f(self.offsetUniform, 0.5, 0.25)
 
         colorData = GL.GLvoidp((len(self.vertexData) * self.float_size) / 2)
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertexBufferObject)
+        GL_STATE.bindBuffer(GL.GL_ARRAY_BUFFER, self.vertexBufferObject)
         GL.glEnableVertexAttribArray(0)
         GL.glEnableVertexAttribArray(1)
         GL.glVertexAttribPointer(0, self.num_vertex_components, GL.GL_FLOAT, GL.GL_FALSE, 0, None)
@@ -78,7 +73,7 @@ class Tutorial(AbstractTutorial):
 
         GL.glDisableVertexAttribArray(0)
         GL.glDisableVertexAttribArray(1)
-        GL.glUseProgram(0)
+        GL_STATE.useProgram(0)
 
         glfw.SwapBuffers()
 
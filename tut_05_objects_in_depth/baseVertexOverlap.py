@@ -3,7 +3,7 @@ import math
 import glfw
 from OpenGL import GL
 from OpenGL.GL.shaders import compileShader, compileProgram
-from gltut_framework import AbstractTutorial
+from gltut_framework import AbstractTutorial, GL_STATE, buffer_data
 from .data.vertex_data import VERTEX_DATA, INDICES, NUMBER_OF_VERTICES
 
 #Load shaders from files.
@@ -34,7 +34,6 @@ class Tutorial(AbstractTutorial):
 
         self.num_vertex_components = 4
         self.float_size = 4
-        self.short_size = 2
 
     def initializeProgram(self):
         shaderList = []
@@ -58,50 +57,40 @@ class Tutorial(AbstractTutorial):
         self.perspectiveMatrix[14] = (2*fzFar*fzNear)/(fzNear-fzFar)
         self.perspectiveMatrix[11] = -1.0
 
-        GL.glUseProgram(self.theProgram)
-        GL.glUniformMatrix4fv(self.perspectiveMatrixUnif,1,GL.GL_FALSE,self.perspectiveMatrix)
-        GL.glUseProgram(0)
+        GL_STATE.useProgram(self.theProgram)
+        GL_STATE.uniformMatrix4fv(self.perspectiveMatrixUnif, self.perspectiveMatrix)
+        GL_STATE.useProgram(0)
 
     def initializeVertexBuffer(self):
         self.vertexBufferObject = GL.glGenBuffers(1)
 
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertexBufferObject)
-        array_type = (GL.GLfloat*len(self.vertexData))
-        GL.glBufferData(
-                GL.GL_ARRAY_BUFFER,
-                len(self.vertexData)*self.float_size,
-                array_type(*self.vertexData),
-                GL.GL_STATIC_DRAW)
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER,0)
+        GL_STATE.bindBuffer(GL.GL_ARRAY_BUFFER, self.vertexBufferObject)
+        buffer_data(GL.GL_ARRAY_BUFFER, self.vertexData, GL.GL_STATIC_DRAW)
+        GL_STATE.bindBuffer(GL.GL_ARRAY_BUFFER,0)
 
         self.indexBufferObject = GL.glGenBuffers(1)
-        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, self.indexBufferObject)
-        array_type = (GL.GLushort*len(self.indexData))
-        GL.glBufferData(
-                GL.GL_ELEMENT_ARRAY_BUFFER,
-                len(self.indexData)*self.short_size,
-                array_type(*self.indexData),
-                GL.GL_STATIC_DRAW)
-        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER,0)
+        GL_STATE.bindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, self.indexBufferObject)
+        buffer_data(GL.GL_ELEMENT_ARRAY_BUFFER, self.indexData, GL.GL_STATIC_DRAW, dtype=GL.GLushort)
+        GL_STATE.bindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER,0)
 
     def init(self):
         self.vao = GL.glGenVertexArrays(1)
-        GL.glBindVertexArray(self.vao)
+        GL_STATE.bindVertexArray(self.vao)
 
         self.initializeProgram()
         self.initializeVertexBuffer()
 
         colorDataOffset = 3*self.float_size*self.numberOfVertices
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER,self.vertexBufferObject)
+        GL_STATE.bindBuffer(GL.GL_ARRAY_BUFFER,self.vertexBufferObject)
         GL.glEnableVertexAttribArray(0)
         GL.glEnableVertexAttribArray(1)
         GL.glVertexAttribPointer(0, 3, GL.GL_FLOAT, GL.GL_FALSE, 0, None)
         GL.glVertexAttribPointer(1, 4, GL.GL_FLOAT, GL.GL_FALSE, 0, GL.GLvoidp(colorDataOffset))
-        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER,self.indexBufferObject)
+        GL_STATE.bindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER,self.indexBufferObject)
 
-        GL.glBindVertexArray(0)
+        GL_STATE.bindVertexArray(0)
 
-        GL.glEnable(GL.GL_CULL_FACE)
+        GL_STATE.enable(GL.GL_CULL_FACE)
         GL.glCullFace(GL.GL_BACK)
         GL.glFrontFace(GL.GL_CW)
 
@@ -109,18 +98,18 @@ class Tutorial(AbstractTutorial):
         GL.glClearColor(0.0, 0.0, 0.0, 0.0)
         GL.glClear(GL.GL_COLOR_BUFFER_BIT)
 
-        GL.glUseProgram(self.theProgram)
+        GL_STATE.useProgram(self.theProgram)
 
-        GL.glBindVertexArray(self.vao)
+        GL_STATE.bindVertexArray(self.vao)
 
-        GL.glUniform3f(self.offsetUniform, 0.0, 0.0, 0.0)
+        GL_STATE.uniform3f(self.offsetUniform, 0.0, 0.0, 0.0)
         GL.glDrawElements(GL.GL_TRIANGLES, len(self.indexData), GL.GL_UNSIGNED_SHORT, None)
 
-        GL.glUniform3f(self.offsetUniform, 0.0, 0.0, -1.0)
+        GL_STATE.uniform3f(self.offsetUniform, 0.0, 0.0, -1.0)
         GL.glDrawElementsBaseVertex(GL.GL_TRIANGLES, len(self.indexData), GL.GL_UNSIGNED_SHORT, None, self.numberOfVertices/2)
 
-        GL.glBindVertexArray(0)
-        GL.glUseProgram(0)
+        GL_STATE.bindVertexArray(0)
+        GL_STATE.useProgram(0)
 
         glfw.SwapBuffers()
 
@@ -128,9 +117,9 @@ class Tutorial(AbstractTutorial):
         self.perspectiveMatrix[0] = self.fFrustumScale / (w/float(h))
         self.perspectiveMatrix[5] = self.fFrustumScale
 
-        GL.glUseProgram(self.theProgram)
-        GL.glUniformMatrix4fv(self.perspectiveMatrixUnif,1,GL.GL_FALSE,self.perspectiveMatrix)
-        GL.glUseProgram(0)
+        GL_STATE.useProgram(self.theProgram)
+        GL_STATE.uniformMatrix4fv(self.perspectiveMatrixUnif, self.perspectiveMatrix)
+        GL_STATE.useProgram(0)
 
         GL.glViewport(0, 0, w, h);
 
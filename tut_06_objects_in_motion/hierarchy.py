@@ -7,7 +7,7 @@ import math
 import glfw
 from OpenGL import GL
 from OpenGL.GL.shaders import compileShader, compileProgram
-from gltut_framework import AbstractTutorial, Matrix, Vector, Point, clamp
+from gltut_framework import AbstractTutorial, RENDER_ON_DEMAND, GL_STATE, SceneNode, buffer_data, Matrix, Quaternion, ROTATION_CACHE, clamp
 from .data.hierarchy_data import VERTEX_DATA, INDICES, NUMBER_OF_VERTICES
 
 #Load shaders from files.
@@ -17,83 +17,29 @@ with open(os.path.join(dirname, "data","PosColorLocalTransform.vert"),'r') as my
 with open(os.path.join(dirname, "data","ColorPassthrough.frag"),'r') as myfile:
     FRAGMENT_SHADER = myfile.read()
 
+# NOTE: the returned matrices come from a shared cache, don't modify them.
 def rotateX(fAngDeg):
-    fAngRad = math.radians(fAngDeg)
-    fCos = math.cos(fAngRad)
-    fSin = math.sin(fAngRad)
-
-    theMat = Matrix()
-    theMat[1,1] = fCos
-    theMat[1,2] = fSin
-    theMat[2,1] = -fSin
-    theMat[2,2] = fCos
-
-    return theMat
+    return ROTATION_CACHE.matrix('x', fAngDeg)
 
 def rotateY(fAngDeg):
-    fAngRad = math.radians(fAngDeg)
-    fCos = math.cos(fAngRad)
-    fSin = math.sin(fAngRad)
-
-    theMat = Matrix()
-    theMat[0,0] = fCos
-    theMat[0,2] = -fSin
-    theMat[2,0] = fSin
-    theMat[2,2] = fCos
-
-    return theMat
+    return ROTATION_CACHE.matrix('y', fAngDeg)
 
 def rotateZ(fAngDeg):
-    fAngRad = math.radians(fAngDeg)
-    fCos = math.cos(fAngRad)
-    fSin = math.sin(fAngRad)
-
-    theMat = Matrix()
-    theMat[0,0] = fCos
-    theMat[0,1] = fSin
-    theMat[1,0] = -fSin
-    theMat[1,1] = fCos
-
-    return theMat
-
-class MatrixStack(object):
-    def __init__(self):
-        self.m_currMat = Matrix()
-        self.m_matrices = []
-
-    def top(self):
-        return self.m_currMat
-
-    def rotateX(self, fAngDeg):
-        self.m_currMat = rotateX(fAngDeg) * self.m_currMat
-
-    def rotateY(self, fAngDeg):
-        self.m_currMat = rotateY(fAngDeg) * self.m_currMat
-
-    def rotateZ(self, fAngDeg):
-        self.m_currMat = rotateZ(fAngDeg) * self.m_currMat
+    return ROTATION_CACHE.matrix('z', fAngDeg)
 
-    def scale(self, scaleVec):
-        scaleMat = Matrix()
-        for index in xrange(3):
-            scaleMat[index, index] = scaleVec[index]
-
-        self.m_currMat = scaleMat * self.m_currMat
-
-    def translate(self, offsetVec):
-        translateMat = Matrix()
-        for index in xrange(3):
-            translateMat[3, index] = offsetVec[index]
-
-        self.m_currMat = translateMat * self.m_currMat
-
-    def push(self):
-        self.m_matrices.append(self.m_currMat.copy())
-
-    def pop(self):
-        self.m_currMat = self.m_matrices.pop()
+def wristRotation(fAngRoll, fAngPitch):
+    return (Quaternion.fromAxisAngle((0.0, 0.0, 1.0), fAngRoll) *
+            Quaternion.fromAxisAngle((1.0, 0.0, 0.0), fAngPitch))
 
 class Hierarchy(object):
+    """
+    NOTE: the armature is a tree of SceneNodes built once in __init__.
+          Joints (base, upper arm, lower arm, wrist, fingers) carry the
+          transforms their children inherit; each drawn piece is a leaf
+          node below its joint with the extra offset and scale it's drawn
+          with.  The adj* methods only update the joint they move, so only
+          that joint and the nodes below it get new world matrices.
+    """
     STANDARD_ANGLE_INCREMENT = 11.25
     SMALL_ANGLE_INCREMENT = 9.0
     def __init__(self):
@@ -120,62 +66,96 @@ class Hierarchy(object):
         self.widthFinger = 0.5
         self.angLowerFinger = 45.0
 
+        self.pieces = []
+        self.initializeNodes()
+
+    def addPiece(self, joint, name, translation=(0.0, 0.0, 0.0), scale=(1.0, 1.0, 1.0)):
+        piece = joint.add_child(SceneNode(name, translation, scale=scale))
+        self.pieces.append(piece)
+        return piece
+
+    def addFinger(self, wrist, name, position, fAngOpen, fAngLower):
+        fingerScale = (self.widthFinger / 2.0, self.widthFinger / 2.0, self.lenFinger / 2.0)
+        fingerOffset = (0.0, 0.0, self.lenFinger / 2.0)
+
+        finger = wrist.add_child(SceneNode(name, position, rotateY(fAngOpen)))
+        self.addPiece(finger, name + 'Piece', fingerOffset, fingerScale)
+
+        lowerFinger = finger.add_child(SceneNode(
+                name + 'Lower', (0.0, 0.0, self.lenFinger), rotateY(fAngLower)))
+        self.addPiece(lowerFinger, name + 'LowerPiece', fingerOffset, fingerScale)
+        return finger
+
+    def initializeNodes(self):
+        self.base = SceneNode('base', self.posBase, rotateY(self.angBase))
+        self.addPiece(self.base, 'baseLeft', self.posBaseLeft, (1.0, 1.0, self.scaleBaseZ))
+        self.addPiece(self.base, 'baseRight', self.posBaseRight, (1.0, 1.0, self.scaleBaseZ))
+
+        self.upperArm = self.base.add_child(SceneNode('upperArm', rotation=rotateX(self.angUpperArm)))
+        self.addPiece(
+                self.upperArm, 'upperArmPiece',
+                (0.0, 0.0, (self.sizeUpperArm / 2.0) - 1.0),
+                (1.0, 1.0, self.sizeUpperArm / 2.0))
+
+        self.lowerArm = self.upperArm.add_child(SceneNode(
+                'lowerArm', self.posLowerArm, rotateX(self.angLowerArm)))
+        self.addPiece(
+                self.lowerArm, 'lowerArmPiece',
+                (0.0, 0.0, self.lenLowerArm / 2.0),
+                (self.widthLowerArm / 2.0, self.widthLowerArm / 2.0, self.lenLowerArm / 2.0))
+
+        self.wrist = self.lowerArm.add_child(SceneNode(
+                'wrist', self.posWrist, wristRotation(self.angWristRoll, self.angWristPitch)))
+        self.addPiece(
+                self.wrist, 'wristPiece',
+                scale=(self.widthWrist / 2.0, self.widthWrist / 2.0, self.lenWrist / 2.0))
+
+        self.leftFinger = self.addFinger(
+                self.wrist, 'leftFinger', self.posLeftFinger, self.angFingerOpen, -self.angLowerFinger)
+        self.rightFinger = self.addFinger(
+                self.wrist, 'rightFinger', self.posRightFinger, -self.angFingerOpen, self.angLowerFinger)
+
     def draw(self, tutorial_object):
-        modelToCameraStack = MatrixStack()
-
-        GL.glUseProgram(tutorial_object.theProgram)
-        GL.glBindVertexArray(tutorial_object.vao)
-
-        modelToCameraStack.translate(self.posBase)
-        modelToCameraStack.rotateY(self.angBase)
-
-        # Draw left base
-        #
-        modelToCameraStack.push()
-        modelToCameraStack.translate(self.posBaseLeft)
-        modelToCameraStack.scale([1.0, 1.0, self.scaleBaseZ])
-        GL.glUniformMatrix4fv(tutorial_object.modelToCameraMatrixUnif, 1, GL.GL_FALSE, modelToCameraStack.top().tolist())
-        GL.glDrawElements(GL.GL_TRIANGLES, len(tutorial_object.indexData), GL.GL_UNSIGNED_SHORT, None)
-        modelToCameraStack.pop()
-
-        # Draw right base
-        #
-        modelToCameraStack.push()
-        modelToCameraStack.translate(self.posBaseRight)
-        modelToCameraStack.scale([1.0, 1.0, self.scaleBaseZ])
-        GL.glUniformMatrix4fv(tutorial_object.modelToCameraMatrixUnif, 1, GL.GL_FALSE, modelToCameraStack.top().tolist())
-        GL.glDrawElements(GL.GL_TRIANGLES, len(tutorial_object.indexData), GL.GL_UNSIGNED_SHORT, None)
-        modelToCameraStack.pop()
-
-        # Draw main arm
-        self.drawUpperArm(modelToCameraStack, tutorial_object)
-
-        GL.glBindVertexArray(0)
-        GL.glUseProgram(0)
+        GL_STATE.useProgram(tutorial_object.theProgram)
+        GL_STATE.bindVertexArray(tutorial_object.vao)
+
+        for piece in self.pieces:
+            GL_STATE.uniformMatrix4fv(tutorial_object.modelToCameraMatrixUnif, piece.world_matrix)
+            GL.glDrawElements(GL.GL_TRIANGLES, len(tutorial_object.indexData), GL.GL_UNSIGNED_SHORT, None)
+
+        GL_STATE.bindVertexArray(0)
+        GL_STATE.useProgram(0)
 
     def adjBase(self, bIncrement):
         self.angBase += self.STANDARD_ANGLE_INCREMENT if bIncrement else -self.STANDARD_ANGLE_INCREMENT
         self.angBase = self.angBase % 360.0
+        self.base.rotation = rotateY(self.angBase)
 
     def adjUpperArm(self, bIncrement):
         self.angUpperArm += self.STANDARD_ANGLE_INCREMENT if bIncrement else -self.STANDARD_ANGLE_INCREMENT
         self.angUpperArm = clamp(self.angUpperArm, -90.0, 0.0)
+        self.upperArm.rotation = rotateX(self.angUpperArm)
 
     def adjLowerArm(self, bIncrement):
         self.angLowerArm += self.STANDARD_ANGLE_INCREMENT if bIncrement else -self.STANDARD_ANGLE_INCREMENT
         self.angLowerArm = clamp(self.angLowerArm, 0.0, 146.25)
+        self.lowerArm.rotation = rotateX(self.angLowerArm)
 
     def adjWristPitch(self, bIncrement):
         self.angWristPitch += self.STANDARD_ANGLE_INCREMENT if bIncrement else -self.STANDARD_ANGLE_INCREMENT
         self.angWristPitch = clamp(self.angWristPitch, 0.0, 90.0)
+        self.wrist.rotation = wristRotation(self.angWristRoll, self.angWristPitch)
 
     def adjWristRoll(self, bIncrement):
         self.angWristRoll += self.STANDARD_ANGLE_INCREMENT if bIncrement else -self.STANDARD_ANGLE_INCREMENT
         self.angWristRoll = self.angWristRoll % 360.0
+        self.wrist.rotation = wristRotation(self.angWristRoll, self.angWristPitch)
 
     def adjFingerOpen(self, bIncrement):
         self.angFingerOpen += self.SMALL_ANGLE_INCREMENT if bIncrement else -self.SMALL_ANGLE_INCREMENT
         self.angFingerOpen = clamp(self.angFingerOpen, 9.0, 180.0)
+        self.leftFinger.rotation = rotateY(self.angFingerOpen)
+        self.rightFinger.rotation = rotateY(-self.angFingerOpen)
 
     def writePose(self):
         print ('angBase:\t%f' % self.angBase)
@@ -186,119 +166,10 @@ class Hierarchy(object):
         print ('angFingerOpen:\t%f' % self.angFingerOpen)
         print 
 
-    def drawFingers(self, modelToCameraStack, tutorial_object):
-        # draw left finger
-        #
-        modelToCameraStack.push()
-        modelToCameraStack.translate(self.posLeftFinger)
-        modelToCameraStack.rotateY(self.angFingerOpen)
-
-        modelToCameraStack.push()
-        modelToCameraStack.translate([0.0, 0.0, self.lenFinger / 2.0])
-        modelToCameraStack.scale([self.widthFinger / 2.0, self.widthFinger / 2.0, self.lenFinger / 2.0])
-        GL.glUniformMatrix4fv(tutorial_object.modelToCameraMatrixUnif, 1, GL.GL_FALSE, modelToCameraStack.top().tolist())
-        GL.glDrawElements(GL.GL_TRIANGLES, len(tutorial_object.indexData), GL.GL_UNSIGNED_SHORT, None)
-        modelToCameraStack.pop()
-
-
-        # draw left lower finger
-        #
-        modelToCameraStack.push()
-        modelToCameraStack.translate([0.0, 0.0, self.lenFinger])
-        modelToCameraStack.rotateY(-self.angLowerFinger)
-
-        modelToCameraStack.push()
-        modelToCameraStack.translate([0.0, 0.0, self.lenFinger / 2.0])
-        modelToCameraStack.scale([self.widthFinger / 2.0, self.widthFinger / 2.0, self.lenFinger / 2.0])
-        GL.glUniformMatrix4fv(tutorial_object.modelToCameraMatrixUnif, 1, GL.GL_FALSE, modelToCameraStack.top().tolist())
-        GL.glDrawElements(GL.GL_TRIANGLES, len(tutorial_object.indexData), GL.GL_UNSIGNED_SHORT, None)
-        modelToCameraStack.pop()
-
-        modelToCameraStack.pop()
-
-
-        modelToCameraStack.pop()
-
-        # draw right finger
-        #
-        modelToCameraStack.push()
-        modelToCameraStack.translate(self.posRightFinger)
-        modelToCameraStack.rotateY(-self.angFingerOpen)
-
-        modelToCameraStack.push()
-        modelToCameraStack.translate([0.0, 0.0, self.lenFinger / 2.0])
-        modelToCameraStack.scale([self.widthFinger / 2.0, self.widthFinger / 2.0, self.lenFinger / 2.0])
-        GL.glUniformMatrix4fv(tutorial_object.modelToCameraMatrixUnif, 1, GL.GL_FALSE, modelToCameraStack.top().tolist())
-        GL.glDrawElements(GL.GL_TRIANGLES, len(tutorial_object.indexData), GL.GL_UNSIGNED_SHORT, None)
-        modelToCameraStack.pop()
-
-
-        # draw right lower finger
-        #
-        modelToCameraStack.push()
-        modelToCameraStack.translate([0.0, 0.0, self.lenFinger])
-        modelToCameraStack.rotateY(self.angLowerFinger)
-
-        modelToCameraStack.push()
-        modelToCameraStack.translate([0.0, 0.0, self.lenFinger / 2.0])
-        modelToCameraStack.scale([self.widthFinger / 2.0, self.widthFinger / 2.0, self.lenFinger / 2.0])
-        GL.glUniformMatrix4fv(tutorial_object.modelToCameraMatrixUnif, 1, GL.GL_FALSE, modelToCameraStack.top().tolist())
-        GL.glDrawElements(GL.GL_TRIANGLES, len(tutorial_object.indexData), GL.GL_UNSIGNED_SHORT, None)
-        modelToCameraStack.pop()
-
-        modelToCameraStack.pop()
-
-
-        modelToCameraStack.pop()
-
-    def drawWrist(self, modelToCameraStack, tutorial_object):
-        modelToCameraStack.push()
-        modelToCameraStack.translate(self.posWrist)
-        modelToCameraStack.rotateZ(self.angWristRoll)
-        modelToCameraStack.rotateX(self.angWristPitch)
-
-        modelToCameraStack.push()
-        modelToCameraStack.scale([self.widthWrist / 2.0, self.widthWrist / 2.0, self.lenWrist / 2.0])
-        GL.glUniformMatrix4fv(tutorial_object.modelToCameraMatrixUnif, 1, GL.GL_FALSE, modelToCameraStack.top().tolist())
-        GL.glDrawElements(GL.GL_TRIANGLES, len(tutorial_object.indexData), GL.GL_UNSIGNED_SHORT, None)
-        modelToCameraStack.pop()
-
-        self.drawFingers(modelToCameraStack, tutorial_object)
-
-        modelToCameraStack.pop()
-
-    def drawLowerArm(self, modelToCameraStack, tutorial_object):
-        modelToCameraStack.push()
-        modelToCameraStack.translate(self.posLowerArm)
-        modelToCameraStack.rotateX(self.angLowerArm)
-
-        modelToCameraStack.push()
-        modelToCameraStack.translate([0.0, 0.0, self.lenLowerArm / 2.0])
-        modelToCameraStack.scale([self.widthLowerArm / 2.0, self.widthLowerArm / 2.0, self.lenLowerArm / 2.0])
-        GL.glUniformMatrix4fv(tutorial_object.modelToCameraMatrixUnif, 1, GL.GL_FALSE, modelToCameraStack.top().tolist())
-        GL.glDrawElements(GL.GL_TRIANGLES, len(tutorial_object.indexData), GL.GL_UNSIGNED_SHORT, None)
-        modelToCameraStack.pop()
-
-        self.drawWrist(modelToCameraStack, tutorial_object)
-
-        modelToCameraStack.pop()
-
-    def drawUpperArm(self, modelToCameraStack, tutorial_object):
-        modelToCameraStack.push()
-        modelToCameraStack.rotateX(self.angUpperArm)
-
-        modelToCameraStack.push()
-        modelToCameraStack.translate([0.0, 0.0, (self.sizeUpperArm / 2.0) - 1.0])
-        modelToCameraStack.scale([1.0, 1.0, self.sizeUpperArm / 2.0])
-        GL.glUniformMatrix4fv(tutorial_object.modelToCameraMatrixUnif, 1, GL.GL_FALSE, modelToCameraStack.top().tolist())
-        GL.glDrawElements(GL.GL_TRIANGLES, len(tutorial_object.indexData), GL.GL_UNSIGNED_SHORT, None)
-        modelToCameraStack.pop()
-
-        self.drawLowerArm(modelToCameraStack, tutorial_object)
-
-        modelToCameraStack.pop()
-
 class Tutorial(AbstractTutorial):
+    # the scene only changes on key presses
+    render_policy = RENDER_ON_DEMAND
+
     def __init__(self, *args, **kwargs):
         super(Tutorial, self).__init__(*args, **kwargs)
         self.theProgram = None
@@ -349,62 +220,52 @@ class Tutorial(AbstractTutorial):
         self.cameraToClipMatrix[2, 3] = -1.0
         self.cameraToClipMatrix[3, 2] = (2*fzFar*fzNear)/(fzNear-fzFar)
 
-        GL.glUseProgram(self.theProgram)
-        GL.glUniformMatrix4fv(self.cameraToClipMatrixUnif,1,GL.GL_FALSE,self.cameraToClipMatrix.tolist())
-        GL.glUseProgram(0)
+        GL_STATE.useProgram(self.theProgram)
+        GL_STATE.uniformMatrix4fv(self.cameraToClipMatrixUnif, self.cameraToClipMatrix)
+        GL_STATE.useProgram(0)
 
     def initializeVAO(self):
         self.vertexBufferObject = GL.glGenBuffers(1)
 
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertexBufferObject)
-        array_type = (GL.GLfloat*len(self.vertexData))
-        GL.glBufferData(
-                GL.GL_ARRAY_BUFFER,
-                len(self.vertexData)*self.float_size,
-                array_type(*self.vertexData),
-                GL.GL_STATIC_DRAW)
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER,0)
+        GL_STATE.bindBuffer(GL.GL_ARRAY_BUFFER, self.vertexBufferObject)
+        buffer_data(GL.GL_ARRAY_BUFFER, self.vertexData, GL.GL_STATIC_DRAW)
+        GL_STATE.bindBuffer(GL.GL_ARRAY_BUFFER,0)
 
         self.indexBufferObject = GL.glGenBuffers(1)
-        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, self.indexBufferObject)
-        array_type = (GL.GLushort*len(self.indexData))
-        GL.glBufferData(
-                GL.GL_ELEMENT_ARRAY_BUFFER,
-                len(self.indexData)*self.short_size,
-                array_type(*self.indexData),
-                GL.GL_STATIC_DRAW)
-        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER,0)
+        GL_STATE.bindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, self.indexBufferObject)
+        buffer_data(GL.GL_ELEMENT_ARRAY_BUFFER, self.indexData, GL.GL_STATIC_DRAW, dtype=GL.GLushort)
+        GL_STATE.bindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER,0)
 
         # NOTE: generating vao before initializeProgram due to a validation
         #       problem on OSX.  For some reason a vao must be bound to 
         #       compile properly on OSX
-        GL.glBindVertexArray(self.vao)
+        GL_STATE.bindVertexArray(self.vao)
 
         colorDataOffset = 3*self.float_size*self.numberOfVertices
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER,self.vertexBufferObject)
+        GL_STATE.bindBuffer(GL.GL_ARRAY_BUFFER,self.vertexBufferObject)
         GL.glEnableVertexAttribArray(self.positionAttrib)
         GL.glEnableVertexAttribArray(self.colorAttrib)
         GL.glVertexAttribPointer(self.positionAttrib, 3, GL.GL_FLOAT, GL.GL_FALSE, 0, None)
         GL.glVertexAttribPointer(self.colorAttrib, 4, GL.GL_FLOAT, GL.GL_FALSE, 0, GL.GLvoidp(colorDataOffset))
-        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER,self.indexBufferObject)
+        GL_STATE.bindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER,self.indexBufferObject)
 
-        GL.glBindVertexArray(0)
+        GL_STATE.bindVertexArray(0)
 
     def init(self):
         # NOTE: see initializeVAO for an explaination of why this is 
         #       being generated here 
         self.vao = GL.glGenVertexArrays(1)
-        GL.glBindVertexArray(self.vao)
+        GL_STATE.bindVertexArray(self.vao)
 
         self.initializeProgram()
         self.initializeVAO()
 
 
-        GL.glEnable(GL.GL_CULL_FACE)
+        GL_STATE.enable(GL.GL_CULL_FACE)
         GL.glCullFace(GL.GL_BACK)
         GL.glFrontFace(GL.GL_CW)
 
-        GL.glEnable(GL.GL_DEPTH_TEST)
+        GL_STATE.enable(GL.GL_DEPTH_TEST)
         GL.glDepthMask(GL.GL_TRUE)
         GL.glDepthFunc(GL.GL_LEQUAL)
         GL.glDepthRange(0.0, 1.0)
@@ -422,9 +283,9 @@ class Tutorial(AbstractTutorial):
         self.cameraToClipMatrix[0, 0] = self.fFrustumScale / (w/float(h))
         self.cameraToClipMatrix[1, 1] = self.fFrustumScale
 
-        GL.glUseProgram(self.theProgram)
-        GL.glUniformMatrix4fv(self.cameraToClipMatrixUnif,1,GL.GL_FALSE,self.cameraToClipMatrix.tolist())
-        GL.glUseProgram(0)
+        GL_STATE.useProgram(self.theProgram)
+        GL_STATE.uniformMatrix4fv(self.cameraToClipMatrixUnif, self.cameraToClipMatrix)
+        GL_STATE.useProgram(0)
 
         GL.glViewport(0, 0, w, h);
 
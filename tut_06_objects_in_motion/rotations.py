@@ -3,7 +3,7 @@ import math
 import glfw
 from OpenGL import GL
 from OpenGL.GL.shaders import compileShader, compileProgram
-from gltut_framework import AbstractTutorial, Matrix, Vector, Point
+from gltut_framework import AbstractTutorial, GL_STATE, buffer_data, Matrix, Vector, Point, Quaternion
 from .data.vertex_data import VERTEX_DATA, INDICES, NUMBER_OF_VERTICES
 
 #Load shaders from files.
@@ -29,10 +29,12 @@ class Instance(object):
         return fCurrTimeThroughLoop * fScale
 
     def calcRotation(self, fElapsedTime):
+        # returns a Quaternion, which unlike a rotation matrix can be
+        # interpolated between simulation steps (see Quaternion.slerp)
         raise NotImplementedError
 
-    def constructMatrix(self, fElapsedTime):
-        theMat = self.calcRotation(fElapsedTime)
+    def constructMatrix(self, rotation):
+        theMat = rotation.tomatrix()
         for index in xrange(3):
             theMat[3, index] = self.offset[index]
 
@@ -40,75 +42,31 @@ class Instance(object):
 
 class NullRotation(Instance):
     def calcRotation(self, fElapsedTime):
-        return Matrix()
+        return Quaternion()
 
 class RotateX(Instance):
     def calcRotation(self, fElapsedTime):
         fAngRad = self.computeAngleRad(fElapsedTime, 3.0)
-        fCos = math.cos(fAngRad)
-        fSin = math.sin(fAngRad)
-
-        theMat = Matrix()
-        theMat[1,1] = fCos
-        theMat[1,2] = fSin
-        theMat[2,1] = -fSin
-        theMat[2,2] = fCos
-
-        return theMat
+        return Quaternion.fromAxisAngle((1.0, 0.0, 0.0), math.degrees(fAngRad))
 
 class RotateY(Instance):
     def calcRotation(self, fElapsedTime):
         fAngRad = self.computeAngleRad(fElapsedTime, 3.0)
-        fCos = math.cos(fAngRad)
-        fSin = math.sin(fAngRad)
-
-        theMat = Matrix()
-        theMat[0,0] = fCos
-        theMat[0,2] = -fSin
-        theMat[2,0] = fSin
-        theMat[2,2] = fCos
-
-        return theMat
+        return Quaternion.fromAxisAngle((0.0, 1.0, 0.0), math.degrees(fAngRad))
 
 class RotateZ(Instance):
     def calcRotation(self, fElapsedTime):
         fAngRad = self.computeAngleRad(fElapsedTime, 3.0)
-        fCos = math.cos(fAngRad)
-        fSin = math.sin(fAngRad)
-
-        theMat = Matrix()
-        theMat[0,0] = fCos
-        theMat[0,1] = fSin
-        theMat[1,0] = -fSin
-        theMat[1,1] = fCos
-
-        return theMat
+        return Quaternion.fromAxisAngle((0.0, 0.0, 1.0), math.degrees(fAngRad))
 
 class RotateAxis(Instance):
     def calcRotation(self, fElapsedTime):
         fAngRad = self.computeAngleRad(fElapsedTime, 2.0)
-        fCos = math.cos(fAngRad)
-        fInvCos = 1.0 - fCos
-        fSin = math.sin(fAngRad)
-        fInvSin = 1.0 - fSin
-
-        axis = Vector(1, 1, 1)
-        axis.normalize()
-        theMat = Matrix()
-        theMat[0,0] = (axis.x * axis.x) + ((1- axis.x * axis.x) * fCos)
-        theMat[1,0] = axis.x * axis.y * (fInvCos) - (axis.z * fSin)
-        theMat[2,0] = axis.x * axis.z * (fInvCos) + (axis.y * fSin)
-
-        theMat[0,1] = axis.x * axis.y * (fInvCos) + (axis.z * fSin)
-        theMat[1,1] = (axis.y * axis.y) + ((1 - axis.y * axis.y) * fCos)
-        theMat[2,1] = axis.y * axis.z * (fInvCos) - (axis.x * fSin)
-
-        theMat[0,2] = axis.x * axis.z * (fInvCos) - (axis.y * fSin)
-        theMat[1,2] = axis.y * axis.z * (fInvCos) + (axis.x * fSin)
-        theMat[2,2] = (axis.z * axis.z) + ((1 - axis.z * axis.z) * fCos)
-        return theMat
+        return Quaternion.fromAxisAngle((1.0, 1.0, 1.0), math.degrees(fAngRad))
 
 class Tutorial(AbstractTutorial):
+    fixed_timestep = 1.0 / 60.0
+
     def __init__(self, *args, **kwargs):
         super(Tutorial, self).__init__(*args, **kwargs)
         self.theProgram = None
@@ -126,6 +84,11 @@ class Tutorial(AbstractTutorial):
                 RotateY([-5.0, 5.0, -25.0]),
                 RotateZ([5.0, 5.0, -25.0]),
                 RotateAxis([5.0, -5.0, -25.0])]
+
+        # the instances' rotations at the last two simulation steps, which
+        # render interpolates between
+        self.previousRotations = self.currentRotations = [
+                currInst.calcRotation(0.0) for currInst in self.instanceList]
         
         self.vertexData = VERTEX_DATA
         self.numberOfVertices = NUMBER_OF_VERTICES
@@ -158,75 +121,70 @@ class Tutorial(AbstractTutorial):
         self.cameraToClipMatrix[2, 3] = -1.0
         self.cameraToClipMatrix[3, 2] = (2*fzFar*fzNear)/(fzNear-fzFar)
 
-        GL.glUseProgram(self.theProgram)
-        GL.glUniformMatrix4fv(self.cameraToClipMatrixUnif,1,GL.GL_FALSE,self.cameraToClipMatrix.tolist())
-        GL.glUseProgram(0)
+        GL_STATE.useProgram(self.theProgram)
+        GL_STATE.uniformMatrix4fv(self.cameraToClipMatrixUnif, self.cameraToClipMatrix)
+        GL_STATE.useProgram(0)
 
     def initializeVertexBuffer(self):
         self.vertexBufferObject = GL.glGenBuffers(1)
 
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertexBufferObject)
-        array_type = (GL.GLfloat*len(self.vertexData))
-        GL.glBufferData(
-                GL.GL_ARRAY_BUFFER,
-                len(self.vertexData)*self.float_size,
-                array_type(*self.vertexData),
-                GL.GL_STATIC_DRAW)
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER,0)
+        GL_STATE.bindBuffer(GL.GL_ARRAY_BUFFER, self.vertexBufferObject)
+        buffer_data(GL.GL_ARRAY_BUFFER, self.vertexData, GL.GL_STATIC_DRAW)
+        GL_STATE.bindBuffer(GL.GL_ARRAY_BUFFER,0)
 
         self.indexBufferObject = GL.glGenBuffers(1)
-        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, self.indexBufferObject)
-        array_type = (GL.GLushort*len(self.indexData))
-        GL.glBufferData(
-                GL.GL_ELEMENT_ARRAY_BUFFER,
-                len(self.indexData)*self.short_size,
-                array_type(*self.indexData),
-                GL.GL_STATIC_DRAW)
-        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER,0)
+        GL_STATE.bindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, self.indexBufferObject)
+        buffer_data(GL.GL_ELEMENT_ARRAY_BUFFER, self.indexData, GL.GL_STATIC_DRAW, dtype=GL.GLushort)
+        GL_STATE.bindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER,0)
 
     def init(self):
         self.vao = GL.glGenVertexArrays(1)
-        GL.glBindVertexArray(self.vao)
+        GL_STATE.bindVertexArray(self.vao)
 
         self.initializeProgram()
         self.initializeVertexBuffer()
 
         colorDataOffset = 3*self.float_size*self.numberOfVertices
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER,self.vertexBufferObject)
+        GL_STATE.bindBuffer(GL.GL_ARRAY_BUFFER,self.vertexBufferObject)
         GL.glEnableVertexAttribArray(0)
         GL.glEnableVertexAttribArray(1)
         GL.glVertexAttribPointer(0, 3, GL.GL_FLOAT, GL.GL_FALSE, 0, None)
         GL.glVertexAttribPointer(1, 4, GL.GL_FLOAT, GL.GL_FALSE, 0, GL.GLvoidp(colorDataOffset))
-        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER,self.indexBufferObject)
+        GL_STATE.bindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER,self.indexBufferObject)
 
-        GL.glBindVertexArray(0)
+        GL_STATE.bindVertexArray(0)
 
-        GL.glEnable(GL.GL_CULL_FACE)
+        GL_STATE.enable(GL.GL_CULL_FACE)
         GL.glCullFace(GL.GL_BACK)
         GL.glFrontFace(GL.GL_CW)
 
-        GL.glEnable(GL.GL_DEPTH_TEST)
+        GL_STATE.enable(GL.GL_DEPTH_TEST)
         GL.glDepthMask(GL.GL_TRUE)
         GL.glDepthFunc(GL.GL_LESS)
         GL.glDepthRange(0.0, 1.0)
 
-    def display(self):
+    def update(self, dt):
+        self.previousRotations = self.currentRotations
+        self.currentRotations = [
+                currInst.calcRotation(self.simulation_time) for currInst in self.instanceList]
+
+    def render(self, alpha):
         GL.glClearColor(0.0, 0.0, 0.0, 0.0)
         GL.glClearDepth(1.0)
         GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
 
-        GL.glUseProgram(self.theProgram)
+        GL_STATE.useProgram(self.theProgram)
 
-        GL.glBindVertexArray(self.vao)
+        GL_STATE.bindVertexArray(self.vao)
 
-        for currInst in self.instanceList:
-            transformMatrix = currInst.constructMatrix(self.elapsed_time)
+        for currInst, previous, current in zip(self.instanceList, self.previousRotations, self.currentRotations):
+            transformMatrix = currInst.constructMatrix(previous.slerp(current, alpha))
 
-            GL.glUniformMatrix4fv(self.modelToCameraMatrixUnif, 1, GL.GL_FALSE, transformMatrix.tolist())
+            GL_STATE.uniformMatrix4fv(self.modelToCameraMatrixUnif, transformMatrix)
             GL.glDrawElements(GL.GL_TRIANGLES, len(self.indexData), GL.GL_UNSIGNED_SHORT, None)
 
-        GL.glBindVertexArray(0)
-        GL.glUseProgram(0)
+        GL_STATE.bindVertexArray(0)
+        GL_STATE.useProgram(0)
 
         glfw.SwapBuffers()
 
@@ -234,9 +192,9 @@ class Tutorial(AbstractTutorial):
         self.cameraToClipMatrix[0, 0] = self.fFrustumScale / (w/float(h))
         self.cameraToClipMatrix[1, 1] = self.fFrustumScale
 
-        GL.glUseProgram(self.theProgram)
-        GL.glUniformMatrix4fv(self.cameraToClipMatrixUnif,1,GL.GL_FALSE,self.cameraToClipMatrix.tolist())
-        GL.glUseProgram(0)
+        GL_STATE.useProgram(self.theProgram)
+        GL_STATE.uniformMatrix4fv(self.cameraToClipMatrixUnif, self.cameraToClipMatrix)
+        GL_STATE.useProgram(0)
 
         GL.glViewport(0, 0, w, h);
 
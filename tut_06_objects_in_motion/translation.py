@@ -3,7 +3,7 @@ import math
 import glfw
 from OpenGL import GL
 from OpenGL.GL.shaders import compileShader, compileProgram
-from gltut_framework import AbstractTutorial, Matrix, Vector, Point
+from gltut_framework import AbstractTutorial, GL_STATE, buffer_data, Matrix, Vector, Point
 from .data.vertex_data import VERTEX_DATA, INDICES, NUMBER_OF_VERTICES
 
 #Load shaders from files.
@@ -17,9 +17,8 @@ class Instance(object):
     def calcOffset(self, fElapsedTime):
         raise NotImplementedError
 
-    def constructMatrix(self, fElapsedTime):
+    def constructMatrix(self, point):
         theMat = Matrix()
-        point = self.calcOffset(fElapsedTime)
         for index in xrange(4):
             theMat[3, index] = point[index]
         return theMat
@@ -53,6 +52,8 @@ class BottomCircleOffset(Instance):
                 math.sin(fCurrTimeThroughLoop * fScale) * 5.0 - 20.0)
 
 class Tutorial(AbstractTutorial):
+    fixed_timestep = 1.0 / 60.0
+
     def __init__(self, *args, **kwargs):
         super(Tutorial, self).__init__(*args, **kwargs)
         self.theProgram = None
@@ -68,6 +69,11 @@ class Tutorial(AbstractTutorial):
                 StationaryOffset(),
                 OvalOffset(),
                 BottomCircleOffset()]
+
+        # the instances' offsets at the last two simulation steps, which
+        # render interpolates between
+        self.previousOffsets = self.currentOffsets = [
+                currInst.calcOffset(0.0) for currInst in self.instanceList]
         
         self.vertexData = VERTEX_DATA
         self.numberOfVertices = NUMBER_OF_VERTICES
@@ -100,75 +106,70 @@ class Tutorial(AbstractTutorial):
         self.cameraToClipMatrix[2, 3] = -1.0
         self.cameraToClipMatrix[3, 2] = (2*fzFar*fzNear)/(fzNear-fzFar)
 
-        GL.glUseProgram(self.theProgram)
-        GL.glUniformMatrix4fv(self.cameraToClipMatrixUnif,1,GL.GL_FALSE,self.cameraToClipMatrix.tolist())
-        GL.glUseProgram(0)
+        GL_STATE.useProgram(self.theProgram)
+        GL_STATE.uniformMatrix4fv(self.cameraToClipMatrixUnif, self.cameraToClipMatrix)
+        GL_STATE.useProgram(0)
 
     def initializeVertexBuffer(self):
         self.vertexBufferObject = GL.glGenBuffers(1)
 
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertexBufferObject)
-        array_type = (GL.GLfloat*len(self.vertexData))
-        GL.glBufferData(
-                GL.GL_ARRAY_BUFFER,
-                len(self.vertexData)*self.float_size,
-                array_type(*self.vertexData),
-                GL.GL_STATIC_DRAW)
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER,0)
+        GL_STATE.bindBuffer(GL.GL_ARRAY_BUFFER, self.vertexBufferObject)
+        buffer_data(GL.GL_ARRAY_BUFFER, self.vertexData, GL.GL_STATIC_DRAW)
+        GL_STATE.bindBuffer(GL.GL_ARRAY_BUFFER,0)
 
         self.indexBufferObject = GL.glGenBuffers(1)
-        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, self.indexBufferObject)
-        array_type = (GL.GLushort*len(self.indexData))
-        GL.glBufferData(
-                GL.GL_ELEMENT_ARRAY_BUFFER,
-                len(self.indexData)*self.short_size,
-                array_type(*self.indexData),
-                GL.GL_STATIC_DRAW)
-        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER,0)
+        GL_STATE.bindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, self.indexBufferObject)
+        buffer_data(GL.GL_ELEMENT_ARRAY_BUFFER, self.indexData, GL.GL_STATIC_DRAW, dtype=GL.GLushort)
+        GL_STATE.bindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER,0)
 
     def init(self):
         self.vao = GL.glGenVertexArrays(1)
-        GL.glBindVertexArray(self.vao)
+        GL_STATE.bindVertexArray(self.vao)
 
         self.initializeProgram()
         self.initializeVertexBuffer()
 
         colorDataOffset = 3*self.float_size*self.numberOfVertices
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER,self.vertexBufferObject)
+        GL_STATE.bindBuffer(GL.GL_ARRAY_BUFFER,self.vertexBufferObject)
         GL.glEnableVertexAttribArray(0)
         GL.glEnableVertexAttribArray(1)
         GL.glVertexAttribPointer(0, 3, GL.GL_FLOAT, GL.GL_FALSE, 0, None)
         GL.glVertexAttribPointer(1, 4, GL.GL_FLOAT, GL.GL_FALSE, 0, GL.GLvoidp(colorDataOffset))
-        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER,self.indexBufferObject)
+        GL_STATE.bindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER,self.indexBufferObject)
 
-        GL.glBindVertexArray(0)
+        GL_STATE.bindVertexArray(0)
 
-        GL.glEnable(GL.GL_CULL_FACE)
+        GL_STATE.enable(GL.GL_CULL_FACE)
         GL.glCullFace(GL.GL_BACK)
         GL.glFrontFace(GL.GL_CW)
 
-        GL.glEnable(GL.GL_DEPTH_TEST)
+        GL_STATE.enable(GL.GL_DEPTH_TEST)
         GL.glDepthMask(GL.GL_TRUE)
         GL.glDepthFunc(GL.GL_LESS)
         GL.glDepthRange(0.0, 1.0)
 
-    def display(self):
+    def update(self, dt):
+        self.previousOffsets = self.currentOffsets
+        self.currentOffsets = [
+                currInst.calcOffset(self.simulation_time) for currInst in self.instanceList]
+
+    def render(self, alpha):
         GL.glClearColor(0.0, 0.0, 0.0, 0.0)
         GL.glClearDepth(1.0)
         GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
 
-        GL.glUseProgram(self.theProgram)
+        GL_STATE.useProgram(self.theProgram)
 
-        GL.glBindVertexArray(self.vao)
+        GL_STATE.bindVertexArray(self.vao)
 
-        for currInst in self.instanceList:
-            transformMatrix = currInst.constructMatrix(self.elapsed_time)
+        for currInst, previous, current in zip(self.instanceList, self.previousOffsets, self.currentOffsets):
+            transformMatrix = currInst.constructMatrix(previous.lerp(current, alpha))
 
-            GL.glUniformMatrix4fv(self.modelToCameraMatrixUnif, 1, GL.GL_FALSE, transformMatrix.tolist())
+            GL_STATE.uniformMatrix4fv(self.modelToCameraMatrixUnif, transformMatrix)
             GL.glDrawElements(GL.GL_TRIANGLES, len(self.indexData), GL.GL_UNSIGNED_SHORT, None)
 
-        GL.glBindVertexArray(0)
-        GL.glUseProgram(0)
+        GL_STATE.bindVertexArray(0)
+        GL_STATE.useProgram(0)
 
         glfw.SwapBuffers()
 
@@ -176,9 +177,9 @@ class Tutorial(AbstractTutorial):
         self.cameraToClipMatrix[0, 0] = self.fFrustumScale / (w/float(h))
         self.cameraToClipMatrix[1, 1] = self.fFrustumScale
 
-        GL.glUseProgram(self.theProgram)
-        GL.glUniformMatrix4fv(self.cameraToClipMatrixUnif,1,GL.GL_FALSE,self.cameraToClipMatrix.tolist())
-        GL.glUseProgram(0)
+        GL_STATE.useProgram(self.theProgram)
+        GL_STATE.uniformMatrix4fv(self.cameraToClipMatrixUnif, self.cameraToClipMatrix)
+        GL_STATE.useProgram(0)
 
         GL.glViewport(0, 0, w, h);
 
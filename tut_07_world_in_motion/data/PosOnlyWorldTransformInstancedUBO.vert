@@ -0,0 +1,21 @@
+#version 330
+
+layout(location = 0) in vec4 position;
+layout(location = 2) in mat4 modelToWorldMatrix;
+layout(location = 6) in vec4 instanceColor;
+
+smooth out vec4 interpColor;
+
+layout(std140) uniform GlobalMatrices
+{
+	mat4 cameraToClipMatrix;
+	mat4 worldToCameraMatrix;
+};
+
+void main()
+{
+	vec4 temp = modelToWorldMatrix * position;
+	temp = worldToCameraMatrix * temp;
+	gl_Position = cameraToClipMatrix * temp;
+	interpColor = instanceColor;
+}
@@ -15,5 +15,5 @@ INDICES = [
         ]
 
 def create_mesh():
-    from gltut_framework import Mesh
-    return Mesh(VERTICES, INDICES, DRAW_METHOD)
+    from gltut_framework import MESH_REGISTRY
+    return MESH_REGISTRY.acquire(VERTICES, INDICES, DRAW_METHOD)
@@ -4,17 +4,15 @@ NOTE: order of multiplication is different because numpy matrices
 """
 import os
 import math
+import numpy
 import glfw
 from OpenGL import GL
 from OpenGL.GL.shaders import compileShader, compileProgram
-from gltut_framework import AbstractTutorial, MatrixStack, Matrix, Vector, Point, clamp
+from gltut_framework import AbstractTutorial, RENDER_ON_DEMAND, GL_STATE, RenderQueue, UniformBlock, StaticBatch, MatrixStack, MatrixArray, Matrix, Vector, Point, PointArray, clamp, lookAt
+from gltut_framework import UniformGrid, LODGroup, screen_space_distance, transform_boxes, frustum_planes, spheres_in_frustum
 from .data.tree_positions import FOREST as g_forest
 from .data import unit_cube, unit_plane
 
-#TMP
-from .data.tmp_vertex_data import VERTEX_DATA, INDICES, NUMBER_OF_VERTICES
-#TMP
-
 # NOTE:
 # import depth_clamp as an ARB extension to make this work.
 # OpenGL.GL should include GL_DEPTH_CLAMP, but it doesn't.
@@ -22,6 +20,15 @@ from OpenGL.GL.ARB import depth_clamp
 
 TUT_DIR = os.path.abspath(os.path.dirname(__file__))
 
+GLOBAL_MATRICES_BINDING = 0
+
+# side of the forest index's grid cells, a few trees across
+FOREST_CELL_SIZE = 20.0
+
+# trunks and treetops stop being drawn once they are narrower than this
+# many pixels on screen
+FOREST_LOD_PIXELS = 1.0
+
 class ProgramData(object):
     def __init__(self):
         self.theProgram = None
@@ -31,11 +38,15 @@ class ProgramData(object):
         self.baseColorUnif = None
 
 class Tutorial(AbstractTutorial):
+    # the scene only changes on key presses
+    render_policy = RENDER_ON_DEMAND
+
     def __init__(self, *args, **kwargs):
         super(Tutorial, self).__init__(*args, **kwargs)
         self.uniformColor = None
         self.objectColor = None
         self.uniformColorTint = None
+        self.instancedColor = None
 
         self.fzNear = 1.0
         self.fzFar = 1000.0
@@ -46,6 +57,21 @@ class Tutorial(AbstractTutorial):
         self.pCubeColorMesh = None
         self.pPlaneMesh = None
 
+        self.forestTrunkMatrices = None
+        self.forestConeMatrices = None
+
+        self.columnBaseMatrices = None
+        self.columnTopMatrices = None
+        self.columnMainMatrices = None
+        self.parthenonBatch = None
+        self.forestIndex = None
+        self.forestCenters = None
+        self.forestTrunkLOD = None
+        self.forestConeLOD = None
+
+        self.cameraToClipMatrix = Matrix()
+        self.worldToClipMatrix = Matrix()
+
         self.fYAngle = 0.0
         self.fXAngle = 0.0
 
@@ -61,6 +87,10 @@ class Tutorial(AbstractTutorial):
         self.camTarget = Point(0.0, 0.4, 0.0)
 
         self.sphereCamRelPos = Point(67.5, -46.0, 150.0)
+        self.camPos = None
+
+        self.renderQueue = RenderQueue()
+        self.globalMatrices = None
 
         self._lshift_pressed = False
         self._rshift_pressed = False
@@ -78,6 +108,7 @@ class Tutorial(AbstractTutorial):
 
         data = ProgramData()
         data.theProgram = compileProgram(*shaderList)
+        self.globalMatrices.attach(data.theProgram)
         data.modelToWorldMatrixUnif = GL.glGetUniformLocation(data.theProgram, "modelToWorldMatrix")
         data.worldToCameraMatrixUnif = GL.glGetUniformLocation(data.theProgram, "worldToCameraMatrix")
         data.cameraToClipMatrixUnif = GL.glGetUniformLocation(data.theProgram, "cameraToClipMatrix")
@@ -86,192 +117,151 @@ class Tutorial(AbstractTutorial):
         return data
 
     def initializeProgram(self):
-        self.uniformColor = self.loadProgram("PosOnlyWorldTransform.vert", "ColorUniform.frag")
-        self.objectColor = self.loadProgram("PosColorWorldTransform.vert", "ColorPassthrough.frag")
-        # self.uniformColorTint = self.loadProgram("PosColorWorldTransform.vert", "ColorMultUniform.frag")
-        self.uniformColorTint = self.loadProgram("PosOnlyWorldTransform.vert", "ColorUniform.frag")
-
-    def calcLookAtMatrix(self, cameraPt, lookPt, upPt):
-        lookDir = (lookPt - cameraPt).normal()
-        upDir = upPt.normal()
-
-        rightDir = (lookDir ^ upDir).normal()
-        perpUpDir = rightDir ^ lookDir
-
-        rotMat = Matrix()
-        for i in xrange(3):
-            rotMat[0, i] = rightDir[i]
-            rotMat[1, i] = perpUpDir[i]
-            rotMat[2, i] = -lookDir[i]
-
-
-
-            rotMat[3, i] = cameraPt[i]
-        rotMat = rotMat.inverse()
-        return rotMat
-
-        # rotMat = rotMat.transpose()
+        self.globalMatrices = UniformBlock("GlobalMatrices", GLOBAL_MATRICES_BINDING, [
+                ("cameraToClipMatrix", "mat4"),
+                ("worldToCameraMatrix", "mat4")])
 
-        # transMat = Matrix()
-        # for i in xrange(3):
-        #     transMat[3, i] = -cameraPt[i]
+        self.uniformColor = self.loadProgram("PosOnlyWorldTransformUBO.vert", "ColorUniform.frag")
+        self.objectColor = self.loadProgram("PosColorWorldTransformUBO.vert", "ColorPassthrough.frag")
+        # self.uniformColorTint = self.loadProgram("PosColorWorldTransformUBO.vert", "ColorMultUniform.frag")
+        self.uniformColorTint = self.loadProgram("PosOnlyWorldTransformUBO.vert", "ColorUniform.frag")
+        self.instancedColor = self.loadProgram("PosOnlyWorldTransformInstancedUBO.vert", "ColorPassthrough.frag")
 
-        # return transMat * rotMat
+    def calcLookAtMatrix(self, cameraPt, lookPt, upPt):
+        return lookAt(cameraPt, lookPt, upPt)
 
     def init(self):
         tmp_vao = GL.glGenVertexArrays(1)
-        GL.glBindVertexArray(tmp_vao)
+        GL_STATE.bindVertexArray(tmp_vao)
 
         self.initializeProgram()
 
+        # NOTE: the cone, cylinder and both cubes are all unit cubes for now,
+        #       create_mesh returns the same shared Mesh for each of them.
         self.pConeMesh = unit_cube.create_mesh()
         self.pCylinderMesh = unit_cube.create_mesh()
         self.pCubeTintMesh = unit_cube.create_mesh()
         self.pCubeColorMesh = unit_cube.create_mesh()
         self.pPlaneMesh = unit_plane.create_mesh()
 
-        GL.glEnable(GL.GL_CULL_FACE)
+        self.initializeForest()
+        self.initializeColumns()
+        self.initializeParthenon()
+
+        GL_STATE.enable(GL.GL_CULL_FACE)
         GL.glCullFace(GL.GL_BACK)
         GL.glFrontFace(GL.GL_CW)
 
-        GL.glEnable(GL.GL_DEPTH_TEST)
+        GL_STATE.enable(GL.GL_DEPTH_TEST)
         GL.glDepthMask(GL.GL_TRUE)
         GL.glDepthFunc(GL.GL_LEQUAL)
         GL.glDepthRange(0.0, 1.0)
-        GL.glEnable(depth_clamp.GL_DEPTH_CLAMP)
-
-    def drawTree(self, modelMatrix, fTrunkHeight=2.0, fConeHeight=3.0):
-        # Draw trunk.
-        with modelMatrix:
-            modelMatrix.scale(Vector(1.0, fTrunkHeight, 1.0))
-            modelMatrix.translate(Vector(0.0, 0.5, 0.0))
-
-            GL.glUseProgram(self.uniformColorTint.theProgram)
-            GL.glUniformMatrix4fv(self.uniformColorTint.modelToWorldMatrixUnif,1,GL.GL_FALSE,modelMatrix.top().tolist())
-            GL.glUniform4f(self.uniformColorTint.baseColorUnif, 0.694, 0.4, 0.106, 1.0)
-            self.pCylinderMesh.render()
-            GL.glUseProgram(0)
-
-        # Draw the treetop.
-        with modelMatrix:
-            modelMatrix.translate(Vector(0.0, fTrunkHeight, 0.0))
-            modelMatrix.scale(Vector(3.0, fConeHeight, 3.0))
-
-            GL.glUseProgram(self.uniformColorTint.theProgram)
-            GL.glUniformMatrix4fv(self.uniformColorTint.modelToWorldMatrixUnif,1,GL.GL_FALSE,modelMatrix.top().tolist())
-            GL.glUniform4f(self.uniformColorTint.baseColorUnif, 0.0, 1.0, 0.0, 1.0)
-            self.pConeMesh.render()
-            GL.glUseProgram(0)
-
-    def drawColumn(self, modelMatrix, fHeight=5.0):
-        # Draw the bottom of the column.
-        with modelMatrix:
-            modelMatrix.scale(Vector(1.0, self.fColumnBaseHeight, 1.0))
-            modelMatrix.translate(Vector(0.0, 0.5, 0.0))
-
-            GL.glUseProgram(self.uniformColorTint.theProgram)
-            GL.glUniformMatrix4fv(self.uniformColorTint.modelToWorldMatrixUnif,1,GL.GL_FALSE,modelMatrix.top().tolist())
-            GL.glUniform4f(self.uniformColorTint.baseColorUnif, 1.0, 1.0, 1.0, 1.0)
-            self.pConeMesh.render()
-            GL.glUseProgram(0)
-
-        # Draw the top of the column.
-        with modelMatrix:
-            modelMatrix.translate(Vector(0.0, fHeight - self.fColumnBaseHeight, 0.0))
-            modelMatrix.scale(Vector(1.0, self.fColumnBaseHeight, 1.0))
-            modelMatrix.translate(Vector(0.0, 0.5, 0.0))
+        GL_STATE.enable(depth_clamp.GL_DEPTH_CLAMP)
+
+    def drawMesh(self, programData, mesh, modelMatrix, color):
+        self.renderQueue.add(
+                programData.theProgram,
+                mesh,
+                uniforms={programData.modelToWorldMatrixUnif: modelMatrix.top()},
+                material={programData.baseColorUnif: color})
+
+    def frustumPlanes(self, modelMatrix):
+        # planes of the view frustum in the space of modelMatrix, so bounds
+        # can be tested without transforming them
+        planes = frustum_planes(modelMatrix.top() * self.worldToClipMatrix)
+        # NOTE: with depth clamping on, geometry in front of the near plane
+        #       or past the far plane is still drawn at the clamped depth,
+        #       so only the left, right, bottom and top planes may cull.
+        if GL_STATE.isEnabled(depth_clamp.GL_DEPTH_CLAMP):
+            return planes[:4]
+        return planes
+
+    def isVisible(self, mesh, modelMatrix):
+        center, radius = mesh.bounding_sphere
+        return spheres_in_frustum(self.frustumPlanes(modelMatrix), center, radius)[0]
+
+    def drawInstances(self, mesh, matrices, color):
+        if not len(matrices):
+            return
+        self.renderQueue.add(self.instancedColor.theProgram, mesh, instances=(matrices, color))
 
-            GL.glUseProgram(self.uniformColorTint.theProgram)
-            GL.glUniformMatrix4fv(self.uniformColorTint.modelToWorldMatrixUnif,1,GL.GL_FALSE,modelMatrix.top().tolist())
-            GL.glUniform4f(self.uniformColorTint.baseColorUnif, 0.9, 0.9, 0.9, 0.9)
-            self.pCubeTintMesh.render()
-            GL.glUseProgram(0)
+    def initializeColumns(self):
+        # Like the forest, the columns are static so all of their matrices
+        # are built once here: a base and a top of fColumnBaseHeight and the
+        # main column between them.
+        fFrontZVal = (self.fParthenonLength / 2.0) - 1.0
+        fRightXVal = (self.fParthenonWidth / 2.0) - 1.0
 
-        # Draw the main column.
-        with modelMatrix:
-            modelMatrix.translate(Vector(0.0, self.fColumnBaseHeight, 0.0))
-            modelMatrix.scale(Vector(1.0, fHeight - (self.fColumnBaseHeight * 2.0), 0.8))
-            modelMatrix.translate(Vector(0.0, 0.5, 0.0))
+        positions = []
+        for iColumnNum in xrange(int(self.fParthenonWidth / 2.0)):
+            fXVal = (2.0 * iColumnNum) - (self.fParthenonWidth / 2.0) + 1.0
+            positions.append((fXVal, self.fParthenonBaseHeight, fFrontZVal))
+            positions.append((fXVal, self.fParthenonBaseHeight, -fFrontZVal))
 
-            GL.glUseProgram(self.uniformColorTint.theProgram)
-            GL.glUniformMatrix4fv(self.uniformColorTint.modelToWorldMatrixUnif,1,GL.GL_FALSE,modelMatrix.top().tolist())
-            GL.glUniform4f(self.uniformColorTint.baseColorUnif, 0.9, 0.9, 0.9, 0.9)
-            self.pCubeTintMesh.render()
-            GL.glUseProgram(0)
+        # Don't add the first or last columns, since they've been added already.
+        for iColumnNum in xrange(1, int((self.fParthenonLength - 2.0) / 2.0)):
+            fZVal = (2.0 * iColumnNum) - (self.fParthenonLength / 2.0) + 1.0
+            positions.append((fRightXVal, self.fParthenonBaseHeight, fZVal))
+            positions.append((-fRightXVal, self.fParthenonBaseHeight, fZVal))
+
+        positions = PointArray(data=positions)
+        fHeight = self.fParthenonColumnHeight
+
+        self.columnBaseMatrices = MatrixArray(len(positions))
+        self.columnBaseMatrices.translate(positions)
+        self.columnBaseMatrices.scale((1.0, self.fColumnBaseHeight, 1.0))
+        self.columnBaseMatrices.translate((0.0, 0.5, 0.0))
+
+        self.columnTopMatrices = MatrixArray(len(positions))
+        self.columnTopMatrices.translate(positions)
+        self.columnTopMatrices.translate((0.0, fHeight - self.fColumnBaseHeight, 0.0))
+        self.columnTopMatrices.scale((1.0, self.fColumnBaseHeight, 1.0))
+        self.columnTopMatrices.translate((0.0, 0.5, 0.0))
+
+        self.columnMainMatrices = MatrixArray(len(positions))
+        self.columnMainMatrices.translate(positions)
+        self.columnMainMatrices.translate((0.0, self.fColumnBaseHeight, 0.0))
+        self.columnMainMatrices.scale((1.0, fHeight - (self.fColumnBaseHeight * 2.0), 0.8))
+        self.columnMainMatrices.translate((0.0, 0.5, 0.0))
+
+    def initializeParthenon(self):
+        # The building never moves, so every part of it is baked into one
+        # StaticBatch in the building's own space, following the stack
+        # operations the tutorial used to do every frame.  Each part keeps
+        # its color as a vertex attribute, so the batch is a single draw.
+        self.parthenonBatch = StaticBatch()
+        modelMatrix = MatrixStack()
 
-    def drawParthenon(self, modelMatrix):
-        # Draw base.
+        # Base.
         with modelMatrix:
             modelMatrix.scale(Vector(self.fParthenonWidth, self.fParthenonBaseHeight, self.fParthenonLength))
             modelMatrix.translate(Vector(0.0, 0.5, 0.0))
 
-            GL.glUseProgram(self.uniformColorTint.theProgram)
-            GL.glUniformMatrix4fv(self.uniformColorTint.modelToWorldMatrixUnif,1,GL.GL_FALSE,modelMatrix.top().tolist())
-            GL.glUniform4f(self.uniformColorTint.baseColorUnif, 0.9, 0.9, 0.9, 0.9)
-            self.pConeMesh.render()
-            GL.glUseProgram(0)
+            self.parthenonBatch.add(self.pConeMesh, modelMatrix.top(), (0.9, 0.9, 0.9, 0.9))
 
-        # Draw top.
+        # Top.
         with modelMatrix:
             modelMatrix.translate(Vector(0.0, self.fParthenonColumnHeight + self.fParthenonBaseHeight, 0.0))
             modelMatrix.scale(Vector(self.fParthenonWidth, self.fParthenonTopHeight, self.fParthenonLength))
             modelMatrix.translate(Vector(0.0, 0.5, 0.0))
 
-            GL.glUseProgram(self.uniformColorTint.theProgram)
-            GL.glUniformMatrix4fv(self.uniformColorTint.modelToWorldMatrixUnif,1,GL.GL_FALSE,modelMatrix.top().tolist())
-            GL.glUniform4f(self.uniformColorTint.baseColorUnif, 0.9, 0.9, 0.9, 0.9)
-            self.pConeMesh.render()
-            GL.glUseProgram(0)
-
-        # Draw columns.
-        fFrontZVal = (self.fParthenonLength / 2.0) - 1.0
-        fRightXVal = (self.fParthenonWidth / 2.0) - 1.0
-
-        for iColumnNum in xrange(int(self.fParthenonWidth / 2.0)):
-            with modelMatrix:
-                modelMatrix.translate(Vector((2.0 * iColumnNum) - (self.fParthenonWidth / 2.0) + 1.0,
-                        self.fParthenonBaseHeight, fFrontZVal))
-
-                self.drawColumn(modelMatrix, self.fParthenonColumnHeight)
-
-            with modelMatrix:
-                modelMatrix.translate(Vector((2.0 * iColumnNum) - (self.fParthenonWidth / 2.0) + 1.0,
-                        self.fParthenonBaseHeight, -fFrontZVal))
+            self.parthenonBatch.add(self.pConeMesh, modelMatrix.top(), (0.9, 0.9, 0.9, 0.9))
 
-                self.drawColumn(modelMatrix, self.fParthenonColumnHeight)
+        # Columns.
+        self.parthenonBatch.add(self.pConeMesh, self.columnBaseMatrices, (1.0, 1.0, 1.0, 1.0))
+        self.parthenonBatch.add(self.pCubeTintMesh, self.columnTopMatrices, (0.9, 0.9, 0.9, 0.9))
+        self.parthenonBatch.add(self.pCubeTintMesh, self.columnMainMatrices, (0.9, 0.9, 0.9, 0.9))
 
-        # Don't draw the first or last columns, since they've been drawn already.
-        for iColumnNum in xrange(1, int((self.fParthenonLength - 2.0) / 2.0)):
-            with modelMatrix:
-                modelMatrix.translate(Vector(fRightXVal, self.fParthenonBaseHeight,
-                        (2.0 * iColumnNum) - (self.fParthenonLength / 2.0) + 1.0))
-
-                self.drawColumn(modelMatrix, self.fParthenonColumnHeight)
-
-            with modelMatrix:
-                modelMatrix.translate(Vector(-fRightXVal, self.fParthenonBaseHeight,
-                        (2.0 * iColumnNum) - (self.fParthenonLength / 2.0) + 1.0))
-
-                self.drawColumn(modelMatrix, self.fParthenonColumnHeight)
-
-        # Draw interior.
+        # Interior.
         with modelMatrix:
             modelMatrix.translate(Vector(0.0, 1.0, 0.0))
             modelMatrix.scale(Vector(self.fParthenonWidth - 6.0, self.fParthenonColumnHeight,
                     self.fParthenonLength - 6.0))
             modelMatrix.translate(Vector(0.0, 0.5, 0.0))
 
-            # GL.glUseProgram(self.objectColor.theProgram)
-            # GL.glUniformMatrix4fv(self.objectColor.modelToWorldMatrixUnif,1,GL.GL_FALSE,modelMatrix.top().tolist())
-            # TMP COLOR
-            GL.glUseProgram(self.uniformColor.theProgram)
-            GL.glUniformMatrix4fv(self.uniformColor.modelToWorldMatrixUnif,1,GL.GL_FALSE,modelMatrix.top().tolist())
-            GL.glUniform4f(self.uniformColor.baseColorUnif, 1.0, 1.0, 1.0, 1.0)
-
-            self.pCubeColorMesh.render()
-            GL.glUseProgram(0)
+            self.parthenonBatch.add(self.pCubeColorMesh, modelMatrix.top(), (1.0, 1.0, 1.0, 1.0))
 
-        # Draw headpiece
+        # Headpiece.
         with modelMatrix:
             modelMatrix.translate(Vector(
                     0.0, 
@@ -280,25 +270,70 @@ class Tutorial(AbstractTutorial):
             modelMatrix.rotateX(-135.0)
             modelMatrix.rotateY(45.0)
 
-            # GL.glUseProgram(self.objectColor.theProgram)
-            # GL.glUniformMatrix4fv(self.objectColor.modelToWorldMatrixUnif,1,GL.GL_FALSE,modelMatrix.top().tolist())
-            # TMP COLOR
-            GL.glUseProgram(self.uniformColor.theProgram)
-            GL.glUniformMatrix4fv(self.uniformColor.modelToWorldMatrixUnif,1,GL.GL_FALSE,modelMatrix.top().tolist())
-            GL.glUniform4f(self.uniformColor.baseColorUnif, 1.0, 1.0, 1.0, 1.0)
+            self.parthenonBatch.add(self.pCubeColorMesh, modelMatrix.top(), (1.0, 1.0, 1.0, 1.0))
 
-            self.pCubeColorMesh.render()
-            GL.glUseProgram(0)
+        self.parthenonBatch.build()
+
+    def drawParthenon(self, modelMatrix):
+        if not self.isVisible(self.parthenonBatch, modelMatrix):
+            return
+        self.renderQueue.add(
+                self.objectColor.theProgram,
+                self.parthenonBatch,
+                uniforms={self.objectColor.modelToWorldMatrixUnif: modelMatrix.top()})
+
+    def initializeForest(self):
+        # The trees never move relative to each other, so build every
+        # trunk and cone matrix up front in one batched pass: the trunk
+        # is scaled to the tree's trunk height and the cone sits on top.
+        positions = PointArray(data=[(tree.fXPos, 0.0, tree.fZPos) for tree in g_forest])
+        trunkHeights = numpy.array([tree.fTrunkHeight for tree in g_forest])
+        coneHeights = numpy.array([tree.fConeHeight for tree in g_forest])
+        ones = numpy.ones(len(g_forest))
+        zeros = numpy.zeros(len(g_forest))
+
+        self.forestTrunkMatrices = MatrixArray(len(g_forest))
+        self.forestTrunkMatrices.translate(positions)
+        self.forestTrunkMatrices.scale(numpy.column_stack([ones, trunkHeights, ones]))
+        self.forestTrunkMatrices.translate((0.0, 0.5, 0.0))
+
+        self.forestConeMatrices = MatrixArray(len(g_forest))
+        self.forestConeMatrices.translate(positions)
+        self.forestConeMatrices.translate(numpy.column_stack([zeros, trunkHeights, zeros]))
+        self.forestConeMatrices.scale(numpy.column_stack([3.0 * ones, coneHeights, 3.0 * ones]))
+
+        # index each tree by the box around its trunk and cone, in the
+        # forest's space, so culling only looks at the trees near the view
+        trunkMins, trunkMaxs = transform_boxes(self.pCylinderMesh.bounding_box, self.forestTrunkMatrices)
+        coneMins, coneMaxs = transform_boxes(self.pConeMesh.bounding_box, self.forestConeMatrices)
+        treeMins = numpy.minimum(trunkMins, coneMins)
+        treeMaxs = numpy.maximum(trunkMaxs, coneMaxs)
+        self.forestIndex = UniformGrid.from_bounds(treeMins, treeMaxs, FOREST_CELL_SIZE)
+        self.forestCenters = (treeMins + treeMaxs) * 0.5
+
+        # NOTE: there is only one trunk and one treetop mesh so far, so each
+        #       LOD group has a single level whose distance is set in
+        #       reshape.  Coarser meshes go after them as they are added.
+        self.forestTrunkLOD = LODGroup([self.pCylinderMesh], [numpy.inf])
+        self.forestConeLOD = LODGroup([self.pConeMesh], [numpy.inf])
 
     def drawForest(self, modelMatrix):
-        for currTree in g_forest:
-            with modelMatrix:
-                modelMatrix.translate(Vector(currTree.fXPos, 0.0, currTree.fZPos))
-                self.drawTree(modelMatrix, currTree.fTrunkHeight, currTree.fConeHeight)
+        # only the trees in view are transformed and drawn
+        planes = self.frustumPlanes(modelMatrix)
+        visible = self.forestIndex.query_frustum(planes)
+        eye = numpy.dot(self.camPos.toarray(), modelMatrix.top().inverse().toarray())
+        centers = self.forestCenters[visible]
+
+        # then each part is drawn with one instanced draw per detail level
+        parts = (
+                (self.forestTrunkLOD, self.forestTrunkMatrices, (0.694, 0.4, 0.106, 1.0)),
+                (self.forestConeLOD, self.forestConeMatrices, (0.0, 1.0, 0.0, 1.0)))
+        for lod, matrices, color in parts:
+            levels = lod.select(eye, centers, visible)
+            for mesh, indices in lod.partition(levels):
+                self.drawInstances(mesh, matrices[visible[indices]] * modelMatrix.top(), color)
 
     def resolveCamPosition(self):
-        tempMat = MatrixStack() # not needed?
-
         phi = math.radians(self.sphereCamRelPos.x)
         theta = math.radians(self.sphereCamRelPos.y + 90.0)
 
@@ -317,19 +352,15 @@ class Tutorial(AbstractTutorial):
         GL.glClearDepth(1.0)
         GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
 
-        camPos = self.resolveCamPosition()
+        camPos = self.camPos = self.resolveCamPosition()
 
         camMatrix = MatrixStack()
         camMatrix.m_currMat = self.calcLookAtMatrix(camPos, self.camTarget, Vector(0,1,0))
         camMatrix.push()
 
-        GL.glUseProgram(self.uniformColor.theProgram)
-        GL.glUniformMatrix4fv(self.uniformColor.worldToCameraMatrixUnif,1,GL.GL_FALSE,camMatrix.top().tolist())
-        GL.glUseProgram(self.objectColor.theProgram)
-        GL.glUniformMatrix4fv(self.objectColor.worldToCameraMatrixUnif,1,GL.GL_FALSE,camMatrix.top().tolist())
-        GL.glUseProgram(self.uniformColorTint.theProgram)
-        GL.glUniformMatrix4fv(self.uniformColorTint.worldToCameraMatrixUnif,1,GL.GL_FALSE,camMatrix.top().tolist())
-        GL.glUseProgram(0)
+        self.globalMatrices.set("worldToCameraMatrix", camMatrix.top())
+        self.globalMatrices.upload()
+        self.worldToClipMatrix = camMatrix.top() * self.cameraToClipMatrix
 
         modelMatrix = MatrixStack()
 
@@ -337,11 +368,8 @@ class Tutorial(AbstractTutorial):
         with modelMatrix:
             modelMatrix.scale(Vector(100.0, 1.0, 100.0))
 
-            GL.glUseProgram(self.uniformColor.theProgram)
-            GL.glUniformMatrix4fv(self.uniformColor.modelToWorldMatrixUnif,1,GL.GL_FALSE,modelMatrix.top().tolist())
-            GL.glUniform4f(self.uniformColor.baseColorUnif, 0.302, 0.416, 0.0589, 1.0)
-            self.pPlaneMesh.render()
-            GL.glUseProgram(0)
+            if self.isVisible(self.pPlaneMesh, modelMatrix):
+                self.drawMesh(self.uniformColor, self.pPlaneMesh, modelMatrix, (0.302, 0.416, 0.0589, 1.0))
 
         # Draw the trees
         self.drawForest(modelMatrix)
@@ -353,40 +381,42 @@ class Tutorial(AbstractTutorial):
             self.drawParthenon(modelMatrix)
 
         if self.bDrawLookatPoint:
-            GL.glDisable(GL.GL_DEPTH_TEST)
-            identity = Matrix()
-
             with modelMatrix:
                 cameraAimVec = self.camTarget - camPos
                 modelMatrix.translate(Vector(0.0, 0.0, -cameraAimVec.length()))
                 modelMatrix.scale(Vector(1.0, 1.0, 1.0))
 
                 # GL.glUseProgram(self.objectColor.theProgram)
-                # GL.glUniformMatrix4fv(self.objectColor.modelToWorldMatrixUnif,1,GL.GL_FALSE,modelMatrix.top().tolist())
-                # GL.glUniformMatrix4fv(self.objectColor.worldToCameraMatrixUnif,1,GL.GL_FALSE,identity.tolist())
+                # GL.glUniformMatrix4fv(self.objectColor.modelToWorldMatrixUnif,1,GL.GL_FALSE,modelMatrix.top().toarray())
+                # GL.glUniformMatrix4fv(self.objectColor.worldToCameraMatrixUnif,1,GL.GL_FALSE,identity.toarray())
                 # TMP COLOR
-                GL.glUseProgram(self.uniformColor.theProgram)
-                GL.glUniformMatrix4fv(self.uniformColor.modelToWorldMatrixUnif,1,GL.GL_FALSE,modelMatrix.top().tolist())
-                GL.glUniformMatrix4fv(self.uniformColor.worldToCameraMatrixUnif,1,GL.GL_FALSE,identity.tolist())
-                GL.glUniform4f(self.uniformColor.baseColorUnif, 1.0, 1.0, 1.0, 1.0)
-
-                self.pCubeColorMesh.render()
-                GL.glUseProgram(0)
-                GL.glEnable(GL.GL_DEPTH_TEST)
+                # NOTE: the camera matrix is shared by every program through
+                #       the GlobalMatrices block, so instead of replacing it
+                #       with identity, cancel it out in the model matrix.
+                self.renderQueue.add(
+                        self.uniformColor.theProgram,
+                        self.pCubeColorMesh,
+                        uniforms={
+                            self.uniformColor.modelToWorldMatrixUnif:
+                                modelMatrix.top() * camMatrix.top().affine_inverse()},
+                        material={self.uniformColor.baseColorUnif: (1.0, 1.0, 1.0, 1.0)},
+                        state={GL.GL_DEPTH_TEST: False})
+
+        self.renderQueue.flush()
 
         glfw.SwapBuffers()
 
     def reshape(self, w, h):
         persMatrix = MatrixStack()
         persMatrix.perspective(45.0, (w/float(h)), self.fzNear, self.fzFar)
+        self.cameraToClipMatrix = persMatrix.top().copy()
+
+        self.globalMatrices.set("cameraToClipMatrix", persMatrix.top())
+        self.globalMatrices.upload()
 
-        GL.glUseProgram(self.uniformColor.theProgram)
-        GL.glUniformMatrix4fv(self.uniformColor.cameraToClipMatrixUnif,1,GL.GL_FALSE,persMatrix.top().tolist())
-        GL.glUseProgram(self.objectColor.theProgram)
-        GL.glUniformMatrix4fv(self.objectColor.cameraToClipMatrixUnif,1,GL.GL_FALSE,persMatrix.top().tolist())
-        GL.glUseProgram(self.uniformColorTint.theProgram)
-        GL.glUniformMatrix4fv(self.uniformColorTint.cameraToClipMatrixUnif,1,GL.GL_FALSE,persMatrix.top().tolist())
-        GL.glUseProgram(0)
+        # trunks are one unit wide and treetops three
+        self.forestTrunkLOD.distances = [screen_space_distance(1.0, 45.0, h, FOREST_LOD_PIXELS)]
+        self.forestConeLOD.distances = [screen_space_distance(3.0, 45.0, h, FOREST_LOD_PIXELS)]
 
         GL.glViewport(0, 0, w, h)
 